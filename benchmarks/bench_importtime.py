@@ -0,0 +1,105 @@
+"""
+Benchmark: Tempo de arranque (imports) de um worker e dos comandos 'flask'
+
+Cada worker do gunicorn (e cada comando 'flask', até o 'flask test-email')
+importa o run.py e, com ele, a app inteira. Os SDKs pesados (Stripe, Twilio,
+Cloudinary, xhtml2pdf, Authlib, Pillow) só devem ser importados quando são
+usados pela primeira vez.
+
+O script corre 'python -X importtime -c "import run"' num processo novo
+(várias vezes, fica o melhor tempo), mostra os módulos mais pesados e
+falha (código de saída 1) se:
+- o import da app ou o arranque do CLI passarem do orçamento;
+- algum dos SDKs pesados for importado no arranque.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_importtime
+    python -m benchmarks.bench_importtime --budget-ms 600 --cli-budget-ms 1200 --top 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Não podem aparecer no arranque (são importados no primeiro uso)
+SDKS_PESADOS = ('stripe', 'twilio', 'cloudinary', 'xhtml2pdf', 'authlib', 'PIL')
+
+
+def _ambiente():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env['OTP_SWEEP_INTERVAL'] = '0'  # Sem a thread de limpeza dos OTP
+    env['LOG_LEVEL'] = 'WARNING'
+    return env
+
+
+def _importtime():
+    """Corre o import da app com -X importtime e devolve [(self_us, cumulativo_us, profundidade, módulo)]."""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import run'],
+        capture_output=True, text=True, env=_ambiente(), check=True,
+    )
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        proprio, cumulativo, nome = linha[len('import time:'):].split('|')
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        modulos.append((int(proprio), int(cumulativo), profundidade, nome.strip()))
+    return modulos
+
+
+def _tempo_cli():
+    """Tempo total (ms) de 'flask --help', incluindo o arranque do interpretador."""
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run.py', '--help'],
+                   capture_output=True, env=_ambiente(), check=True)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições (fica o melhor tempo).')
+    parser.add_argument('--budget-ms', type=float, default=800, help='Orçamento para importar a app (ms).')
+    parser.add_argument('--cli-budget-ms', type=float, default=1500, help="Orçamento para o 'flask --help' (ms).")
+    parser.add_argument('--top', type=int, default=15, help='Quantos módulos mais pesados mostrar.')
+    args = parser.parse_args()
+
+    # 1. Import da app (melhor de N: o primeiro paga a cache do disco/.pyc)
+    melhor = None
+    for _ in range(args.repeat):
+        modulos = _importtime()
+        total = sum(cumulativo for _, cumulativo, profundidade, _ in modulos if profundidade == 0) / 1000
+        if melhor is None or total < melhor[0]:
+            melhor = (total, modulos)
+    total_ms, modulos = melhor
+
+    print(f"Import da app (run.py): {total_ms:.1f} ms (orçamento {args.budget_ms:.0f} ms)")
+    print(f"\nMódulos mais pesados (cumulativo):")
+    for proprio, cumulativo, profundidade, nome in sorted(modulos, key=lambda m: -m[1])[:args.top]:
+        print(f"  {cumulativo / 1000:8.1f} ms  {'  ' * profundidade}{nome}")
+
+    # 2. Arranque do CLI
+    cli_ms = min(_tempo_cli() for _ in range(args.repeat))
+    print(f"\n'flask --help': {cli_ms:.1f} ms (orçamento {args.cli_budget_ms:.0f} ms)")
+
+    # 3. Verificações
+    falhas = []
+    importados = {nome.split('.')[0] for _, _, _, nome in modulos}
+    for sdk in SDKS_PESADOS:
+        if sdk in importados:
+            falhas.append(f"'{sdk}' é importado no arranque (deve ser importado no primeiro uso)")
+    if total_ms > args.budget_ms:
+        falhas.append(f"import da app acima do orçamento ({total_ms:.1f} > {args.budget_ms:.0f} ms)")
+    if cli_ms > args.cli_budget_ms:
+        falhas.append(f"arranque do CLI acima do orçamento ({cli_ms:.1f} > {args.cli_budget_ms:.0f} ms)")
+
+    if falhas:
+        print("\n❌ " + "\n❌ ".join(falhas))
+        sys.exit(1)
+    print("\n✅ Dentro do orçamento e sem SDKs pesados no arranque.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: Memória por worker do gunicorn, com e sem preload
+
+Arranca o gunicorn (gunicorn.conf.py) duas vezes, com PRELOAD_APP=false e
+PRELOAD_APP=true, contra uma base de dados SQLite descartável; faz alguns
+pedidos a cada worker (página inicial, login, 404) e lê de
+/proc/<pid>/smaps_rollup:
+
+    RSS:  memória residente (conta as páginas partilhadas em cada processo)
+    PSS:  páginas partilhadas divididas pelos processos que as partilham
+    USS:  memória só deste processo (o que um worker a mais custa de facto)
+
+Só funciona em Linux.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_preload_memory
+    python -m benchmarks.bench_preload_memory --workers 8 --requests 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROTAS = ('/', '/login', '/pagina-que-nao-existe')
+
+
+def _memoria(pid):
+    """{'rss': kB, 'pss': kB, 'uss': kB} de um processo."""
+    campos = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) >= 2 and partes[0].endswith(':') and partes[1].isdigit():
+                campos[partes[0][:-1]] = int(partes[1])
+    return {
+        'rss': campos.get('Rss', 0),
+        'pss': campos.get('Pss', 0),
+        'uss': campos.get('Private_Clean', 0) + campos.get('Private_Dirty', 0),
+    }
+
+
+def _filhos(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _medir(preload, workers, pedidos, porta, pasta):
+    env = dict(os.environ)
+    env.update({
+        'PRELOAD_APP': 'true' if preload else 'false',
+        'DATABASE_URL': f'sqlite:///{os.path.join(pasta, "bench.db")}',
+        'WEB_CONCURRENCY': str(workers),
+        'PORT': str(porta),
+        'LOG_LEVEL': 'WARNING',
+    })
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run.py', 'db', 'upgrade'],
+                   cwd=RAIZ, env=env, check=True, capture_output=True)
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                            cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{porta}'
+        limite = time.monotonic() + 60
+        while len(_filhos(proc.pid)) < workers or not _responde(url):
+            if time.monotonic() > limite:
+                raise RuntimeError('O gunicorn não arrancou a tempo')
+            time.sleep(0.2)
+
+        # Tráfego suficiente para todos os workers servirem pedidos
+        for i in range(pedidos):
+            _responde(url + ROTAS[i % len(ROTAS)])
+
+        return _memoria(proc.pid), [_memoria(pid) for pid in _filhos(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _responde(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resposta:
+            resposta.read()
+        return True
+    except urllib.error.HTTPError:
+        return True
+    except OSError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Workers do gunicorn.')
+    parser.add_argument('--requests', type=int, default=100, help='Pedidos feitos antes de medir.')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for preload in (False, True):
+            master, workers = _medir(preload, args.workers, args.requests, args.port, pasta)
+            resultados[preload] = (master, workers)
+
+    print(f"{'':<14}{'master RSS':>12}{'worker RSS':>12}{'worker PSS':>12}{'worker USS':>12}{'total PSS':>12}")
+    for preload, (master, workers) in resultados.items():
+        media = {k: sum(w[k] for w in workers) / len(workers) for k in ('rss', 'pss', 'uss')}
+        total = master['pss'] + sum(w['pss'] for w in workers)
+        nome = 'preload' if preload else 'sem preload'
+        print(f"{nome:<14}{master['rss'] / 1024:>10.1f}MB{media['rss'] / 1024:>10.1f}MB"
+              f"{media['pss'] / 1024:>10.1f}MB{media['uss'] / 1024:>10.1f}MB{total / 1024:>10.1f}MB")
+
+    sem, com = (sum(w['uss'] for w in resultados[p][1]) / len(resultados[p][1]) for p in (False, True))
+    print(f"\nMemória própria (USS) por worker: {sem / 1024:.1f} MB -> {com / 1024:.1f} MB "
+          f"({(1 - com / sem) * 100:.0f}% a menos)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: Débito (pedidos/s) por perfil de deploy (sync, gthread, gevent)
+
+Corre o teste de carga (benchmarks/loadtest.py) uma vez por perfil
+(DEPLOY_PROFILE), com o mesmo número de workers e de utilizadores, e com
+latência simulada nas APIs externas (Stripe/Twilio). Com I/O lento, o
+perfil sync fica preso à espera; gthread e gevent continuam a atender.
+
+O perfil gevent só é medido se o pacote 'gevent' estiver instalado.
+Os resultados usam SQLite; para medir o pool de ligações, aponte
+DATABASE_URL para um Postgres descartável no loadtest.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_profiles
+    python -m benchmarks.bench_profiles --duration 30 --users 60 --workers 2 --stub-latency-ms 200
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PERFIS = ('sync', 'gthread', 'gevent')
+
+
+def _correr(perfil, args, pasta):
+    ficheiro = os.path.join(pasta, f'{perfil}.json')
+    cmd = [sys.executable, '-m', 'benchmarks.loadtest', '--profile', perfil,
+           '--duration', str(args.duration), '--users', str(args.users),
+           '--workers', str(args.workers), '--stub-latency-ms', str(args.stub_latency_ms),
+           '--json', ficheiro]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    with open(ficheiro) as f:
+        return json.load(f)['rotas']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=20, help='Duração de cada teste (segundos).')
+    parser.add_argument('--users', type=int, default=40, help='Utilizadores virtuais em simultâneo.')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn.')
+    parser.add_argument('--stub-latency-ms', type=float, default=150, help='Latência das APIs externas.')
+    parser.add_argument('--profiles', default=','.join(PERFIS), help='Perfis a medir (separados por vírgula).')
+    args = parser.parse_args()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for perfil in args.profiles.split(','):
+            if perfil == 'gevent' and importlib.util.find_spec('gevent') is None:
+                print("gevent: não instalado (pip install gevent psycogreen), a saltar")
+                continue
+            print(f"{perfil}: a medir durante {args.duration:.0f}s ...")
+            resultados[perfil] = _correr(perfil, args, pasta)
+
+    print(f"\n{'Perfil':<10}{'Pedidos':>9}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'Erros':>7}")
+    print('-' * 53)
+    for perfil, rotas in resultados.items():
+        pedidos = sum(r['pedidos'] for r in rotas.values())
+        rps = sum(r['rps'] for r in rotas.values())
+        erros = sum(r['erros'] for r in rotas.values())
+        # p50/p95 ponderados pelo número de pedidos de cada rota
+        p50 = sum(r['p50'] * r['pedidos'] for r in rotas.values()) / max(pedidos, 1)
+        p95 = sum(r['p95'] * r['pedidos'] for r in rotas.values()) / max(pedidos, 1)
+        print(f"{perfil:<10}{pedidos:>9}{rps:>9.1f}{p50:>9.1f}{p95:>9.1f}{erros:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+"""
+Teste de Carga com tráfego realista
+
+Arranca a YummyGo localmente (gunicorn ou servidor do Flask) contra uma
+base de dados SQLite descartável, com stubs locais do Stripe, Twilio e
+SMTP (ver benchmarks/stubs.py), e simula clientes e donos de restaurante:
+
+    Clientes: página inicial, cardápio, pesquisa, adicionar ao carrinho,
+              ver carrinho, checkout (com "pagamento" no stub do Stripe).
+    Donos:    painel da cozinha (avançar o estado dos pedidos) e relatórios.
+
+No fim mostra, por rota, o número de pedidos, pedidos/s e as latências
+p50/p95/p99. Com --json guarda os resultados; com --compare compara o p95
+com uma execução anterior e termina com erro se houver regressões.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.loadtest --duration 30 --users 20
+    python -m benchmarks.loadtest --json base.json
+    python -m benchmarks.loadtest --compare base.json --max-regression 25
+    python -m benchmarks.loadtest --profile gthread --stub-latency-ms 150
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.stubs import Stubs
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SENHA = '123456'
+TERMOS_PESQUISA = ['pizza', 'burger', 'sushi', 'salada', 'bolo', 'suco', 'frango', 'xyz']
+
+RE_CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+RE_ENDERECO = re.compile(r'name="endereco_id"[^>]*value="(\d+)"')
+RE_AVANCAR = re.compile(r'name="pedido_id" value="(\d+)"\s*/>\s*<input type="hidden" name="acao" value="avancar"')
+
+
+# --- Preparação ---
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def preparar_base_de_dados(restaurantes, clientes, seed):
+    """
+    Cria as tabelas e os dados de teste. Deve ser chamada depois de o
+    ambiente (DATABASE_URL, etc.) estar definido.
+
+    :return: Dicionário com os e-mails dos clientes/donos e os IDs de
+             restaurantes e produtos.
+    """
+    from src import create_app
+    from src.extensions import db
+    from src.models import User, Restaurante, Categoria, Produto, Endereco
+
+    rnd = random.Random(seed)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+        senha_hash = User(nome_completo='tmp')
+        senha_hash.set_password(SENHA)
+        senha_hash = senha_hash.password_hash
+
+        donos = [User(nome_completo=f'Dono {i}', email=f'dono{i}@loadtest.local', role='restaurante',
+                      password_hash=senha_hash) for i in range(restaurantes)]
+        clientes_db = [User(nome_completo=f'Cliente {i}', email=f'cliente{i}@loadtest.local', role='cliente',
+                            password_hash=senha_hash) for i in range(clientes)]
+        db.session.add_all(donos + clientes_db)
+        db.session.flush()
+
+        for cliente in clientes_db:
+            db.session.add(Endereco(rua='Rua do Teste', numero=str(rnd.randint(1, 999)), bairro='Centro',
+                                    cidade='São Paulo', estado='SP', cep='01000-000', user_id=cliente.id,
+                                    latitude=-23.55 + rnd.uniform(-0.05, 0.05),
+                                    longitude=-46.63 + rnd.uniform(-0.05, 0.05)))
+
+        produtos_por_restaurante = {}
+        for i, dono in enumerate(donos):
+            rest = Restaurante(nome_fantasia=f'Restaurante {i}', user_id=dono.id, ativo=True,
+                               taxa_entrega=rnd.choice([0.0, 5.0, 7.5]), tempo_medio_entrega=rnd.choice([20, 30, 45]))
+            db.session.add(rest)
+            db.session.flush()
+            produtos = []
+            for nome_cat in ('Pratos', 'Bebidas'):
+                cat = Categoria(nome=nome_cat, restaurante_id=rest.id)
+                db.session.add(cat)
+                db.session.flush()
+                for j in range(5):
+                    termo = rnd.choice(TERMOS_PESQUISA[:-1])
+                    produtos.append(Produto(nome=f'{termo.title()} {i}-{j}', descricao=f'Delicioso {termo}',
+                                            preco=round(rnd.uniform(8, 80), 2), categoria_id=cat.id,
+                                            restaurante_id=rest.id, disponivel=True))
+            db.session.add_all(produtos)
+            db.session.flush()
+            produtos_por_restaurante[rest.id] = [p.id for p in produtos]
+
+        db.session.commit()
+        return {
+            'clientes': [u.email for u in clientes_db],
+            'donos': [u.email for u in donos],
+            'produtos': produtos_por_restaurante,
+        }
+
+
+def arrancar_servidor(servidor, porta, workers, threads, env):
+    if servidor == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', 'run:app', '-b', f'127.0.0.1:{porta}',
+               '-w', str(workers), '--log-level', 'warning']
+        # Com DEPLOY_PROFILE, as threads (e o worker) vêm do perfil (gunicorn.conf.py)
+        if threads:
+            cmd += ['--threads', str(threads)]
+    else:
+        cmd = [sys.executable, '-m', 'flask', '--app', 'run.py', 'run', '--port', str(porta),
+               '--no-reload', '--no-debugger', '--with-threads']
+    proc = subprocess.Popen(cmd, cwd=RAIZ, env=env, stdout=subprocess.DEVNULL)
+
+    url = f'http://127.0.0.1:{porta}'
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if proc.poll() is not None:
+            raise RuntimeError('O servidor terminou durante o arranque.')
+        try:
+            requests.get(url + '/sobre', timeout=5)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('O servidor não respondeu em 30 segundos.')
+
+
+# --- Utilizadores virtuais ---
+
+class UtilizadorVirtual:
+    """Um cliente ou dono com a sua própria sessão (cookies) e métricas."""
+
+    def __init__(self, base_url, email, dados, rnd):
+        self.base_url = base_url
+        self.email = email
+        self.dados = dados
+        self.rnd = rnd
+        self.http = requests.Session()
+        self.latencias = {}
+        self.erros = {}
+
+    def pedido(self, nome, metodo, caminho, **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        inicio = time.perf_counter()
+        try:
+            resposta = self.http.request(metodo, self.base_url + caminho, timeout=30, **kwargs)
+            falhou = resposta.status_code >= 400
+        except requests.RequestException:
+            resposta, falhou = None, True
+        self.latencias.setdefault(nome, []).append((time.perf_counter() - inicio) * 1000)
+        if falhou:
+            self.erros[nome] = self.erros.get(nome, 0) + 1
+        return resposta
+
+    def login(self):
+        pagina = self.http.get(self.base_url + '/login', timeout=30).text
+        token = RE_CSRF.search(pagina).group(1)
+        self.pedido('POST /login', 'POST', '/login',
+                    data={'csrf_token': token, 'login': self.email, 'password': SENHA})
+
+    def restaurante_aleatorio(self):
+        return self.rnd.choice(list(self.dados['produtos']))
+
+
+class Cliente(UtilizadorVirtual):
+    ACOES = [('home', 30), ('cardapio', 25), ('pesquisa', 10), ('adicionar', 12), ('carrinho', 5), ('checkout', 5)]
+
+    def home(self):
+        self.pedido('GET /', 'GET', '/')
+
+    def cardapio(self):
+        self.pedido('GET /restaurante/<id>', 'GET', f'/restaurante/{self.restaurante_aleatorio()}')
+
+    def pesquisa(self):
+        self.pedido('GET /search', 'GET', '/search', params={'query': self.rnd.choice(TERMOS_PESQUISA)})
+
+    def adicionar(self, restaurante_id=None):
+        restaurante_id = restaurante_id or self.restaurante_aleatorio()
+        produto_id = self.rnd.choice(self.dados['produtos'][restaurante_id])
+        self.pedido('POST /cart/add/<id>', 'POST', f'/cart/add/{produto_id}')
+
+    def carrinho(self):
+        self.pedido('GET /cart', 'GET', '/cart')
+
+    def checkout(self):
+        restaurante_id = self.restaurante_aleatorio()
+        for _ in range(self.rnd.randint(1, 3)):
+            self.adicionar(restaurante_id)
+        resposta = self.pedido('GET /checkout', 'GET', '/checkout')
+        if resposta is None or resposta.status_code != 200:
+            return
+        token = RE_CSRF.search(resposta.text)
+        endereco = RE_ENDERECO.search(resposta.text)
+        if not token or not endereco:
+            return
+        resposta = self.pedido('POST /checkout', 'POST', '/checkout',
+                               data={'csrf_token': token.group(1), 'endereco_id': endereco.group(1)})
+        # O stub do Stripe redireciona diretamente para a success_url
+        if resposta is not None and resposta.status_code == 303:
+            caminho = resposta.headers['Location'].replace(self.base_url, '')
+            self.pedido('GET /order/success/<id>', 'GET', caminho)
+
+
+class Dono(UtilizadorVirtual):
+    ACOES = [('cozinha', 8), ('relatorio', 5)]
+    RELATORIOS = ['/portal/relatorio', '/portal/relatorio/qualidade', '/portal/relatorio/pagamentos']
+
+    def cozinha(self):
+        resposta = self.pedido('GET /portal/pedidos', 'GET', '/portal/pedidos')
+        if resposta is None or resposta.status_code != 200:
+            return
+        pedidos = RE_AVANCAR.findall(resposta.text)
+        if pedidos:
+            self.pedido('POST /portal/pedidos', 'POST', '/portal/pedidos',
+                        data={'pedido_id': self.rnd.choice(pedidos), 'acao': 'avancar'})
+
+    def relatorio(self):
+        caminho = self.rnd.choice(self.RELATORIOS)
+        self.pedido(f'GET {caminho}', 'GET', caminho)
+
+
+def correr_utilizador(utilizador, fim):
+    nomes, pesos = zip(*utilizador.ACOES)
+    utilizador.login()
+    while time.monotonic() < fim:
+        getattr(utilizador, utilizador.rnd.choices(nomes, pesos)[0])()
+
+
+# --- Relatório ---
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+def agregar(utilizadores, duracao):
+    latencias, erros = {}, {}
+    for u in utilizadores:
+        for nome, valores in u.latencias.items():
+            latencias.setdefault(nome, []).extend(valores)
+        for nome, n in u.erros.items():
+            erros[nome] = erros.get(nome, 0) + n
+
+    resultados = {}
+    for nome, valores in sorted(latencias.items()):
+        valores.sort()
+        resultados[nome] = {
+            'pedidos': len(valores),
+            'rps': len(valores) / duracao,
+            'p50': percentil(valores, 50),
+            'p95': percentil(valores, 95),
+            'p99': percentil(valores, 99),
+            'erros': erros.get(nome, 0),
+        }
+    return resultados
+
+
+def mostrar(resultados):
+    print(f"\n{'Rota':<34}{'Pedidos':>9}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Erros':>7}")
+    print('-' * 86)
+    for nome, r in resultados.items():
+        print(f"{nome:<34}{r['pedidos']:>9}{r['rps']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}{r['erros']:>7}")
+    total = sum(r['pedidos'] for r in resultados.values())
+    rps = sum(r['rps'] for r in resultados.values())
+    print('-' * 86)
+    print(f"{'TOTAL':<34}{total:>9}{rps:>9.1f}")
+
+
+def comparar(resultados, ficheiro_base, max_regressao):
+    """Compara o p95 por rota com uma execução anterior. Devolve as regressões."""
+    with open(ficheiro_base) as f:
+        base = json.load(f)['rotas']
+    regressoes = []
+    for nome, r in resultados.items():
+        if nome in base and base[nome]['p95'] > 0:
+            variacao = (r['p95'] - base[nome]['p95']) / base[nome]['p95'] * 100
+            if variacao > max_regressao:
+                regressoes.append((nome, base[nome]['p95'], r['p95'], variacao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=30, help='Duração do teste (segundos).')
+    parser.add_argument('--users', type=int, default=20, help='Utilizadores virtuais em simultâneo.')
+    parser.add_argument('--owners', type=float, default=0.2, help='Fração dos utilizadores que são donos.')
+    parser.add_argument('--restaurants', type=int, default=20, help='Restaurantes a criar.')
+    parser.add_argument('--server', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn.')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Threads por worker do gunicorn (por omissão: 4, ou as do --profile).')
+    parser.add_argument('--profile', choices=['sync', 'gthread', 'gevent'],
+                        help='Perfil de deploy (DEPLOY_PROFILE): worker do gunicorn e pool da DB.')
+    parser.add_argument('--stub-latency-ms', type=float, default=0,
+                        help='Latência simulada das APIs externas (Stripe/Twilio).')
+    parser.add_argument('--seed', type=int, default=42, help='Semente aleatória (resultados reprodutíveis).')
+    parser.add_argument('--json', help='Guarda os resultados neste ficheiro.')
+    parser.add_argument('--compare', help='Ficheiro JSON de uma execução anterior.')
+    parser.add_argument('--max-regression', type=float, default=20,
+                        help='Aumento máximo do p95 (%%) tolerado em --compare.')
+    args = parser.parse_args()
+
+    n_donos = max(1, int(args.users * args.owners))
+    n_clientes = max(1, args.users - n_donos)
+
+    if args.threads is None and not args.profile:
+        args.threads = 4
+
+    stubs = Stubs(latencia_ms=args.stub_latency_ms).start()
+    tmpdir = tempfile.mkdtemp(prefix='yummygo-loadtest-')
+    env = dict(os.environ)
+    env.update(stubs.env())
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}",
+        'SECRET_KEY': 'loadtest',
+        'BCRYPT_LOG_ROUNDS': '4',      # Login rápido: o custo do bcrypt não é o que medimos aqui
+        'RATELIMIT_ENABLED': 'false',  # Todos os utilizadores virtuais vêm do mesmo IP
+        'OTP_SWEEP_INTERVAL': '0',
+        'FLASK_DEBUG': '0',
+    })
+    if args.profile:
+        env['DEPLOY_PROFILE'] = args.profile
+    # A configuração é lida do ambiente quando 'src' é importado
+    os.environ.update(env)
+
+    print(f"A preparar dados em {tmpdir} ...")
+    dados = preparar_base_de_dados(args.restaurants, n_clientes, args.seed)
+
+    proc, url = arrancar_servidor(args.server, _porta_livre(), args.workers, args.threads, env)
+    try:
+        print(f"Servidor ({args.server}) em {url}; {n_clientes} clientes + {n_donos} donos durante {args.duration:.0f}s")
+        rnd = random.Random(args.seed)
+        utilizadores = [Cliente(url, dados['clientes'][i], dados, random.Random(rnd.random()))
+                        for i in range(n_clientes)]
+        utilizadores += [Dono(url, dados['donos'][i % len(dados['donos'])], dados, random.Random(rnd.random()))
+                         for i in range(n_donos)]
+
+        inicio = time.monotonic()
+        fim = inicio + args.duration
+        threads = [threading.Thread(target=correr_utilizador, args=(u, fim)) for u in utilizadores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.monotonic() - inicio
+    finally:
+        proc.terminate()
+        proc.wait()
+        stubs.stop()
+
+    resultados = agregar(utilizadores, duracao)
+    mostrar(resultados)
+    print(f"\nStubs: {stubs.http.contadores} | e-mails: {stubs.smtp.mensagens}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'duracao': duracao, 'rotas': resultados}, f, indent=2)
+        print(f"Resultados guardados em {args.json}")
+
+    if args.compare:
+        regressoes = comparar(resultados, args.compare, args.max_regression)
+        for nome, antes, depois, variacao in regressoes:
+            print(f"REGRESSÃO {nome}: p95 {antes:.1f} ms -> {depois:.1f} ms (+{variacao:.0f}%)")
+        if regressoes:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.max_regression:.0f}% no p95.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Stubs locais do Stripe, Twilio e SMTP para os testes de carga.
+
+Respondem de imediato e com o mínimo que a app espera, para que os
+testes meçam a YummyGo e não a latência das APIs externas:
+
+- Stripe: POST /v1/checkout/sessions devolve uma sessão cujo 'url' é a
+  própria success_url (o cliente "paga" ao seguir o redirecionamento).
+- Twilio: POST /2010-04-01/Accounts/<sid>/Messages.json devolve uma
+  mensagem com SID.
+- SMTP: aceita e descarta todas as mensagens.
+
+Com latencia_ms, o stub HTTP espera esse tempo antes de responder (para
+simular APIs reais, ex: ao comparar perfis de deploy sync/gthread/gevent).
+
+Uso na app (variáveis de ambiente):
+    STRIPE_API_BASE=http://127.0.0.1:<porta_http>
+    TWILIO_API_BASE=http://127.0.0.1:<porta_http>
+    MAIL_SERVER=127.0.0.1  MAIL_PORT=<porta_smtp>  MAIL_USE_TLS=false
+"""
+import itertools
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+_ids = itertools.count(1)
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    """Responde como o Stripe e o Twilio (apenas os endpoints usados pela app)."""
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        dados = parse_qs(self.rfile.read(tamanho).decode('utf-8'))
+        rota = self.path.split('?')[0]
+        self.server.contadores[rota] = self.server.contadores.get(rota, 0) + 1
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+
+        if self.path.startswith('/v1/checkout/sessions'):
+            corpo = {
+                'id': f'cs_stub_{next(_ids)}',
+                'object': 'checkout.session',
+                'client_reference_id': dados.get('client_reference_id', [None])[0],
+                'url': dados.get('success_url', [''])[0],
+            }
+            self._responder(200, corpo)
+        elif self.path.startswith('/2010-04-01/Accounts/') and self.path.endswith('/Messages.json'):
+            corpo = {
+                'sid': f'SMstub{next(_ids):026d}',
+                'status': 'queued',
+                'to': dados.get('To', [None])[0],
+                'body': dados.get('Body', [None])[0],
+            }
+            self._responder(201, corpo)
+        else:
+            self._responder(404, {'error': {'message': f'Stub sem rota para {self.path}'}})
+
+    def _responder(self, status, corpo):
+        payload = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass  # Silencioso: não queremos I/O extra durante a medição
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo que aceita e descarta as mensagens."""
+
+    def _linha(self, texto):
+        self.wfile.write(f'{texto}\r\n'.encode('ascii'))
+
+    def handle(self):
+        self._linha('220 yummygo-stub ESMTP')
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode('utf-8', 'replace').strip().upper()
+            if comando.startswith('EHLO'):
+                self._linha('250-yummygo-stub')
+                self._linha('250 8BITMIME')
+            elif comando.startswith('DATA'):
+                self._linha('354 Termine com <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.mensagens += 1
+                self._linha('250 OK')
+            elif comando.startswith('QUIT'):
+                self._linha('221 Adeus')
+                return
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP...
+                self._linha('250 OK')
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Stubs:
+    """
+    Arranca os stubs HTTP (Stripe/Twilio) e SMTP em threads (portas livres
+    escolhidas pelo sistema operativo).
+    """
+
+    def __init__(self, host='127.0.0.1', latencia_ms=0):
+        self.http = ThreadingHTTPServer((host, 0), _APIHandler)
+        self.http.daemon_threads = True
+        self.http.contadores = {}
+        self.http.latencia = latencia_ms / 1000
+        self.smtp = _ThreadingSMTPServer((host, 0), _SMTPHandler)
+        self.smtp.mensagens = 0
+        self.host = host
+
+    @property
+    def http_url(self):
+        return f'http://{self.host}:{self.http.server_address[1]}'
+
+    @property
+    def smtp_port(self):
+        return self.smtp.server_address[1]
+
+    def env(self):
+        """Variáveis de ambiente que ligam a app a estes stubs."""
+        return {
+            'STRIPE_API_BASE': self.http_url,
+            'STRIPE_SECRET_KEY': 'sk_test_stub',
+            'TWILIO_API_BASE': self.http_url,
+            'TWILIO_ACCOUNT_SID': 'ACstub',
+            'TWILIO_AUTH_TOKEN': 'stub',
+            'TWILIO_PHONE_NUMBER': '+15005550006',
+            'MAIL_SERVER': self.host,
+            'MAIL_PORT': str(self.smtp_port),
+            'MAIL_USE_TLS': 'false',
+            'MAIL_USERNAME': 'loadtest@yummygo.local',
+        }
+
+    def start(self):
+        for servidor in (self.http, self.smtp):
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for servidor in (self.http, self.smtp):
+            servidor.shutdown()
+            servidor.server_close()
@@ -0,0 +1,82 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir da raiz do projeto)
+
+Modo preload (por omissão): a app é criada UMA vez no master, aquecida
+(mappers, templates, SDKs) e congelada com gc.freeze(); os workers herdam
+essa memória no fork (copy-on-write), por isso cada worker adicional custa
+bastante menos memória. Ver src/services/preload_service.py.
+
+Variáveis de ambiente:
+    PRELOAD_APP=false     desliga o preload (cada worker cria a sua app)
+    DEPLOY_PROFILE=sync   'sync', 'gthread' ou 'gevent' (worker e pool da DB,
+                          ver src/services/deploy_profile_service.py)
+    WEB_CONCURRENCY=4     número de workers (lido pelo próprio gunicorn)
+    GUNICORN_THREADS=8    threads por worker (gthread; por omissão, a do perfil)
+    PORT=8000             porta (Render/Heroku)
+
+Uso:
+    gunicorn run:app
+"""
+import os
+
+perfil = os.environ.get('DEPLOY_PROFILE', 'sync')
+if perfil == 'gevent':
+    # Tem de ser antes de qualquer outro import (a app é carregada no master)
+    from gevent import monkey
+    monkey.patch_all()
+
+# A app lê PRELOAD_APP (src/config.py) para não arrancar threads no master
+# (antes de importar 'src', que carrega o Config)
+os.environ.setdefault('PRELOAD_APP', 'true')
+
+from src.services.deploy_profile_service import gunicorn_settings
+
+preload_app = os.environ['PRELOAD_APP'].lower() == 'true'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+globals().update(gunicorn_settings(perfil, threads=int(os.environ.get('GUNICORN_THREADS', 0))))
+
+
+def when_ready(server):
+    """Master: depois de carregar a app e antes de criar os workers."""
+    if not preload_app:
+        return
+    from src.services.preload_service import warm_up, freeze
+    resumo = warm_up(server.app.wsgi())
+    freeze()
+    server.log.info("Preload: %(templates)s templates, %(modulos)s SDKs em %(duracao_ms)s ms", resumo)
+
+
+def worker_exit(server, worker):
+    """Worker: ao terminar, grava as últimas métricas (somadas pelo master em child_exit)."""
+    from src.extensions import metrics
+    try:
+        metrics.gravar_snapshot()
+    except OSError as e:
+        server.log.warning("Erro ao gravar métricas: %s", e)
+
+
+def child_exit(server, worker):
+    """Master: um worker terminou (ou foi reciclado)."""
+    pasta = os.environ.get('METRICS_MULTIPROC_DIR')
+    if not pasta:
+        return
+    from src.services.metrics_service import retire_worker
+    try:
+        retire_worker(pasta, worker.pid)
+    except OSError as e:
+        server.log.warning("Erro ao somar as métricas do worker %s: %s", worker.pid, e)
+
+
+def post_fork(server, worker):
+    """Worker: logo a seguir ao fork."""
+    if perfil == 'gevent':
+        # psycopg2 cooperativo (opcional: pip install psycogreen)
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen não instalado: as queries bloqueiam o worker gevent")
+    if not preload_app:
+        return
+    from src.services.preload_service import after_fork
+    after_fork(worker.app.wsgi())
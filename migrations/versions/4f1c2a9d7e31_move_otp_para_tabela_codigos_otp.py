@@ -0,0 +1,47 @@
+"""Move OTP para a tabela codigos_otp
+
+Revision ID: 4f1c2a9d7e31
+Revises: 83a834eff0a5
+Create Date: 2026-10-19 10:12:04.118233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2a9d7e31'
+down_revision = '83a834eff0a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('codigos_otp',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('canal', sa.String(length=10), nullable=False),
+    sa.Column('destino', sa.String(length=120), nullable=False),
+    sa.Column('codigo_hash', sa.String(length=64), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('expiracao', sa.DateTime(), nullable=False),
+    sa.Column('data_criacao', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('canal', 'destino', name='uq_codigos_otp_canal_destino')
+    )
+    with op.batch_alter_table('codigos_otp', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_codigos_otp_expiracao'), ['expiracao'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('otp_expiration')
+        batch_op.drop_column('otp_code')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('otp_code', sa.String(length=6), nullable=True))
+        batch_op.add_column(sa.Column('otp_expiration', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('codigos_otp', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_codigos_otp_expiracao'))
+
+    op.drop_table('codigos_otp')
@@ -1,5 +1,6 @@
 import sys
 import os
+import logging
 from dotenv import load_dotenv
 
 # 1. SOLUÇÃO CRÍTICA: Carrega as variáveis (.env) ANTES de qualquer outra coisa
@@ -10,13 +11,15 @@ from src import create_app
 from flask import request
 from src.extensions import db 
 from src.models import Pedido, User 
-import stripe
 import click
 from src.services.email_service import send_email
 from src.services.sms_service import send_sms
+from src.services.payment_service import construct_webhook_event
+from src.services.logging_service import bind_log_context
 
 # Cria a instância da aplicação
 app = create_app()
+logger = logging.getLogger('yummygo.webhook')
 
 # --- ROTA DO WEBHOOK (ISOLADA E COM GAMIFICAÇÃO) ---
 @app.route('/stripe-webhook', methods=['POST'])
@@ -31,14 +34,15 @@ def stripe_webhook():
     event = None
     
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
+        event = construct_webhook_event(payload, sig_header, endpoint_secret)
     except Exception as e:
-        print(f'ERRO WEBHOOK (Assinatura): {e}')
+        logger.warning('Webhook com assinatura inválida: %s', e)
         return 'Bad Request', 400
 
     if event['type'] == 'checkout.session.completed':
         session_data = event['data']['object']
         pedido_id = session_data.get('client_reference_id')
+        bind_log_context(pedido_id=pedido_id, stripe_session=session_data.get('id'))
         
         if pedido_id:
             with app.app_context(): 
@@ -63,13 +67,13 @@ def stripe_webhook():
                         else:
                             user.nivel = 'Bronze'
                             
-                        print(f"✅ GAMIFICATION: {user.nome_completo} ganhou {pontos_ganhos} pts (Nível: {user.nivel})")
-                    except Exception as e:
-                        print(f"⚠️ Erro ao atualizar pontos: {e}")
+                        logger.info("Pontos atribuídos", extra={'user_id': user.id, 'pontos': pontos_ganhos, 'nivel': user.nivel})
+                    except Exception:
+                        logger.exception("Erro ao atualizar pontos")
 
                     # 3. Salva tudo
                     db.session.commit() 
-                    print(f"✅ WEBHOOK: Pedido #{pedido_id} processado com sucesso.")
+                    logger.info("Pedido pago (webhook)")
 
                     # --- ENVIAR E-MAIL DE CONFIRMAÇÃO ---
                     user = User.query.get(pedido.cliente_id)
@@ -103,6 +107,60 @@ def test_sms_command(to_number):
     if success: print("✅ Sucesso!")
     else: print("❌ Falha.")
 
+@app.cli.command("bench-password")
+@click.option("--min-rounds", default=10, help="Custo mínimo a medir.")
+@click.option("--max-rounds", default=14, help="Custo máximo a medir.")
+def bench_password_command(min_rounds, max_rounds):
+    """Mede o tempo de hash do BCrypt para cada custo."""
+    from src.services.password_service import benchmark_hash
+    print(f"Custo configurado (BCRYPT_LOG_ROUNDS): {app.config['BCRYPT_LOG_ROUNDS']}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        print(f"  custo {rounds:>2}: {benchmark_hash(rounds):8.1f} ms por hash")
+
+@app.cli.command("assets-build")
+def assets_build_command():
+    """Gera os ficheiros estáticos com hash e comprimidos (passo de build do deploy)."""
+    from src.services.assets_service import build_assets
+    destino = app.extensions['assets'].pasta
+    manifest = build_assets(app.static_folder, destino)
+    print(f"✅ {len(manifest)} ficheiro(s) em {destino}")
+
+@app.cli.command("ratings-rebuild")
+@click.option("--restaurant-id", type=int, default=None, help="Só este restaurante (por omissão, todos).")
+def ratings_rebuild_command(restaurant_id):
+    """Recalcula os agregados das avaliações a partir da tabela de avaliações."""
+    from src.services.rating_service import rebuild_ratings
+    print(f"✅ {rebuild_ratings(restaurant_id)} restaurante(s) atualizado(s)")
+
+@app.cli.command("eta-rebuild")
+def eta_rebuild_command():
+    """Recalcula as medianas de cada etapa (previsão de entrega) a partir do histórico."""
+    from src.services.eta_service import recompute_stage_times
+    print(f"✅ {recompute_stage_times()} tempo(s) por etapa calculado(s)")
+
+@app.cli.command("ranking-rebuild")
+def ranking_rebuild_command():
+    """Recalcula a parte estática do ranking dos restaurantes (página inicial)."""
+    from src.services.ranking_service import recompute_rankings
+    print(f"✅ {recompute_rankings()} restaurante(s) pontuado(s)")
+
+@app.cli.command("seed")
+@click.option("--restaurants", default="50", help="Número de restaurantes (aceita 5k, 2M...).")
+@click.option("--users", default="1k", help="Número de clientes.")
+@click.option("--orders", default="10k", help="Número de pedidos.")
+@click.option("--days", default=180, help="Janela de tempo dos pedidos (dias para trás).")
+@click.option("--seed", default=42, help="Semente aleatória (mesma semente = mesmos dados).")
+@click.option("--batch-size", default=10000, help="Linhas por lote de INSERT.")
+def seed_command(restaurants, users, orders, days, seed, batch_size):
+    """Gera dados sintéticos realistas em grande escala (para benchmarks)."""
+    from src.services.seed_service import seed_database, parse_quantidade
+    seed_database(
+        restaurantes=parse_quantidade(restaurants),
+        utilizadores=parse_quantidade(users),
+        pedidos=parse_quantidade(orders),
+        dias=days, seed=seed, lote=batch_size
+    )
+
 
 if __name__ == '__main__':
     app.run()
\ No newline at end of file
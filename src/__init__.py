@@ -8,7 +8,10 @@ e onde as extensões e blueprints são registados.
 from flask import Flask
 from .config import Config
 import datetime
-from .extensions import db, migrate, bcrypt, login_manager, mail, oauth
+from .services.logging_service import setup_logging
+from .services.deploy_profile_service import configure_engine_options, install_statement_timeout
+from .services.replica_service import configure_replicas
+from .extensions import db, migrate, bcrypt, login_manager, mail, oauth, limiter, profiler, metrics, cpu_profiler, assets
 
 def create_app(config_class=Config):
     """
@@ -26,14 +29,28 @@ def create_app(config_class=Config):
     # Carrega as configurações a partir da classe 'Config' (definida em config.py)
     app.config.from_object(config_class)
 
+    # Logging estruturado (JSON) e ID de correlação de cada pedido HTTP
+    setup_logging(app)
+
+    # Pool de ligações à DB de acordo com o perfil de deploy (sync/gthread/gevent)
+    # e réplicas de leitura (DATABASE_REPLICA_URLS)
+    configure_engine_options(app)
+    configure_replicas(app)
+
     # 3. Inicializa as Extensões
     # Passa a instância 'app' para cada extensão para ligá-las
     db.init_app(app)
+    install_statement_timeout(app, db)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
     oauth.init_app(app)
+    limiter.init_app(app)
+    profiler.init_app(app)
+    metrics.init_app(app)
+    cpu_profiler.init_app(app)
+    assets.init_app(app)
 
     # --- Configuração de OAuth (Google, Facebook, etc.) ---
     # Vamos registar os nossos provedores OAuth aqui.
@@ -76,10 +93,34 @@ def create_app(config_class=Config):
     # app.register_blueprint(order_bp, url_prefix='/pedido')
 
     # Tratamento de Erro 404
-    from flask import render_template
+    from flask import render_template, g
     @app.errorhandler(404)
     def page_not_found(e):
         return render_template('404.html'), 404
 
+    # Tratamento de Erro 429 (Rate Limiting)
+    @app.errorhandler(429)
+    def too_many_requests(e):
+        retry_after = g.get('rate_limit_retry_after', 60)
+        return render_template('429.html', retry_after=retry_after), 429, {'Retry-After': str(retry_after)}
+
+    # Limpeza periódica dos códigos OTP expirados, recálculo do ranking e dos tempos por etapa
+    # (threads em background).
+    # Em preload (gunicorn.conf.py), só arrancam em cada worker, depois do fork.
+    if not app.config.get('TESTING') and not app.config.get('PRELOAD_APP'):
+        from .services.otp_service import start_otp_sweeper
+        from .services.ranking_service import start_ranking_refresher
+        from .services.eta_service import start_eta_refresher
+        start_otp_sweeper(app)
+        start_ranking_refresher(app)
+        start_eta_refresher(app)
+
+    # Micro-benchmark do BCrypt (opcional): mostra o custo real de cada hash
+    if app.config.get('PASSWORD_HASH_BENCHMARK'):
+        from .services.password_service import benchmark_hash
+        with app.app_context():
+            ms = benchmark_hash(repeticoes=1)
+        app.logger.info("BCrypt (custo %s): %.1f ms por hash", app.config['BCRYPT_LOG_ROUNDS'], ms)
+
     # 5. Retorna a App pronta
     return app
\ No newline at end of file
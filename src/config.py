@@ -27,6 +27,164 @@ class Config:
     # Desativa uma funcionalidade do SQLAlchemy que não usamos e emite avisos
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # --- Logging ---
+    # 'json' (uma linha JSON por registo, para produção) ou 'text' (desenvolvimento)
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+    # --- Códigos OTP (E-mail/SMS) ---
+    OTP_VALIDITY_MINUTES = int(os.environ.get('OTP_VALIDITY_MINUTES', 10))
+    # Tentativas erradas antes de o código ser invalidado
+    OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+    # Intervalo (segundos) da limpeza de códigos expirados em background (0 = desligado)
+    OTP_SWEEP_INTERVAL = int(os.environ.get('OTP_SWEEP_INTERVAL', 300))
+
+    # --- Palavras-passe (BCrypt) ---
+    # Custo do hash (2^N iterações). Ao mudar, os hashes antigos são
+    # atualizados automaticamente no próximo login de cada utilizador.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Mede e mostra o custo de um hash no arranque da app
+    PASSWORD_HASH_BENCHMARK = os.environ.get('PASSWORD_HASH_BENCHMARK', 'false').lower() == 'true'
+    # Threads dedicadas à verificação de palavras-passe (0 = na thread do pedido)
+    PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS', 0))
+
+    # --- Cache de Identidade (user_loader do Flask-Login) ---
+    # Segundos que cada worker guarda role/nível/pontos/restaurante do utilizador.
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+
+    # --- Cache do Catálogo (Carrinho/Checkout) ---
+    # Segundos que cada worker mantém o catálogo de um restaurante em memória.
+    # (As edições do cardápio invalidam a cache do worker que as processa;
+    # o TTL garante que os outros workers também a atualizam.)
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+
+    # --- Página Inicial (ranking dos restaurantes, ver ranking_service) ---
+    # Intervalo (segundos) do recálculo da parte estática do ranking (0 = só com 'flask ranking-rebuild',
+    # ex: num cron). Todos os workers verificam, mas só um recalcula (lock entre processos no Postgres)
+    RANKING_REFRESH_INTERVAL = int(os.environ.get('RANKING_REFRESH_INTERVAL', 600))
+    HOME_PAGE_SIZE = int(os.environ.get('HOME_PAGE_SIZE', 24))
+    # Com a localização do cliente, esconde restaurantes mais longe do que isto
+    HOME_RADIUS_KM = float(os.environ.get('HOME_RADIUS_KM', 10))
+    # Segundos que cada worker mantém o índice dos filtros (facetas) em memória
+    # (as alterações a restaurantes/cardápios invalidam-no no worker que as processa)
+    FACET_INDEX_TTL = int(os.environ.get('FACET_INDEX_TTL', 60))
+    # Fuso horário dos horários de funcionamento ("aberto agora", ver hours_service)
+    RESTAURANT_TIMEZONE = os.environ.get('RESTAURANT_TIMEZONE', 'America/Sao_Paulo')
+    # Segundos que cada worker mantém os horários compilados em memória
+    HOURS_TABLE_TTL = int(os.environ.get('HOURS_TABLE_TTL', 60))
+
+    # --- Previsão de Entrega (ETA, ver eta_service) ---
+    # Segundos entre leituras da fila das cozinhas (entre leituras, cada worker
+    # atualiza os contadores com as mudanças de status que ele próprio faz)
+    ETA_QUEUE_TTL = int(os.environ.get('ETA_QUEUE_TTL', 30))
+    # Intervalo (segundos) do recálculo das medianas de cada etapa em TempoEtapa, num só
+    # processo (0 = só com 'flask eta-rebuild', ex: num cron), e janela (dias) do histórico
+    ETA_REFRESH_INTERVAL = int(os.environ.get('ETA_REFRESH_INTERVAL', 600))
+    ETA_HISTORY_DAYS = int(os.environ.get('ETA_HISTORY_DAYS', 14))
+    # Segundos que cada worker mantém as medianas (lidas de TempoEtapa) em memória
+    ETA_HISTORY_TTL = int(os.environ.get('ETA_HISTORY_TTL', 120))
+    # Pedidos preparados em paralelo por cada cozinha
+    ETA_KITCHEN_SLOTS = int(os.environ.get('ETA_KITCHEN_SLOTS', 4))
+    # Abaixo disto (pedidos por etapa no histórico), usa o tempo_medio_entrega do dono
+    ETA_MIN_SAMPLES = int(os.environ.get('ETA_MIN_SAMPLES', 20))
+
+    # --- Faturas (PDF) ---
+    # Pasta onde ficam os PDFs (um ficheiro por conteúdo, partilhado pelos workers)
+    INVOICE_DIR = os.environ.get('INVOICE_DIR', os.path.join('instance', 'invoices'))
+    # Gera a fatura em background quando o pedido é concluído
+    INVOICE_ASYNC = os.environ.get('INVOICE_ASYNC', 'true').lower() == 'true'
+    INVOICE_THREADS = int(os.environ.get('INVOICE_THREADS', 1))
+    # Processos usados na exportação mensal (0 = um por núcleo)
+    INVOICE_EXPORT_PROCESSES = int(os.environ.get('INVOICE_EXPORT_PROCESSES', 0))
+    # Limites da exportação mensal (corre dentro do pedido HTTP): número de faturas
+    # por ZIP e segundos a gerar as que faltam (as geradas ficam para a próxima tentativa)
+    INVOICE_EXPORT_MAX = int(os.environ.get('INVOICE_EXPORT_MAX', 2000))
+    INVOICE_EXPORT_TIMEOUT = float(os.environ.get('INVOICE_EXPORT_TIMEOUT', 20))
+
+    # --- Imagens (produtos e logótipos) ---
+    # 'cloudinary' ou 'local' (static/uploads); por omissão, Cloudinary se estiver configurado
+    IMAGE_STORAGE = os.environ.get('IMAGE_STORAGE')
+    # Threads que redimensionam e enviam as imagens (por worker)
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    # false = o pedido espera pelo processamento (útil em testes)
+    IMAGE_ASYNC = os.environ.get('IMAGE_ASYNC', 'true').lower() == 'true'
+    # Segundos em 'pendente' após os quais um novo upload do mesmo ficheiro volta a
+    # agendar o processamento (os bytes só vivem no worker: se ele morrer, perdem-se)
+    IMAGE_PENDING_TIMEOUT = int(os.environ.get('IMAGE_PENDING_TIMEOUT', 300))
+
+    # --- Ficheiros Estáticos (flask assets-build) ---
+    # Pasta com os ficheiros com hash e o manifest (por omissão, src/static/dist)
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')
+
+    # --- Gunicorn (modo preload, ver gunicorn.conf.py) ---
+    # A app é criada no master e partilhada pelos workers (copy-on-write);
+    # as threads de background só arrancam em cada worker, depois do fork
+    PRELOAD_APP = os.environ.get('PRELOAD_APP', 'false').lower() == 'true'
+
+    # --- Perfil de Deploy e Pool de Ligações (ver deploy_profile_service) ---
+    # 'sync', 'gthread' ou 'gevent': escolhe o worker do gunicorn e o pool da DB
+    DEPLOY_PROFILE = os.environ.get('DEPLOY_PROFILE', 'sync')
+    # 0 = valor do perfil
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 0))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    # Limite de tempo de cada query no Postgres (0 = sem limite)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    # PgBouncer em modo 'transaction' à frente do Postgres
+    PGBOUNCER = os.environ.get('PGBOUNCER', 'false').lower() == 'true'
+    # Réplicas de leitura (URLs separados por vírgulas), usadas pelas rotas
+    # @read_replica (início, pesquisa, cardápio público, relatórios)
+    DATABASE_REPLICA_URLS = [u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    # Depois de escrever, o utilizador lê da principal durante estes segundos (read-your-writes)
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    # Uma réplica que falhou fica de fora durante estes segundos
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+    # Timeout (segundos) das chamadas externas (Stripe, Twilio, Cloudinary, OpenCage)
+    OUTBOUND_TIMEOUT = float(os.environ.get('OUTBOUND_TIMEOUT', 10))
+
+    # --- Rate Limiting (OTP, Login, Pesquisa) ---
+    # memory:// (um processo), sqlite:////tmp/yummygo_ratelimit.db (vários workers
+    # na mesma máquina) ou redis://host:6379/0 (vários servidores).
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+    # Número de proxies à frente da app (ex: 1 no Render) para ler o IP real
+    RATELIMIT_PROXY_HOPS = int(os.environ.get('RATELIMIT_PROXY_HOPS', 0))
+
+    # --- Instrumentação de SQL (por pedido) ---
+    # Conta queries e tempo na DB de cada pedido e envia o cabeçalho Server-Timing
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', 'true').lower() == 'true'
+    SQL_SERVER_TIMING = os.environ.get('SQL_SERVER_TIMING', 'true').lower() == 'true'
+    # Painel de debug no fundo das páginas e /_debug/sql (NUNCA em produção)
+    SQL_PROFILER_PANEL = os.environ.get('SQL_PROFILER_PANEL', 'false').lower() == 'true'
+    # Regista no log as queries com duração >= N ms (0 = desligado)
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    # Regista no log os pedidos com >= N queries (0 = desligado)
+    SQL_SLOW_REQUEST_QUERIES = int(os.environ.get('SQL_SLOW_REQUEST_QUERIES', 30))
+    # Número de queries mais lentas guardadas por pedido e por endpoint
+    SQL_PROFILER_TOP = int(os.environ.get('SQL_PROFILER_TOP', 5))
+
+    # --- Profiling de CPU por amostragem ---
+    # Um pedido é perfilado com o cabeçalho 'X-Profile: <token>' ou por sorteio
+    # (ex: 0.001 = 1 em cada 1000). Sem token e com taxa 0, fica desligado.
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN')
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', 5))
+    PROFILER_MAX_CONCURRENT = int(os.environ.get('PROFILER_MAX_CONCURRENT', 2))
+    # 'collapsed' (flamegraph.pl, speedscope) ou 'speedscope' (JSON)
+    PROFILER_FORMAT = os.environ.get('PROFILER_FORMAT', 'collapsed')
+    PROFILER_DIR = os.environ.get('PROFILER_DIR', 'profiles')
+
+    # --- Métricas (Prometheus, em /metrics) ---
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Se definido, exige 'Authorization: Bearer <token>' no /metrics
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Pasta partilhada pelos workers do gunicorn (vazio = só este processo)
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+    # Segundos entre gravações do snapshot de cada worker nessa pasta
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
     # --- Configurações de APIs Externas (carregadas do os.environ) ---
     
     # Google (OAuth)
@@ -41,11 +199,15 @@ class Config:
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    # (Opcional) Outro endereço para a API do Stripe (ex: stub dos testes de carga)
+    STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE')
     
     # Twilio (SMS OTP)
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+    # (Opcional) Outro endereço para a API do Twilio (ex: stub dos testes de carga)
+    TWILIO_API_BASE = os.environ.get('TWILIO_API_BASE')
     
     # E-mail (OTP)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
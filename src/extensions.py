@@ -13,18 +13,40 @@ from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
 from flask_mail import Mail
-from authlib.integrations.flask_client import OAuth
+from src.services.oauth_service import LazyOAuth
+from src.services.rate_limit_service import RateLimiter
+from src.services.profiling_service import RequestProfiler
+from src.services.metrics_service import Metrics
+from src.services.sampling_profiler_service import SamplingProfiler
+from src.services.assets_service import Assets
+from src.services.replica_service import RoutingSession
 
 # Base de Dados
-db = SQLAlchemy()
+# A sessão envia as leituras das rotas @read_replica para as réplicas (se existirem)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 # Segurança e Autenticação
 bcrypt = Bcrypt()
 login_manager = LoginManager()
-oauth = OAuth()
+oauth = LazyOAuth() # O Authlib só é importado no primeiro login social
 mail = Mail()
 
+# Proteção contra abuso (OTP, login, pesquisa)
+limiter = RateLimiter()
+
+# Instrumentação de SQL por pedido (Server-Timing, painel, queries lentas)
+profiler = RequestProfiler()
+
+# Métricas no formato Prometheus (/metrics)
+metrics = Metrics()
+
+# Profiling de CPU por amostragem (opt-in, por pedido)
+cpu_profiler = SamplingProfiler()
+
+# Ficheiros estáticos com hash no nome e cache "imutável" (/assets)
+assets = Assets()
+
 # --- Configuração do LoginManager ---
 # Para onde o Flask-Login deve redirecionar o utilizador se ele tentar
 # aceder a uma página protegida sem estar logado.
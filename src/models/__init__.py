@@ -9,6 +9,11 @@ consegue detetá-los quando corre o 'flask db migrate'.
 from .user_model import User
 from .restaurant_model import Restaurante, Endereco
 from .menu_model import Categoria, Produto
-from .order_model import Pedido, ItemPedido
+from .order_model import Pedido, ItemPedido, EventoPedido
 from .feedback_model import Avaliacao
+from .otp_model import CodigoOTP
+from .image_model import Imagem
+from .ranking_model import RankingRestaurante
+from .hours_model import HorarioFuncionamento, ExcecaoHorario
+from .eta_model import TempoEtapa
 # from .payment_model import FormaPagamento (ainda não criámos)
\ No newline at end of file
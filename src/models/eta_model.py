@@ -0,0 +1,24 @@
+"""
+Modelo dos Tempos por Etapa (medianas pré-calculadas para a previsão de entrega)
+"""
+from src.extensions import db
+import datetime
+
+class TempoEtapa(db.Model):
+    """
+    Mediana da duração de cada etapa (aceite, preparo, entrega) de cada
+    restaurante nos últimos ETA_HISTORY_DAYS dias, calculada a partir do
+    histórico de status (EventoPedido) e recalculada periodicamente pelo
+    eta_service. Os workers só leem esta tabela (pequena).
+    """
+    __tablename__ = 'tempos_etapa'
+
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), primary_key=True)
+    etapa = db.Column(db.String(20), primary_key=True)
+
+    mediana = db.Column(db.Float, nullable=False) # Em segundos
+    amostras = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TempoEtapa {self.restaurante_id} {self.etapa}: {self.mediana:.0f}s>'
@@ -0,0 +1,45 @@
+"""
+Modelos do Horário de Funcionamento: horário semanal e exceções (feriados)
+"""
+from src.extensions import db
+
+class HorarioFuncionamento(db.Model):
+    """
+    Um intervalo do horário semanal (ex: segunda, 11:00 às 15:00).
+    Um dia pode ter vários intervalos (almoço e jantar). Se 'fecha' for
+    menor ou igual a 'abre', o intervalo passa da meia-noite.
+    """
+    __tablename__ = 'horarios_funcionamento'
+
+    id = db.Column(db.Integer, primary_key=True)
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), nullable=False, index=True)
+
+    dia_semana = db.Column(db.Integer, nullable=False) # 0 = segunda ... 6 = domingo
+    abre = db.Column(db.Time, nullable=False)
+    fecha = db.Column(db.Time, nullable=False)
+
+    def __repr__(self):
+        return f'<HorarioFuncionamento {self.restaurante_id} dia {self.dia_semana} {self.abre}-{self.fecha}>'
+
+
+class ExcecaoHorario(db.Model):
+    """
+    Exceção ao horário semanal num dia concreto (feriado, evento):
+    fechado o dia todo, ou aberto só entre 'abre' e 'fecha'.
+    """
+    __tablename__ = 'excecoes_horario'
+    __table_args__ = (
+        db.UniqueConstraint('restaurante_id', 'data', name='uq_excecoes_horario_restaurante_data'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), nullable=False)
+
+    data = db.Column(db.Date, nullable=False)
+    fechado = db.Column(db.Boolean, nullable=False, default=True)
+    abre = db.Column(db.Time, nullable=True) # Só quando não está fechado
+    fecha = db.Column(db.Time, nullable=True)
+    descricao = db.Column(db.String(100), nullable=True) # Ex: "Natal"
+
+    def __repr__(self):
+        return f'<ExcecaoHorario {self.restaurante_id} {self.data}>'
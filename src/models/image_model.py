@@ -0,0 +1,43 @@
+"""
+Modelo de Imagem (fotos dos produtos e logótipos dos restaurantes)
+"""
+from src.extensions import db
+import datetime
+
+class Imagem(db.Model):
+    """
+    Uma imagem carregada pelos restaurantes, identificada pelo SHA-256 do
+    ficheiro original: a mesma foto carregada duas vezes é guardada uma vez.
+
+    Enquanto as variantes (miniatura e cartão, em WebP e JPEG) são geradas
+    e enviadas em background, o estado é 'pendente' (desde 'agendada_em').
+    """
+    __tablename__ = 'imagens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+
+    # 'pendente' -> 'pronta' (ou 'erro')
+    estado = db.Column(db.String(10), nullable=False, default='pendente')
+    # Início da última tentativa de processamento (para detetar as que morreram com o worker)
+    agendada_em = db.Column(db.DateTime, nullable=True, default=datetime.datetime.utcnow)
+
+    # URLs das variantes, ex: {'thumb': {'webp': ..., 'jpg': ...}, 'card': {...}}
+    urls = db.Column(db.JSON, nullable=True)
+    largura = db.Column(db.Integer, nullable=True) # Da variante 'card'
+    altura = db.Column(db.Integer, nullable=True)
+
+    data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    @property
+    def pronta(self):
+        return self.estado == 'pronta'
+
+    def url(self, variante='card', formato='jpg'):
+        """URL de uma variante (ou None se ainda não estiver pronta)."""
+        if not self.urls:
+            return None
+        return self.urls.get(variante, {}).get(formato)
+
+    def __repr__(self):
+        return f'<Imagem {self.sha256[:12]} ({self.estado})>'
@@ -38,6 +38,10 @@ class Produto(db.Model):
     descricao = db.Column(db.Text, nullable=True)
     preco = db.Column(db.Float, nullable=False)
     imagem_url = db.Column(db.String(255), nullable=True)
+    # Imagem processada (variantes WebP/JPEG); imagem_url fica com a variante 'card' em JPEG
+    # (não se chama 'imagem' para não colidir com o campo do ProductForm no populate_obj)
+    foto_imagem_id = db.Column(db.Integer, db.ForeignKey('imagens.id'), nullable=True)
+    foto_imagem = db.relationship('Imagem', lazy='joined')
     disponivel = db.Column(db.Boolean, default=True)
     
     # Chave Estrangeira: A que categoria este produto pertence?
@@ -36,6 +36,9 @@ class Pedido(db.Model):
 
     delivery_pin = db.Column(db.String(6), nullable=True)
 
+    # SHA-256 do PDF da fatura (gerado uma vez, quando o pedido é concluído)
+    fatura_sha256 = db.Column(db.String(64), nullable=True)
+
     def __repr__(self):
         return f'<Pedido {self.id} - Status: {self.status}>'
 
@@ -63,4 +66,27 @@ class ItemPedido(db.Model):
     produto = db.relationship('Produto', backref='itens_pedido')
 
     def __repr__(self):
-        return f'<{self.quantidade}x (Produto ID: {self.produto_id}) no Pedido {self.pedido_id}>'
\ No newline at end of file
+        return f'<{self.quantidade}x (Produto ID: {self.produto_id}) no Pedido {self.pedido_id}>'
+
+class EventoPedido(db.Model):
+    """
+    Histórico (só de acrescentar) das mudanças de status de um Pedido.
+    Escrito automaticamente em cada transição (ver order_history_service).
+    """
+    __tablename__ = 'eventos_pedido'
+    __table_args__ = (
+        # Relatórios e ETAs por restaurante num intervalo de tempo
+        db.Index('ix_eventos_pedido_restaurante_id_data_criacao', 'restaurante_id', 'data_criacao'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False, index=True)
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), nullable=False)
+
+    status_anterior = db.Column(db.String(50), nullable=True) # None na criação do pedido
+    status = db.Column(db.String(50), nullable=False)
+
+    data_criacao = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<EventoPedido {self.pedido_id}: {self.status_anterior} -> {self.status}>'
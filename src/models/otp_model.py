@@ -0,0 +1,35 @@
+"""
+Modelo de Código OTP (One-Time Password)
+"""
+from src.extensions import db
+import datetime
+
+class CodigoOTP(db.Model):
+    """
+    Código OTP pendente para um destino (e-mail ou telefone).
+
+    Fica fora da tabela 'users' para que cada pedido de código não
+    atualize a tabela mais usada da app. Guardamos apenas o HASH do
+    código, e no máximo um código ativo por (canal, destino).
+    """
+    __tablename__ = 'codigos_otp'
+    __table_args__ = (
+        db.UniqueConstraint('canal', 'destino', name='uq_codigos_otp_canal_destino'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # 'email' ou 'sms'
+    canal = db.Column(db.String(10), nullable=False)
+    # E-mail ou telefone para onde o código foi enviado
+    destino = db.Column(db.String(120), nullable=False)
+
+    codigo_hash = db.Column(db.String(64), nullable=False) # HMAC-SHA256 (hex)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+
+    # Indexado para o 'sweeper' apagar os expirados de forma eficiente
+    expiracao = db.Column(db.DateTime, nullable=False, index=True)
+    data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CodigoOTP {self.canal}:{self.destino}>'
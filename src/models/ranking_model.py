@@ -0,0 +1,27 @@
+"""
+Modelo do Ranking dos Restaurantes (pontuação pré-calculada da página inicial)
+"""
+from src.extensions import db
+import datetime
+
+class RankingRestaurante(db.Model):
+    """
+    A parte "estática" da pontuação de cada restaurante (nota, tempo de
+    entrega, taxa, popularidade) e a sua localização, recalculadas
+    periodicamente pelo ranking_service. Por pedido, só falta somar a
+    distância ao cliente e o estado (ativo).
+    """
+    __tablename__ = 'ranking_restaurantes'
+
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), primary_key=True)
+    pontuacao = db.Column(db.Float, nullable=False, default=0, index=True)
+
+    # Localização do restaurante (1º endereço do dono), para o termo da distância
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
+    pedidos_30d = db.Column(db.Integer, nullable=False, default=0) # Popularidade
+    atualizado_em = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RankingRestaurante {self.restaurante_id}: {self.pontuacao:.3f}>'
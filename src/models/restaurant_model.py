@@ -18,14 +18,41 @@ class Restaurante(db.Model):
 
     # --- Dados de Gestão ---
     logo_url = db.Column(db.String(255), nullable=True)
+    # Logótipo processado (variantes WebP/JPEG); logo_url fica com a variante 'card' em JPEG
+    logo_imagem_id = db.Column(db.Integer, db.ForeignKey('imagens.id'), nullable=True)
+    logo_imagem = db.relationship('Imagem', lazy='joined')
     tempo_medio_entrega = db.Column(db.Integer, nullable=True) # Em minutos
     taxa_entrega = db.Column(db.Float, nullable=True)
-    ativo = db.Column(db.Boolean, default=False) # Se está aceitando pedidos
+    ativo = db.Column(db.Boolean, default=True) # Se está aceitando pedidos
+
+    # --- Agregados das Avaliações (mantidos pelo rating_service) ---
+    # Atualizados na mesma transação que insere a avaliação; 'flask ratings-rebuild' recalcula-os
+    avaliacoes_soma = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    avaliacoes_qtd = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    reclamacoes_qtd = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Histograma: nº de avaliações com 1, 2, ..., 5 estrelas
+    estrelas_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    estrelas_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    estrelas_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    estrelas_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    estrelas_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relacionamentos
     categorias = db.relationship('Categoria', backref='restaurante', lazy=True, cascade="all, delete-orphan")
     produtos = db.relationship('Produto', backref='restaurante', lazy=True, cascade="all, delete-orphan")
     
+    @property
+    def nota_media(self):
+        """Média das avaliações (ou None se ainda não tiver nenhuma)."""
+        if not self.avaliacoes_qtd:
+            return None
+        return self.avaliacoes_soma / self.avaliacoes_qtd
+
+    @property
+    def histograma_estrelas(self):
+        """Lista [(estrelas, quantidade)] de 5 a 1."""
+        return [(n, getattr(self, f'estrelas_{n}')) for n in range(5, 0, -1)]
+
     def __repr__(self):
         return f'<Restaurante {self.nome_fantasia}>'
 
@@ -1,7 +1,8 @@
 """
 Modelo de Usuário (Cliente e Dono de Restaurante)
 """
-from src.extensions import db, bcrypt
+from src.extensions import db
+from src.services.password_service import hash_password, verify_password, needs_rehash
 from flask_login import UserMixin
 import datetime
 
@@ -14,8 +15,12 @@ def load_user(user_id):
     Função obrigatória do Flask-Login.
     Diz ao Flask-Login como encontrar um utilizador a partir do ID
     guardado na sessão.
+
+    Usa a cache de identidades (sem query na maioria dos pedidos).
     """
-    return User.query.get(int(user_id))
+    # Importado aqui para evitar importações circulares (o serviço importa os modelos)
+    from src.services.user_cache_service import load_cached_user
+    return load_cached_user(int(user_id))
 
 
 class User(db.Model, UserMixin):
@@ -43,9 +48,7 @@ class User(db.Model, UserMixin):
     google_id = db.Column(db.String(120), unique=True, nullable=True)
     facebook_id = db.Column(db.String(120), unique=True, nullable=True)
     
-    # --- Verificação OTP (One-Time Password) ---
-    otp_code = db.Column(db.String(6), nullable=True) # Código de 6 dígitos
-    otp_expiration = db.Column(db.DateTime, nullable=True) # Data/hora de expiração
+    # (Os códigos OTP ficam na tabela 'codigos_otp', ver otp_model.py)
     
     # --- Metadados ---
     data_criacao = db.Column(db.DateTime, default=datetime.datetime.utcnow)
@@ -78,10 +81,16 @@ class User(db.Model, UserMixin):
     
     def set_password(self, password):
         """Gera o hash da palavra-passe e guarda-o."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verifica se a palavra-passe fornecida corresponde ao hash guardado."""
-        if not self.password_hash:
+        """
+        Verifica se a palavra-passe fornecida corresponde ao hash guardado.
+        Se o custo do BCrypt configurado mudou, atualiza o hash (rehash);
+        quem chama é responsável pelo commit.
+        """
+        if not verify_password(self.password_hash, password):
             return False
-        return bcrypt.check_password_hash(self.password_hash, password)
\ No newline at end of file
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
@@ -1,34 +1,51 @@
 """
 Módulo de Autenticação (Auth) - Rotas
 """
+import logging
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 import datetime
 from src.modules.client.forms import CheckoutForm
 from src.models import User, Restaurante, Produto, Pedido, ItemPedido, Endereco, Categoria
 from flask_login import login_user, logout_user, current_user, login_required
-from src.extensions import oauth, db  # Importa o 'oauth' e 'db'
+from src.extensions import oauth, db, limiter  # Importa o 'oauth', 'db' e o 'limiter'
 from sqlalchemy.exc import IntegrityError # Para tratar erros da DB
 from flask import current_app, session, abort
-import stripe
 from sqlalchemy import or_
 from src.services.geo_service import haversine
 from src.modules.auth.forms import RegistrationForm, LoginForm, EmailLoginForm, VerifyOtpForm, PhoneLoginForm
 from src.modules.auth.services import create_new_user, generate_and_send_otp, generate_and_send_sms_otp
+from src.modules.order.services import create_order
+from src.services.catalog_service import resolve_cart, invalidate_catalog
+from src.services.rate_limit_service import identity_from_form, identity_from_args
+from src.services.otp_service import verify_otp_code, OTP_OK, OTP_EXPIRADO
+from src.services.payment_service import create_checkout_session
+from src.services.metrics_service import track_checkout
+from src.services.logging_service import bind_log_context
+from src.services.replica_service import read_replica
+from src.services.ranking_service import ranked_feed
+from src.services.facet_service import get_index, parse_selection, bitset_ids
+from src.services.hours_service import get_table, open_now_bitset, is_open_now
+from src.services.eta_service import restaurant_eta, restaurant_etas
+from src.services.user_cache_service import add_points
 from flask import session
 
 # 1. Criação do Blueprint
 auth_bp = Blueprint('auth', __name__, template_folder='templates')
+logger = logging.getLogger(__name__)
 
 
 # --- Rota Principal (Home) - COM FILTRAGEM POR PROXIMIDADE ---
 @auth_bp.route('/')
+@read_replica
 def home():
     """
-    Página Inicial (Home) - Filtra restaurantes por proximidade 
-    ao primeiro endereço salvo do cliente (se logado).
+    Página Inicial (Home) - Restaurantes ordenados pelo ranking (ver
+    ranking_service), com a distância ao primeiro endereço salvo do
+    cliente (se logado). Paginada com ?pagina=N.
     """
     # 1. Parâmetros de Filtro
-    RAIO_MAXIMO_KM = 10 
+    pagina = request.args.get('pagina', 1, type=int)
+    por_pagina = current_app.config.get('HOME_PAGE_SIZE', 24)
     cliente_lat, cliente_lon = None, None
     
     # 2. Tenta encontrar a localização do cliente (se logado)
@@ -39,24 +56,31 @@ def home():
             cliente_lat = primeiro_endereco.latitude
             cliente_lon = primeiro_endereco.longitude
 
-    # 3. Busca e Filtra Restaurantes
-    todos_restaurantes = Restaurante.query.all()
-    restaurantes_proximos = []
-    
-    for rest in todos_restaurantes:
-        if cliente_lat:
-            restaurantes_proximos.append(rest)
-        elif not current_user.is_authenticated:
-             # Se não estiver logado, mostra todos para que ele possa entrar
-             restaurantes_proximos.append(rest)
-    
-    # Remove duplicados e deixa apenas a lista real
-    restaurantes = list(set(restaurantes_proximos)) if cliente_lat else todos_restaurantes
+    # 3. Filtros (facetas): bitsets em memória, sem JOINs ("aberto agora" vem dos horários)
+    selecao = parse_selection(request.args)
+    abertos = open_now_bitset()
+    selecionados, contagens = get_index().select(selecao, dinamicas={'aberto': {'1': abertos}})
+    restaurante_ids = set(bitset_ids(selecionados)) if selecao else None
+
+    # 4. Página do ranking (só a distância é calculada aqui, o resto vem pré-calculado)
+    restaurantes, distancias, total = ranked_feed(
+        pagina, por_pagina, cliente_lat, cliente_lon,
+        raio_km=current_app.config.get('HOME_RADIUS_KM'),
+        restaurante_ids=restaurante_ids,
+        abertos=set(bitset_ids(abertos)) if get_table().tem_horarios else None,
+    )
+    total_paginas = max(1, -(-total // por_pagina))
+    fechados = {r.id for r in restaurantes if not abertos >> r.id & 1}
 
-    return render_template('home.html', restaurantes=restaurantes)
+    return render_template('home.html', restaurantes=restaurantes, distancias=distancias,
+                           pagina=pagina, total_paginas=total_paginas,
+                           selecao=selecao, contagens=contagens, fechados=fechados,
+                           etas=restaurant_etas(restaurantes))
 
 # --- Rota de Login (Funcionalidade completa) ---
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit('login-ip', 20, 60)
+@limiter.limit('login-id', 5, 60, key=identity_from_form('login'))
 def login():
     # 1. Se o utilizador já está logado, manda-o para a home
     if current_user.is_authenticated:
@@ -77,6 +101,9 @@ def login():
         #    Usamos o método 'check_password' que criámos no modelo!
         if user and user.check_password(form.password.data):
             # 5. Se tudo estiver certo, inicia a sessão
+            #    (e grava o novo hash, caso o custo do BCrypt tenha mudado)
+            if db.session.is_modified(user):
+                db.session.commit()
             login_user(user, remember=form.remember_me.data)
             
             # (Opcional) Redireciona para a página que ele tentou aceder
@@ -185,7 +212,7 @@ def google_callback():
         return redirect(url_for('auth.login'))
     except Exception as e:
         # Erro genérico
-        print(f"Erro no callback do Google: {e}") # Bom para debug
+        logger.exception("Erro no callback do Google") # Bom para debug
         flash('Ocorreu um erro durante a autenticação Google.', 'danger')
         return redirect(url_for('auth.login'))
     
@@ -260,13 +287,15 @@ def facebook_callback():
         flash('Ocorreu um erro. Este e-mail do Facebook já pode estar em uso.', 'danger')
         return redirect(url_for('auth.login'))
     except Exception as e:
-        print(f"Erro no callback do Facebook: {e}")
+        logger.exception("Erro no callback do Facebook")
         flash(f'Ocorreu um erro durante a autenticação Facebook: {e}', 'danger')
         return redirect(url_for('auth.login'))
     
 # --- ROTAS DE LOGIN POR E-MAIL OTP ---
 
 @auth_bp.route('/email-login', methods=['GET', 'POST'])
+@limiter.limit('otp-email-ip', 10, 600)
+@limiter.limit('otp-email-id', 3, 600, key=identity_from_form('email'))
 def email_login():
     """
     Passo 1 do Login OTP: Pedir o código.
@@ -295,6 +324,8 @@ def email_login():
 
 
 @auth_bp.route('/verify-otp', methods=['GET', 'POST'])
+@limiter.limit('verify-otp-ip', 20, 600)
+@limiter.limit('verify-otp-id', 5, 600, key=identity_from_args('email'))
 def verify_otp():
     """
     Passo 2 do Login OTP: Validar o código.
@@ -317,29 +348,18 @@ def verify_otp():
     form = VerifyOtpForm()
     
     if form.validate_on_submit():
-        submitted_code = form.otp_code.data
+        # 1. Verifica o código (hash, expiração e tentativas) no store de OTP
+        resultado = verify_otp_code('email', user.email, form.otp_code.data)
         
-        # 1. Verifica se o código bate
-        # (Idealmente, usaríamos hmac.compare_digest para segurança)
-        if user.otp_code == submitted_code:
+        if resultado == OTP_OK:
+            # SUCESSO! (O código já foi apagado do store)
+            # Faz o login do utilizador
+            login_user(user)
+            flash('Login feito com sucesso!', 'success')
+            return redirect(url_for('auth.home'))
             
-            # 2. Verifica se o código não expirou
-            # (Compara o tempo 'agora' com o tempo de expiração)
-            if user.otp_expiration and user.otp_expiration > datetime.datetime.utcnow():
-                
-                # SUCESSO!
-                # Limpa o OTP da DB por segurança
-                user.otp_code = None
-                user.otp_expiration = None
-                db.session.commit()
-                
-                # Faz o login do utilizador
-                login_user(user)
-                flash('Login feito com sucesso!', 'success')
-                return redirect(url_for('auth.home'))
-                
-            else:
-                flash('Código expirado. Por favor, peça um novo código.', 'danger')
+        elif resultado == OTP_EXPIRADO:
+            flash('Código expirado. Por favor, peça um novo código.', 'danger')
         
         else:
             flash('Código inválido. Tente novamente.', 'danger')
@@ -350,6 +370,8 @@ def verify_otp():
 # --- ROTAS DE LOGIN POR TELEMÓVEL OTP ---
 
 @auth_bp.route('/phone-login', methods=['GET', 'POST'])
+@limiter.limit('otp-sms-ip', 5, 600)
+@limiter.limit('otp-sms-id', 3, 600, key=identity_from_form('telefone'))
 def phone_login():
     """
     Passo 1 do Login OTP (SMS): Pedir o código.
@@ -377,6 +399,8 @@ def phone_login():
 
 
 @auth_bp.route('/verify-phone-otp', methods=['GET', 'POST'])
+@limiter.limit('verify-sms-ip', 20, 600)
+@limiter.limit('verify-sms-id', 5, 600, key=identity_from_args('telefone'))
 def verify_phone_otp():
     """
     Passo 2 do Login OTP (SMS): Validar o código.
@@ -400,27 +424,18 @@ def verify_phone_otp():
     form = VerifyOtpForm() 
     
     if form.validate_on_submit():
-        submitted_code = form.otp_code.data
+        # 1. Verifica o código (hash, expiração e tentativas) no store de OTP
+        resultado = verify_otp_code('sms', user.telefone, form.otp_code.data)
         
-        # 1. Verifica se o código bate
-        if user.otp_code == submitted_code:
+        if resultado == OTP_OK:
+            # SUCESSO! (O código já foi apagado do store)
+            # Faz o login do utilizador
+            login_user(user)
+            flash('Login feito com sucesso!', 'success')
+            return redirect(url_for('auth.home'))
             
-            # 2. Verifica se o código não expirou (usando utcnow())
-            if user.otp_expiration and user.otp_expiration > datetime.datetime.utcnow():
-                
-                # SUCESSO!
-                # Limpa o OTP da DB por segurança
-                user.otp_code = None
-                user.otp_expiration = None
-                db.session.commit()
-                
-                # Faz o login do utilizador
-                login_user(user)
-                flash('Login feito com sucesso!', 'success')
-                return redirect(url_for('auth.home'))
-                
-            else:
-                flash('Código expirado. Por favor, peça um novo código.', 'danger')
+        elif resultado == OTP_EXPIRADO:
+            flash('Código expirado. Por favor, peça um novo código.', 'danger')
         
         else:
             flash('Código inválido. Tente novamente.', 'danger')
@@ -430,6 +445,7 @@ def verify_phone_otp():
 
 # --- Rota Pública do Cardápio ---
 @auth_bp.route('/restaurante/<int:restaurante_id>')
+@read_replica
 def view_restaurant(restaurante_id):
     """
     Mostra o cardápio público de um restaurante específico.
@@ -437,7 +453,8 @@ def view_restaurant(restaurante_id):
     restaurante = Restaurante.query.get_or_404(restaurante_id)
     
     # (Vamos usar um template que já existe, mas num contexto diferente)
-    return render_template('public_menu.html', restaurante=restaurante)
+    return render_template('public_menu.html', restaurante=restaurante, aberto=is_open_now(restaurante),
+                           eta=restaurant_eta(restaurante))
 
 # --- ROTAS DO CARRINHO ---
 
@@ -492,31 +509,13 @@ def view_cart():
     """
     cart = session.get('cart', {'items': {}, 'restaurant_id': None})
     
-    produtos_no_carrinho = []
-    total_carrinho = 0.0
-    
-    if cart['items']:
-        # 1. Pega os IDs dos produtos no carrinho
-        product_ids = [int(pid) for pid in cart['items'].keys()]
-        
-        # 2. Busca todos os produtos na DB de uma só vez
-        produtos = Produto.query.filter(Produto.id.in_(product_ids)).all()
-        
-        # 3. Constrói a lista de itens para mostrar no template
-        for p in produtos:
-            product_id_str = str(p.id)
-            quantidade = cart['items'][product_id_str]
-            subtotal = p.preco * quantidade
-            
-            produtos_no_carrinho.append({
-                'id': p.id,
-                'nome': p.nome,
-                'preco': p.preco,
-                'quantidade': quantidade,
-                'subtotal': subtotal,
-                'imagem': p.imagem_url
-            })
-            total_carrinho += subtotal
+    # Os preços vêm da cache do catálogo (sem query à DB em cada visita)
+    produtos_no_carrinho, total_carrinho, invalidos = resolve_cart(cart)
+    if invalidos:
+        _remover_do_carrinho(cart, invalidos)
+        flash('Alguns itens já não estão disponíveis e foram removidos do carrinho.', 'warning')
+    if produtos_no_carrinho:
+        track_checkout('carrinho')
             
     # (Vamos adicionar a taxa de entrega no próximo passo)
     
@@ -527,6 +526,16 @@ def view_cart():
         restaurante_id=cart['restaurant_id']
     )
 
+def _remover_do_carrinho(cart, product_ids):
+    """
+    Remove vários produtos (IDs em string) do carrinho e guarda-o na session.
+    """
+    for product_id_str in product_ids:
+        cart['items'].pop(product_id_str, None)
+    if not cart['items']:
+        cart['restaurant_id'] = None
+    session['cart'] = cart
+
 # --- Rota para Remover Item do Carrinho ---
 @auth_bp.route('/cart/remove/<int:produto_id>', methods=['POST'])
 @login_required
@@ -565,28 +574,31 @@ def checkout():
     if not cart['items']: return redirect(url_for('auth.home'))
 
     restaurante = Restaurante.query.get(cart['restaurant_id'])
-    product_ids = [int(k) for k in cart['items'].keys()]
-    produtos = Produto.query.filter(Produto.id.in_(product_ids)).all()
-    
-    # Calcular Totais
-    total_produtos = 0
+    if not restaurante:
+        session.pop('cart', None)
+        return redirect(url_for('auth.home'))
+
+    # Cozinha fechada (fora do horário, feriado ou pausada pelo restaurante): sem checkout
+    if not is_open_now(restaurante):
+        flash(f'{restaurante.nome_fantasia} está fechado neste momento. Tente mais tarde.', 'warning')
+        return redirect(url_for('auth.view_cart'))
+
+    # Totais calculados a partir da cache do catálogo
+    itens_template, total_produtos, invalidos = resolve_cart(cart)
+    if invalidos:
+        _remover_do_carrinho(cart, invalidos)
+        flash('Alguns itens já não estão disponíveis e foram removidos do carrinho.', 'warning')
+        return redirect(url_for('auth.view_cart'))
+
     line_items_stripe = []
-    itens_template = []
-    
-    for p in produtos:
-        qtd = cart['items'][str(p.id)]
-        subtotal = p.preco * qtd
-        total_produtos += subtotal
-        
-        itens_template.append({'nome': p.nome, 'preco': p.preco, 'quantidade': qtd, 'subtotal': subtotal})
-        
+    for item in itens_template:
         # Item para o Stripe
         line_items_stripe.append({
             "price_data": {
-                "currency": "brl", "product_data": {"name": p.nome},
-                "unit_amount": int(p.preco * 100)
+                "currency": "brl", "product_data": {"name": item['nome']},
+                "unit_amount": int(item['preco'] * 100)
             },
-            "quantity": qtd
+            "quantity": item['quantidade']
         })
         
     taxa = restaurante.taxa_entrega
@@ -605,33 +617,42 @@ def checkout():
 
     form = CheckoutForm()
     form.endereco_id.choices = [(e.id, f"{e.rua}, {e.numero}") for e in current_user.enderecos]
+    if request.method == 'GET':
+        track_checkout('checkout')
 
     if form.validate_on_submit():
+        # Validação final na DB (uma única vez, no momento de gravar):
+        # os produtos têm de existir, pertencer ao restaurante e estar disponíveis,
+        # com o mesmo preço que o cliente viu.
+        product_ids = [item['id'] for item in itens_template]
+        precos_db = dict(Produto.query.with_entities(Produto.id, Produto.preco).filter(
+            Produto.id.in_(product_ids),
+            Produto.restaurante_id == restaurante.id,
+            Produto.disponivel == True
+        ).all())
+        if any(precos_db.get(item['id']) != item['preco'] for item in itens_template):
+            invalidate_catalog(restaurante.id)
+            flash('O cardápio foi atualizado. Reveja o seu carrinho antes de pagar.', 'warning')
+            return redirect(url_for('auth.view_cart'))
+
         try:
             end = Endereco.query.get(form.endereco_id.data)
             
-            # 1. Cria Pedido como PENDENTE (Realismo)
-            pedido = Pedido(
+            # 1. Cria Pedido como PENDENTE (Realismo), com todos os itens
+            #    numa só transação
+            pedido = create_order(
                 cliente_id=current_user.id,
                 restaurante_id=restaurante.id,
+                endereco_entrega=f"{end.rua}, {end.numero} - {end.cep}",
+                itens=[(item['id'], item['quantidade'], item['preco']) for item in itens_template],
                 preco_total=total_final,
-                status='Pendente de Pagamento', # <--- VOLTA A SER PENDENTE
-                endereco_entrega=f"{end.rua}, {end.numero} - {end.cep}"
+                status='Pendente de Pagamento' # <--- VOLTA A SER PENDENTE
             )
-            db.session.add(pedido)
-            db.session.commit()
-            
-            for p in produtos:
-                item = ItemPedido(pedido_id=pedido.id, produto_id=p.id, 
-                                  quantidade=cart['items'][str(p.id)], preco_unitario_na_compra=p.preco)
-                db.session.add(item)
-            db.session.commit()
+            bind_log_context(pedido_id=pedido.id)
             
             # 2. Gera Link do Stripe
-            stripe.api_key = current_app.config['STRIPE_SECRET_KEY']
-            session_stripe = stripe.checkout.Session.create(
+            session_stripe = create_checkout_session(
                 line_items=line_items_stripe,
-                mode='payment',
                 # TRUQUE: Passamos o ID do pedido na URL de sucesso para aprová-lo na volta
                 success_url=url_for('auth.order_success', pedido_id=pedido.id, _external=True),
                 cancel_url=url_for('auth.order_cancel', _external=True),
@@ -639,15 +660,17 @@ def checkout():
             )
             
             # 3. Vai para o Stripe
+            track_checkout('iniciado')
             return redirect(session_stripe.url, code=303)
         
         except Exception as e:
             db.session.rollback()
+            logger.exception("Erro ao iniciar pagamento")
             flash(f'Erro ao iniciar pagamento: {e}', 'danger')
 
     return render_template('checkout.html', form=form, itens_carrinho=itens_template, 
                            restaurante=restaurante, total_produtos=total_produtos, 
-                           taxa_entrega=taxa, total_final=total_final)
+                           taxa_entrega=taxa, total_final=total_final, eta=restaurant_eta(restaurante))
 
 # --- ROTA DE SUCESSO (COM APROVAÇÃO FORÇADA) ---
 @auth_bp.route('/order/success/<int:pedido_id>') # Agora recebe o ID
@@ -658,6 +681,7 @@ def order_success(pedido_id):
     FORÇA a aprovação do pedido imediatamente.
     """
     pedido = Pedido.query.get_or_404(pedido_id)
+    bind_log_context(pedido_id=pedido.id)
     
     # Só processa se ainda estiver pendente (para não duplicar pontos se o cliente der F5)
     if pedido.status == 'Pendente de Pagamento':
@@ -669,12 +693,9 @@ def order_success(pedido_id):
         pedido.delivery_pin = str(random.randint(1000, 9999))
         
         # 3. Gamificação (Pontos)
+        # Soma na DB (os pontos do current_user vêm da cache e podem estar desatualizados)
         pontos_ganhos = int(pedido.preco_total * 10)
-        current_user.pontos += pontos_ganhos
-        
-        if current_user.pontos >= 5000: current_user.nivel = 'Ouro'
-        elif current_user.pontos >= 2000: current_user.nivel = 'Prata'
-        else: current_user.nivel = 'Bronze'
+        add_points(current_user.id, pontos_ganhos)
         
         db.session.commit()
         
@@ -722,6 +743,8 @@ def register():
 
 # --- Rota de Pesquisa ---
 @auth_bp.route('/search')
+@limiter.limit('search-ip', 60, 60, methods=('GET',))
+@read_replica
 def search():
     """
     Processa a pesquisa por restaurantes e produtos.
@@ -760,13 +783,19 @@ def search():
     rest_ids_por_categoria = {c.restaurante_id for c in categorias_encontradas}
     restaurantes_por_categoria = Restaurante.query.filter(Restaurante.id.in_(rest_ids_por_categoria)).all()
     
-    # Combina todos os resultados únicos
+    # Combina todos os resultados únicos (abertos primeiro; ?aberto=1 mostra só esses)
     todos_restaurantes_unicos = list(set(restaurantes_encontrados + restaurantes_por_produto + restaurantes_por_categoria))
+    abertos = open_now_bitset()
+    fechados = {r.id for r in todos_restaurantes_unicos if not abertos >> r.id & 1}
+    if request.args.get('aberto'):
+        todos_restaurantes_unicos = [r for r in todos_restaurantes_unicos if r.id not in fechados]
+    todos_restaurantes_unicos.sort(key=lambda r: (r.id in fechados, r.nome_fantasia))
     
     return render_template('search_results.html', 
                            query=query, 
                            restaurantes=todos_restaurantes_unicos,
-                           produtos=produtos_encontrados)
+                           produtos=produtos_encontrados,
+                           fechados=fechados)
 
 # --- ROTAS INSTITUCIONAIS ---
 
@@ -4,12 +4,14 @@ Serviços do Módulo de Autenticação
 Este ficheiro contém a lógica de negócio (regras) 
 separada das rotas (controllers).
 """
+import logging
 from src.extensions import db
 from src.models import User
-import random
-import datetime
 from src.services.email_service import send_email
 from src.services.sms_service import send_sms
+from src.services.otp_service import create_otp_code
+
+logger = logging.getLogger(__name__)
 
 def create_new_user(nome_completo, email, telefone, password):
     """
@@ -38,30 +40,18 @@ def create_new_user(nome_completo, email, telefone, password):
     except Exception as e:
         # Em caso de erro (ex: falha de 'unique'), faz rollback
         db.session.rollback()
-        print(f"Erro ao criar utilizador: {e}") # Log do erro
+        logger.exception("Erro ao criar utilizador") # Log do erro
         return None
     
 def generate_and_send_otp(user):
     """
-    Gera um OTP, guarda-o no utilizador e envia-o por e-mail.
+    Gera um OTP, guarda o seu hash na tabela de códigos e envia-o por e-mail.
     """
     try:
-        # 1. Gerar Código
-        # Gera um número entre 100000 e 999999 e converte para string
-        otp_code = str(random.randint(100000, 999999))
-        
-        # 2. Definir Expiração (10 minutos a partir de agora)
-        # O 'timezone.utc' garante que estamos a usar o tempo universal
-        expiration_time = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
-
-        # 3. Salvar no Utilizador
-        # (NÃO estamos a encriptar por agora, para ser mais simples)
-        user.otp_code = otp_code
-        user.otp_expiration = expiration_time
-        
-        db.session.commit()
+        # 1. Gerar e guardar o código (só o hash fica na DB, válido 10 minutos)
+        otp_code = create_otp_code('email', user.email)
 
-        # 4. Enviar E-mail (Usando o nosso serviço!)
+        # 2. Enviar E-mail (Usando o nosso serviço!)
         success = send_email(
             subject="Seu Código de Acesso YummyGo",
             recipients=[user.email],
@@ -74,27 +64,18 @@ def generate_and_send_otp(user):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Erro ao gerar/enviar OTP: {e}")
+        logger.exception("Erro ao gerar/enviar OTP", extra={'user_id': user.id, 'canal': 'email'})
         return False
     
 def generate_and_send_sms_otp(user):
     """
-    Gera um OTP, guarda-o no utilizador e envia-o por SMS.
+    Gera um OTP, guarda o seu hash na tabela de códigos e envia-o por SMS.
     """
     try:
-        # 1. Gerar Código (lógica idêntica à do e-mail)
-        otp_code = str(random.randint(100000, 999999))
-        
-        # 2. Definir Expiração (10 minutos, naive UTC)
-        expiration_time = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
+        # 1. Gerar e guardar o código (lógica idêntica à do e-mail)
+        otp_code = create_otp_code('sms', user.telefone)
 
-        # 3. Salvar no Utilizador
-        user.otp_code = otp_code
-        user.otp_expiration = expiration_time
-        
-        db.session.commit()
-
-        # 4. Enviar SMS (Usando o nosso serviço!)
+        # 2. Enviar SMS (Usando o nosso serviço!)
         body = f"O seu código de verificação YummyGo é: {otp_code}"
         
         # NOTA: Isto assume que user.telefone está no formato
@@ -108,5 +89,5 @@ def generate_and_send_sms_otp(user):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Erro ao gerar/enviar OTP por SMS: {e}")
-        return False
\ No newline at end of file
+        logger.exception("Erro ao gerar/enviar OTP por SMS", extra={'user_id': user.id, 'canal': 'sms'})
+        return False
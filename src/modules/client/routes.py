@@ -3,6 +3,7 @@ Módulo do Cliente (Client) - Rotas
 
 Define as rotas para /perfil, /perfil/enderecos, /perfil/pedidos, etc.
 """
+import logging
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from src.modules.client.forms import UpdateProfileForm
@@ -11,12 +12,15 @@ from src.modules.client.forms import UpdateProfileForm, AddressForm, ReviewForm
 from src.models import User, Endereco, Pedido, Avaliacao
 from flask import abort
 from src.services.geo_service import get_coordinates
-from io import BytesIO
-from xhtml2pdf import pisa
-from flask import make_response
+from src.services.rating_service import record_review
+from src.services.eta_service import order_eta
+import os
+from flask import make_response, send_file
+from src.services.invoice_service import cached_invoice, generate_invoice, invoice_path
 
 # 1. Criação do Blueprint
 client_bp = Blueprint('client', __name__, template_folder='templates')
+logger = logging.getLogger(__name__)
 
 
 # 2. Rota Principal do Perfil (/perfil/)
@@ -40,7 +44,7 @@ def profile():
         except Exception as e:
             db.session.rollback()
             flash('Erro ao salvar no banco de dados. Tente novamente.', 'danger')
-            print(f"Erro no perfil: {e}")
+            logger.exception("Erro no perfil")
 
     elif request.method == 'GET':
         form.nome_completo.data = current_user.nome_completo
@@ -85,7 +89,7 @@ def manage_addresses():
         except Exception as e:
             db.session.rollback()
             flash('Erro ao salvar o endereço. Tente novamente.', 'danger')
-            print(f"Erro ao salvar endereço: {e}")
+            logger.exception("Erro ao salvar endereço")
             
     enderecos_do_utilizador = current_user.enderecos
     
@@ -115,7 +119,7 @@ def delete_address(endereco_id):
     except Exception as e:
         db.session.rollback()
         flash('Erro ao apagar o endereço.', 'danger')
-        print(f"Erro ao apagar endereço: {e}")
+        logger.exception("Erro ao apagar endereço", extra={'endereco_id': endereco_id})
         
     return redirect(url_for('client.manage_addresses'))
 
@@ -159,7 +163,8 @@ def track_order(pedido_id):
         'track_order.html', 
         pedido=pedido, 
         steps=steps,
-        current_step_index=current_step_index
+        current_step_index=current_step_index,
+        eta=order_eta(pedido)
     )
 
 @client_bp.route('/pedido/<int:pedido_id>/pdf')
@@ -167,24 +172,39 @@ def track_order(pedido_id):
 def download_invoice(pedido_id):
     pedido = Pedido.query.get_or_404(pedido_id)
     
-    # Segurança: Só o dono ou o restaurante podem ver
-    if pedido.cliente_id != current_user.id and current_user.role != 'restaurante':
+    # Segurança: Só o cliente ou o restaurante do pedido podem ver
+    restaurante = current_user.restaurante
+    if pedido.cliente_id != current_user.id and (restaurante is None or restaurante.id != pedido.restaurante_id):
         abort(403)
 
-    # Renderiza o HTML da nota
-    html = render_template('invoice_pdf.html', pedido=pedido)
-    
-    # Converte para PDF
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    
-    if not pdf.err:
-        response = make_response(result.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=Nota_Fiscal_{pedido.id}.pdf'
-        return response
-    
-    return "Erro ao gerar PDF", 500
+    nome_ficheiro = f'Nota_Fiscal_{pedido.id}.pdf'
+
+    # 1. Fatura já gerada (pedido concluído): serve o ficheiro, com ETag e Range
+    sha256 = cached_invoice(pedido)
+    if sha256 is None:
+        # 2. Ainda não existe: gera agora (e guarda, se o pedido estiver concluído)
+        try:
+            sha256, pdf = generate_invoice(pedido)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Erro ao gerar PDF", extra={'pedido_id': pedido.id})
+            return "Erro ao gerar PDF", 500
+        if sha256 is None:
+            # Pedido ainda em curso: o PDF não é guardado nem colocado em cache
+            response = make_response(pdf)
+            response.headers['Content-Type'] = 'application/pdf'
+            response.headers['Content-Disposition'] = f'attachment; filename={nome_ficheiro}'
+            response.headers['Cache-Control'] = 'private, no-store'
+            return response
+
+    response = send_file(
+        os.path.abspath(invoice_path(sha256)), mimetype='application/pdf',
+        as_attachment=True, download_name=nome_ficheiro,
+        etag=sha256, conditional=True, max_age=86400
+    )
+    response.cache_control.private = True
+    response.cache_control.public = False
+    return response
 
 # --- Rota para Avaliar Pedido ---
 @client_bp.route('/pedido/<int:pedido_id>/avaliar', methods=['GET', 'POST'])
@@ -228,6 +248,8 @@ def review_order(pedido_id):
         )
         
         db.session.add(nova_avaliacao)
+        # Agregados do restaurante na mesma transação (tudo ou nada)
+        record_review(nova_avaliacao)
         db.session.commit()
         
         flash('Obrigado pela sua avaliação!', 'success')
@@ -0,0 +1,61 @@
+"""
+Serviços do Módulo de Pedidos
+
+Centraliza a criação de pedidos (Pedido + ItemPedido) para que
+todas as rotas usem a mesma transação.
+"""
+from sqlalchemy import insert
+from src.extensions import db
+from src.models import Pedido, ItemPedido
+# Regista o histórico de status (cada mudança de Pedido.status grava um EventoPedido)
+from src.services import order_history_service  # noqa: F401
+
+
+def create_order(cliente_id, restaurante_id, endereco_entrega, itens,
+                 preco_total, status='Pendente de Pagamento', tipo_pagamento=None):
+    """
+    Cria um pedido e todos os seus itens numa ÚNICA transação.
+
+    O pedido é inserido com um flush (o SQLAlchemy usa RETURNING para obter
+    o ID nas bases de dados que o suportam, como Postgres e SQLite >= 3.35).
+    Os itens são inseridos num só 'executemany', em vez de um 'add' por linha.
+    Se algo falhar, nada é gravado (não ficam pedidos sem itens).
+
+    :param itens: Lista de tuplos (produto_id, quantidade, preco_unitario).
+    :return: O Pedido criado (já 'commitado').
+    """
+    pedido = Pedido(
+        cliente_id=cliente_id,
+        restaurante_id=restaurante_id,
+        preco_total=preco_total,
+        status=status,
+        endereco_entrega=endereco_entrega
+    )
+    if tipo_pagamento:
+        pedido.tipo_pagamento = tipo_pagamento
+
+    try:
+        # 1. Insere o Pedido (sem commit) para obter o ID
+        db.session.add(pedido)
+        db.session.flush()
+
+        # 2. Insere todos os itens de uma só vez (executemany)
+        linhas = [
+            {
+                'pedido_id': pedido.id,
+                'produto_id': produto_id,
+                'quantidade': quantidade,
+                'preco_unitario_na_compra': preco_unitario
+            }
+            for produto_id, quantidade, preco_unitario in itens
+        ]
+        if linhas:
+            db.session.execute(insert(ItemPedido), linhas)
+
+        # 3. Um único commit para o pedido e os itens
+        db.session.commit()
+        return pedido
+
+    except Exception:
+        db.session.rollback()
+        raise
@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed 
-from wtforms import StringField, SubmitField, IntegerField, FloatField, TextAreaField, BooleanField, SelectField
-from wtforms.validators import DataRequired, Length, ValidationError
+from wtforms import StringField, SubmitField, IntegerField, FloatField, TextAreaField, BooleanField, SelectField, TimeField, DateField
+from wtforms.validators import DataRequired, Length, ValidationError, Optional
 from src.models import Restaurante
 
 class RestaurantRegistrationForm(FlaskForm):
@@ -85,4 +85,54 @@ class UpdateRestaurantInfoForm(FlaskForm):
         FileAllowed(['jpg', 'png', 'jpeg', 'webp'], 'Apenas imagens são permitidas!')
     ])
     
-    submit = SubmitField('Salvar Informações')
\ No newline at end of file
+    submit = SubmitField('Salvar Informações')
+
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+TURNOS = (1, 2) # Até dois intervalos por dia (ex: almoço e jantar)
+
+class OpeningHoursForm(FlaskForm):
+    """
+    Formulário do horário semanal: para cada dia, até dois intervalos
+    (campos abre_<dia>_<turno> e fecha_<dia>_<turno>, criados abaixo).
+    """
+    ativo = BooleanField('Aceitar pedidos (desligue para pausar a loja)')
+    submit_hours = SubmitField('Salvar Horário')
+
+    def intervalos(self):
+        """[(dia_semana, abre, fecha)] preenchidos no formulário."""
+        return [(dia, self[f'abre_{dia}_{turno}'].data, self[f'fecha_{dia}_{turno}'].data)
+                for dia in range(7) for turno in TURNOS
+                if self[f'abre_{dia}_{turno}'].data and self[f'fecha_{dia}_{turno}'].data]
+
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        for dia in range(7):
+            for turno in TURNOS:
+                abre, fecha = self[f'abre_{dia}_{turno}'], self[f'fecha_{dia}_{turno}']
+                if bool(abre.data) != bool(fecha.data):
+                    (fecha if abre.data else abre).errors.append('Preencha a abertura e o fecho.')
+                    return False
+        return True
+
+for _dia in range(7):
+    for _turno in TURNOS:
+        setattr(OpeningHoursForm, f'abre_{_dia}_{_turno}', TimeField(validators=[Optional()]))
+        setattr(OpeningHoursForm, f'fecha_{_dia}_{_turno}', TimeField(validators=[Optional()]))
+
+
+class HolidayForm(FlaskForm):
+    """
+    Formulário de uma exceção ao horário (feriado ou horário especial).
+    """
+    data = DateField('Data', validators=[DataRequired()])
+    descricao = StringField('Descrição (ex: Natal)', validators=[Optional(), Length(max=100)])
+    fechado = BooleanField('Fechado o dia todo', default=True)
+    abre = TimeField('Abre', validators=[Optional()])
+    fecha = TimeField('Fecha', validators=[Optional()])
+    submit_holiday = SubmitField('Adicionar Exceção')
+
+    def validate_fecha(self, fecha):
+        if not self.fechado.data and not (self.abre.data and fecha.data):
+            raise ValidationError('Indique o horário especial, ou marque "Fechado o dia todo".')
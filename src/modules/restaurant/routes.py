@@ -3,19 +3,27 @@ Módulo do Restaurante (Restaurant) - Rotas
 
 Define as rotas para /portal/ (dashboard), /portal/registar, /portal/cardapio, etc.
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import logging
+from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, current_app
 from flask_login import login_required, current_user
 from src.modules.restaurant.forms import RestaurantRegistrationForm, CategoryForm, ProductForm, OrderStatusForm, UpdateRestaurantInfoForm
+from src.modules.restaurant.forms import OpeningHoursForm, HolidayForm, DIAS_SEMANA, TURNOS
 from src.extensions import db
-from src.models import Restaurante, Categoria, Produto, Pedido, ItemPedido, Avaliacao
+from src.models import Restaurante, Categoria, Produto, Pedido, ItemPedido, HorarioFuncionamento, ExcecaoHorario
 from flask import abort 
-from sqlalchemy import func, case
-from src.services.upload_service import upload_image
+from sqlalchemy import func
+from src.services.image_service import submit_image, apply_image
 from src.services.email_service import send_email
+from src.services.logging_service import bind_log_context
+from src.services.invoice_service import schedule_invoice, export_month
+from src.services.replica_service import read_replica
+from src.services.hours_service import is_open_now, local_now
+from src.services.order_history_service import stage_percentiles, ETAPAS
 from datetime import datetime, timedelta
 
 # 1. CRIAÇÃO DO BLUEPRINT (Isto é essencial para o __init__.py encontrar)
 restaurant_bp = Blueprint('restaurant', __name__, template_folder='templates')
+logger = logging.getLogger(__name__)
 
 
 # 2. ROTA DO DASHBOARD (Esta é a rota que o erro diz que falta!)
@@ -49,11 +57,11 @@ def register():
             cnpj=form.cnpj.data,
             taxa_entrega=form.taxa_entrega.data,
             tempo_medio_entrega=form.tempo_medio_entrega.data,
-            ativo=False 
+            ativo=True # Aberto a semana toda até o dono definir horários (ver manage_hours)
         )
         
         try:
-            novo_restaurante.dono = current_user
+            novo_restaurante.user_id = current_user.id
             current_user.role = 'restaurante'
             
             db.session.add(novo_restaurante)
@@ -65,7 +73,7 @@ def register():
         except Exception as e:
             db.session.rollback()
             flash('Erro ao registar o restaurante. Tente novamente.', 'danger')
-            print(f"Erro ao registar restaurante: {e}")
+            logger.exception("Erro ao registar restaurante")
 
     return render_template('register_restaurant.html', form=form)
 
@@ -100,21 +108,18 @@ def manage_menu():
     # Adicionar Produto (COM UPLOAD)
     if product_form.submit_product.data and product_form.validate_on_submit():
         
-        imagem_url = None
-        if product_form.imagem.data:
-            arquivo = product_form.imagem.data
-            imagem_url = upload_image(arquivo) # Upload para Cloudinary
-
         novo_produto = Produto(
             nome=product_form.nome.data,
             descricao=product_form.descricao.data,
             preco=product_form.preco.data,
             disponivel=product_form.disponivel.data,
             categoria_id=product_form.categoria_id.data,
-            restaurante_id=restaurante.id,
-            imagem_url=imagem_url # Salva URL
+            restaurante_id=restaurante.id
         )
         db.session.add(novo_produto)
+        if product_form.imagem.data:
+            # Redimensionada e enviada em background (ver image_service)
+            apply_image(novo_produto, submit_image(product_form.imagem.data))
         db.session.commit()
         flash('Produto adicionado com sucesso!', 'success')
         return redirect(url_for('restaurant.manage_menu'))
@@ -179,8 +184,7 @@ def edit_product(produto_id):
     if form.validate_on_submit():
         form.populate_obj(produto)
         if form.imagem.data:
-            url = upload_image(form.imagem.data)
-            if url: produto.imagem_url = url
+            apply_image(produto, submit_image(form.imagem.data))
         db.session.commit()
         flash('Produto atualizado!', 'success')
         return redirect(url_for('restaurant.manage_menu'))
@@ -207,6 +211,7 @@ def manage_orders():
         pedido_id = request.form.get('pedido_id') 
         acao = request.form.get('acao') # 'avancar' ou 'validar_entrega'
         pedido = Pedido.query.get(pedido_id)
+        bind_log_context(pedido_id=pedido_id)
         
         if pedido and pedido.restaurante_id == restaurante.id:
             
@@ -218,6 +223,8 @@ def manage_orders():
                 if pin_digitado == pedido.delivery_pin:
                     pedido.status = 'Concluído'
                     db.session.commit()
+                    # A fatura é gerada já, em background (o pedido não muda mais)
+                    schedule_invoice(pedido.id)
                     flash(f'Pedido #{pedido.id} entregue com sucesso!', 'success')
                     
                     # (Opcional) Enviar e-mail de conclusão
@@ -231,7 +238,7 @@ def manage_orders():
                             nome=pedido.cliente.nome_completo
                         )
                     except Exception as e:
-                        print(f"Erro ao enviar email: {e}")
+                        logger.exception("Erro ao enviar email", extra={'pedido_id': pedido.id})
 
                 else:
                     flash('Código de entrega INCORRETO! Tente novamente.', 'danger')
@@ -264,7 +271,7 @@ def manage_orders():
                                     nome=pedido.cliente.nome_completo
                                 )
                             except Exception as e:
-                                print(f"Erro ao enviar email: {e}")
+                                logger.exception("Erro ao enviar email", extra={'pedido_id': pedido.id})
 
                 except ValueError:
                     flash('Não é possível atualizar este status.', 'danger')
@@ -284,8 +291,7 @@ def manage_info():
     if form.validate_on_submit():
         form.populate_obj(restaurante)
         if form.logo.data:
-            url = upload_image(form.logo.data)
-            if url: restaurante.logo_url = url
+            apply_image(restaurante, submit_image(form.logo.data))
         
         db.session.commit()
         flash('Informações atualizadas!', 'success')
@@ -294,9 +300,81 @@ def manage_info():
     return render_template('manage_info.html', form=form, restaurante=restaurante)
 
 
+@restaurant_bp.route('/horarios', methods=['GET', 'POST'])
+@login_required
+def manage_hours():
+    """
+    Horário semanal, exceções (feriados) e o interruptor 'ativo' da loja.
+    """
+    if current_user.role != 'restaurante': abort(403)
+    restaurante = current_user.restaurante
+
+    # Horário atual no formulário (até dois intervalos por dia, pela ordem de abertura)
+    dados = {'ativo': restaurante.ativo}
+    horarios = HorarioFuncionamento.query.filter_by(restaurante_id=restaurante.id).order_by(
+        HorarioFuncionamento.dia_semana, HorarioFuncionamento.abre).all()
+    for h in horarios:
+        for turno in TURNOS:
+            if f'abre_{h.dia_semana}_{turno}' not in dados:
+                dados[f'abre_{h.dia_semana}_{turno}'], dados[f'fecha_{h.dia_semana}_{turno}'] = h.abre, h.fecha
+                break
+
+    hours_form = OpeningHoursForm(data=dados)
+    holiday_form = HolidayForm()
+
+    # Guardar o horário semanal (substitui o anterior)
+    if hours_form.submit_hours.data and hours_form.validate_on_submit():
+        HorarioFuncionamento.query.filter_by(restaurante_id=restaurante.id).delete()
+        db.session.add_all([
+            HorarioFuncionamento(restaurante_id=restaurante.id, dia_semana=dia, abre=abre, fecha=fecha)
+            for dia, abre, fecha in hours_form.intervalos()
+        ])
+        restaurante.ativo = hours_form.ativo.data
+        db.session.commit()
+        flash('Horário atualizado!', 'success')
+        return redirect(url_for('restaurant.manage_hours'))
+
+    # Adicionar uma exceção (substitui a que já existir nesse dia)
+    if holiday_form.submit_holiday.data and holiday_form.validate_on_submit():
+        ExcecaoHorario.query.filter_by(restaurante_id=restaurante.id, data=holiday_form.data.data).delete()
+        fechado = holiday_form.fechado.data
+        db.session.add(ExcecaoHorario(
+            restaurante_id=restaurante.id,
+            data=holiday_form.data.data,
+            descricao=holiday_form.descricao.data,
+            fechado=fechado,
+            abre=None if fechado else holiday_form.abre.data,
+            fecha=None if fechado else holiday_form.fecha.data,
+        ))
+        db.session.commit()
+        flash('Exceção ao horário adicionada!', 'success')
+        return redirect(url_for('restaurant.manage_hours'))
+
+    excecoes = ExcecaoHorario.query.filter(
+        ExcecaoHorario.restaurante_id == restaurante.id,
+        ExcecaoHorario.data >= local_now().date(),
+    ).order_by(ExcecaoHorario.data).all()
+
+    return render_template('manage_hours.html', hours_form=hours_form, holiday_form=holiday_form,
+                           excecoes=excecoes, dias=DIAS_SEMANA, turnos=TURNOS,
+                           aberto=is_open_now(restaurante))
+
+@restaurant_bp.route('/horarios/excecao/apagar/<int:excecao_id>', methods=['POST'])
+@login_required
+def delete_holiday(excecao_id):
+    if current_user.role != 'restaurante': abort(403)
+    excecao = ExcecaoHorario.query.get_or_404(excecao_id)
+    if excecao.restaurante_id != current_user.restaurante.id: abort(403)
+    db.session.delete(excecao)
+    db.session.commit()
+    flash('Exceção apagada.', 'success')
+    return redirect(url_for('restaurant.manage_hours'))
+
+
 # 9. Rotas de Relatórios
 @restaurant_bp.route('/relatorio', methods=['GET'])
 @login_required
+@read_replica
 def orders_report():
     data_inicio_str = request.args.get('data_inicio')
     data_fim_str = request.args.get('data_fim')
@@ -343,25 +421,22 @@ def orders_report():
 
 @restaurant_bp.route('/relatorio/qualidade', methods=['GET'])
 @login_required
+@read_replica
 def quality_report():
     # (Mesma lógica de datas)
     data_inicio = datetime.now() - timedelta(days=30)
     data_fim = datetime.now()
     
-    resultados = db.session.query(
-        Restaurante.nome_fantasia,
-        func.avg(Avaliacao.nota).label('media_nota'),
-        func.count(Avaliacao.id).label('qtd_total'),
-        func.sum(case((Avaliacao.reclamacao == True, 1), else_=0)).label('qtd_reclamacoes')
-    ).join(Avaliacao).group_by(Restaurante.id).all()
+    # Agregados mantidos pelo rating_service (sem JOIN às avaliações)
+    resultados = Restaurante.query.filter(Restaurante.avaliacoes_qtd > 0).order_by(Restaurante.id).all()
 
     relatorio_dados = []
     nomes_grafico = []
     medias_grafico = []
 
     for r in resultados:
-        media = float(r.media_nota) if r.media_nota else 0
-        perc_reclamacoes = (r.qtd_reclamacoes / r.qtd_total * 100) if r.qtd_total > 0 else 0
+        media = r.nota_media or 0
+        perc_reclamacoes = r.reclamacoes_qtd / r.avaliacoes_qtd * 100
         relatorio_dados.append({'restaurante': r.nome_fantasia, 'media': media, 'perc_reclamacoes': perc_reclamacoes})
         nomes_grafico.append(r.nome_fantasia)
         medias_grafico.append(round(media, 1))
@@ -372,6 +447,7 @@ def quality_report():
 
 @restaurant_bp.route('/relatorio/pagamentos', methods=['GET'])
 @login_required
+@read_replica
 def payment_report():
     # (Mesma lógica de datas)
     data_inicio = datetime.now() - timedelta(days=30)
@@ -401,6 +477,55 @@ def payment_report():
                            data_inicio=data_inicio.strftime('%Y-%m-%d'), data_fim=data_fim.strftime('%Y-%m-%d'),
                            grafico_labels=labels_grafico, grafico_data=valores_grafico)
 
+@restaurant_bp.route('/relatorio/tempos', methods=['GET'])
+@login_required
+@read_replica
+def times_report():
+    """
+    Percentis da duração de cada etapa dos pedidos (a partir do histórico de status).
+    """
+    if current_user.role != 'restaurante': abort(403)
+    # Entre 1 dia e 1 ano (valores enormes rebentam o timedelta, negativos dão uma janela no futuro)
+    dias = min(max(request.args.get('dias', 30, type=int), 1), 365)
+    desde = datetime.utcnow() - timedelta(days=dias)
+
+    por_etapa = stage_percentiles(current_user.restaurante.id, desde).get(current_user.restaurante.id, {})
+    # Pela ordem do fluxo do pedido
+    relatorio = [{'etapa': etapa, **por_etapa[etapa]} for etapa in ETAPAS.values() if etapa in por_etapa]
+
+    return render_template('times_report.html', relatorio=relatorio, dias=dias)
+
+@restaurant_bp.route('/relatorio/faturas', methods=['GET'])
+@login_required
+def export_invoices():
+    """
+    Descarrega um ZIP com as faturas dos pedidos concluídos num mês (?mes=AAAA-MM).
+    """
+    if current_user.role != 'restaurante': abort(403)
+    try:
+        ano, mes = (int(parte) for parte in request.args.get('mes', '').split('-'))
+        datetime(ano, mes, 1)
+        # Sem pedidos antes de 2000 nem no futuro (e o ano 9999 rebentaria o fim do mês)
+        if not 2000 <= ano <= datetime.utcnow().year:
+            raise ValueError(ano)
+    except ValueError:
+        flash('Indique o mês no formato AAAA-MM.', 'danger')
+        return redirect(url_for('restaurant.payment_report'))
+
+    arquivo, total, pendentes = export_month(current_user.restaurante.id, ano, mes)
+    if not total:
+        flash('Não há pedidos concluídos nesse mês.', 'info')
+        return redirect(url_for('restaurant.payment_report'))
+    if pendentes:
+        flash(f'As faturas ainda estão a ser geradas ({pendentes} em falta). Tente daqui a pouco.', 'info')
+        return redirect(url_for('restaurant.payment_report'))
+    if arquivo is None:
+        flash(f'O mês tem {total} faturas, mais do que o máximo de uma exportação '
+              f'({current_app.config["INVOICE_EXPORT_MAX"]}). Contacte o suporte.', 'warning')
+        return redirect(url_for('restaurant.payment_report'))
+    return send_file(arquivo, mimetype='application/zip', as_attachment=True,
+                     download_name=f'Faturas_{ano}-{mes:02d}.zip')
+
 # Nova rota para cancelar
 @restaurant_bp.route('/pedido/cancelar/<int:pedido_id>', methods=['POST'])
 @login_required
@@ -0,0 +1,150 @@
+"""
+Serviço de Ficheiros Estáticos (CSS/JS com impressão digital)
+
+Sem hash no nome, o browser tem de revalidar o styles.css e os .js em cada
+navegação. Com 'flask assets-build' (passo de build do deploy):
+
+1. Cada ficheiro de static/ (exceto uploads/) é copiado para ASSETS_DIR
+   com o hash do conteúdo no nome (css/styles.css -> css/styles.3fa2b1c9e0d4.css),
+   mais as versões pré-comprimidas .gz (e .br, se o pacote 'brotli' existir).
+2. Um manifest.json liga o nome lógico ao nome com hash.
+
+Em runtime, o helper 'asset_url' (global do Jinja) devolve o URL com hash
+(memoizado: uma consulta a um dicionário por chamada) e a rota /assets
+serve a versão comprimida que o browser aceitar, com
+'Cache-Control: public, max-age=31536000, immutable'. Um ficheiro novo tem
+um nome novo, por isso nunca há conteúdo desatualizado em cache.
+
+Sem manifest (ex: desenvolvimento), asset_url cai para url_for('static').
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from flask import request, url_for, send_from_directory, abort
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+# Pastas de static/ que não são ficheiros de build (conteúdo carregado pelos utilizadores)
+IGNORAR = {'uploads', 'dist'}
+# Só vale a pena comprimir texto (imagens e fontes já vêm comprimidas)
+COMPRIMIR = {'.css', '.js', '.svg', '.json', '.map', '.txt', '.html'}
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+
+def _gravar(caminho, dados):
+    """Escrita atómica (vários workers/builds podem correr em simultâneo)."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(dados)
+    os.replace(temporario, caminho)
+
+
+def _nome_com_hash(nome, dados):
+    base, extensao = os.path.splitext(nome)
+    return f'{base}.{hashlib.sha256(dados).hexdigest()[:12]}{extensao}'
+
+
+def build_assets(pasta_static, destino, log=print):
+    """
+    Gera os ficheiros com hash (e comprimidos) e o manifest.
+
+    :param pasta_static: pasta de origem (app.static_folder)
+    :param destino: pasta de saída (ASSETS_DIR)
+    :return: o manifest {nome lógico: nome com hash}
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        log("Pacote 'brotli' não instalado: só serão geradas as versões .gz")
+
+    manifest = {}
+    for raiz, pastas, ficheiros in os.walk(pasta_static):
+        if os.path.abspath(raiz) == os.path.abspath(pasta_static):
+            pastas[:] = [p for p in pastas if p not in IGNORAR]
+        if os.path.abspath(raiz).startswith(os.path.abspath(destino)):
+            continue
+        for ficheiro in sorted(ficheiros):
+            origem = os.path.join(raiz, ficheiro)
+            nome = os.path.relpath(origem, pasta_static).replace(os.sep, '/')
+            with open(origem, 'rb') as f:
+                dados = f.read()
+
+            final = _nome_com_hash(nome, dados)
+            caminho = os.path.join(destino, final)
+            _gravar(caminho, dados)
+            if os.path.splitext(nome)[1] in COMPRIMIR:
+                # mtime=0: o mesmo conteúdo gera sempre o mesmo .gz (builds reprodutíveis)
+                _gravar(f'{caminho}.gz', gzip.compress(dados, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _gravar(f'{caminho}.br', brotli.compress(dados, quality=11))
+            manifest[nome] = final
+            log(f"{nome} -> {final}")
+
+    _gravar(os.path.join(destino, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+class Assets:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self.pasta = None
+        self.manifest = {}
+        self._urls = {}
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        self.pasta = app.config.get('ASSETS_DIR') or os.path.join(app.static_folder, 'dist')
+        self.manifest = self._ler_manifest()
+        self._urls = {}
+        if not self.manifest:
+            logger.info("Sem manifest de assets em %s: a usar /static sem hash", self.pasta)
+
+        app.add_url_rule('/assets/<path:filename>', 'assets', self._servir)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    def _ler_manifest(self):
+        try:
+            with open(os.path.join(self.pasta, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def asset_url(self, filename):
+        """URL de um ficheiro estático (com hash, se houver build). Memoizado."""
+        # A raiz da app (SCRIPT_NAME) entra na chave: o URL gerado depende dela
+        chave = (request.script_root, filename)
+        url = self._urls.get(chave)
+        if url is None:
+            final = self.manifest.get(filename)
+            url = url_for('assets', filename=final) if final else url_for('static', filename=filename)
+            self._urls[chave] = url
+        return url
+
+    def _servir(self, filename):
+        if filename == MANIFEST:
+            abort(404)
+        # 1. Versão pré-comprimida que o browser aceite (brotli > gzip > original)
+        aceites = request.accept_encodings
+        for codificacao, sufixo in (('br', '.br'), ('gzip', '.gz')):
+            if aceites[codificacao] and os.path.isfile(os.path.join(self.pasta, filename + sufixo)):
+                break
+        else:
+            codificacao, sufixo = None, ''
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(self.pasta, filename + sufixo, mimetype=mimetype, max_age=31536000)
+        # 2. O nome tem o hash do conteúdo: pode ficar em cache "para sempre"
+        response.headers['Cache-Control'] = CACHE_IMUTAVEL
+        response.vary.add('Accept-Encoding')
+        if codificacao:
+            response.headers['Content-Encoding'] = codificacao
+        return response
@@ -0,0 +1,124 @@
+"""
+Serviço de Catálogo (Cache de Produtos)
+
+Mantém em memória, por restaurante, um "retrato" (snapshot) dos produtos:
+id -> (nome, preço, disponível, imagem). O carrinho e o checkout calculam
+os totais a partir daqui, sem ir à DB em cada renderização.
+
+A cache é invalidada automaticamente quando um Produto é criado, editado
+ou apagado (eventos do SQLAlchemy, após o commit). Como cada worker do
+gunicorn tem a sua própria cache, existe também um TTL
+(CATALOG_CACHE_TTL) como rede de segurança; o checkout volta a validar
+tudo na DB no momento de gravar o pedido.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models import Produto, Categoria
+
+
+class ProdutoSnapshot:
+    """Cópia leve (só leitura) dos campos de um Produto usados no carrinho."""
+    __slots__ = ('id', 'nome', 'preco', 'disponivel', 'imagem_url')
+
+    def __init__(self, id, nome, preco, disponivel, imagem_url):
+        self.id = id
+        self.nome = nome
+        self.preco = preco
+        self.disponivel = disponivel
+        self.imagem_url = imagem_url
+
+
+# restaurante_id -> (instante_de_carga, {produto_id: ProdutoSnapshot})
+_catalogos = {}
+_lock = threading.Lock()
+
+
+def get_catalog(restaurante_id):
+    """
+    Devolve o catálogo {produto_id: ProdutoSnapshot} de um restaurante,
+    carregando-o da DB (uma única query) se não estiver em cache ou se expirou.
+    """
+    ttl = current_app.config.get('CATALOG_CACHE_TTL', 60)
+    entrada = _catalogos.get(restaurante_id)
+    if entrada and time.monotonic() - entrada[0] < ttl:
+        return entrada[1]
+
+    linhas = Produto.query.with_entities(
+        Produto.id, Produto.nome, Produto.preco, Produto.disponivel, Produto.imagem_url
+    ).filter_by(restaurante_id=restaurante_id).all()
+    catalogo = {linha.id: ProdutoSnapshot(*linha) for linha in linhas}
+
+    with _lock:
+        _catalogos[restaurante_id] = (time.monotonic(), catalogo)
+    return catalogo
+
+
+def invalidate_catalog(restaurante_id=None):
+    """Remove um restaurante da cache (ou todos, se restaurante_id for None)."""
+    with _lock:
+        if restaurante_id is None:
+            _catalogos.clear()
+        else:
+            _catalogos.pop(restaurante_id, None)
+
+
+def resolve_cart(cart):
+    """
+    Converte o carrinho da session em linhas prontas a mostrar, usando a cache.
+
+    Ignora produtos que já não pertencem ao restaurante do carrinho ou que
+    estão indisponíveis.
+
+    :return: Tuplo (itens, total, ids_invalidos). 'itens' é uma lista de
+             dicionários (id, nome, preco, quantidade, subtotal, imagem).
+    """
+    itens = []
+    total = 0.0
+    invalidos = []
+    if not cart.get('items') or cart.get('restaurant_id') is None:
+        return itens, total, invalidos
+
+    catalogo = get_catalog(cart['restaurant_id'])
+    for product_id_str, quantidade in cart['items'].items():
+        p = catalogo.get(int(product_id_str))
+        if p is None or not p.disponivel:
+            invalidos.append(product_id_str)
+            continue
+        subtotal = p.preco * quantidade
+        itens.append({
+            'id': p.id,
+            'nome': p.nome,
+            'preco': p.preco,
+            'quantidade': quantidade,
+            'subtotal': subtotal,
+            'imagem': p.imagem_url
+        })
+        total += subtotal
+    return itens, total, invalidos
+
+
+# --- Invalidação automática (edições do cardápio) ---
+# Guardamos os restaurantes afetados durante o flush e só invalidamos
+# depois do commit, para que nenhum pedido concorrente volte a colocar
+# em cache dados que ainda não foram gravados.
+
+@event.listens_for(Session, 'after_flush')
+def _registar_produtos_alterados(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        # (Apagar uma Categoria apaga os seus produtos em cascata)
+        if isinstance(obj, (Produto, Categoria)) and obj.restaurante_id is not None:
+            session.info.setdefault('catalogos_alterados', set()).add(obj.restaurante_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    for restaurante_id in session.info.pop('catalogos_alterados', ()):
+        invalidate_catalog(restaurante_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_apos_rollback(session):
+    session.info.pop('catalogos_alterados', None)
@@ -0,0 +1,131 @@
+"""
+Serviço de Perfis de Deploy (sync, gthread, gevent)
+
+O tamanho certo do pool de ligações à DB depende de quantos pedidos cada
+worker do gunicorn atende ao mesmo tempo:
+
+    sync     1 pedido por worker       -> pool pequeno (pedido + threads de background)
+    gthread  N threads por worker      -> pool = threads (+ background), overflow curto
+    gevent   centenas de greenlets     -> pool maior, mas limitado; os restantes esperam
+                                          (pool_timeout) em vez de esgotar o Postgres
+
+DEPLOY_PROFILE escolhe o perfil; DB_POOL_SIZE/DB_MAX_OVERFLOW/GUNICORN_THREADS
+sobrepõem-se aos valores do perfil. O gunicorn.conf.py usa o mesmo perfil
+para escolher o worker_class.
+
+Com PGBOUNCER=true (modo 'transaction'), a app não mantém pool próprio
+(NullPool: o PgBouncer é o pool), não usa prepared statements do lado do
+servidor e aplica o statement_timeout com SET LOCAL em cada transação
+(o PgBouncer não aceita o parâmetro 'options' no arranque da ligação).
+
+Com gevent, os pools de background (imagens, faturas, bcrypt) usam threads
+nativas (gevent.threadpool), para o trabalho de CPU não bloquear o hub.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+# Threads de background que também usam a DB (imagens e faturas)
+LIGACOES_BACKGROUND = 2
+
+PERFIS = {
+    'sync': {'worker_class': 'sync', 'threads': 1, 'pool_size': None, 'max_overflow': 2},
+    'gthread': {'worker_class': 'gthread', 'threads': 8, 'pool_size': None, 'max_overflow': 4},
+    'gevent': {'worker_class': 'gevent', 'worker_connections': 200, 'pool_size': 10, 'max_overflow': 20},
+}
+
+
+def get_profile(nome):
+    """Devolve o perfil (dict); lança ValueError se o nome não existir."""
+    try:
+        return PERFIS[nome]
+    except KeyError:
+        raise ValueError(f"DEPLOY_PROFILE inválido: {nome!r} (use {', '.join(PERFIS)})")
+
+
+def gunicorn_settings(nome, threads=None):
+    """Definições do gunicorn para o perfil (usado pelo gunicorn.conf.py)."""
+    perfil = get_profile(nome)
+    definicoes = {'worker_class': perfil['worker_class']}
+    if perfil['worker_class'] == 'gevent':
+        definicoes['worker_connections'] = perfil['worker_connections']
+    else:
+        definicoes['threads'] = threads or perfil['threads']
+    return definicoes
+
+
+def engine_options(config):
+    """
+    Calcula o SQLALCHEMY_ENGINE_OPTIONS para o perfil e a base de dados.
+
+    :param config: app.config (ou qualquer dict com as mesmas chaves)
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return {}  # SQLite (dev/testes): os pools por omissão do SQLAlchemy servem
+
+    perfil = get_profile(config.get('DEPLOY_PROFILE', 'sync'))
+    opcoes, connect_args = {}, {}
+
+    if config.get('PGBOUNCER'):
+        opcoes['poolclass'] = NullPool
+        if url.get_driver_name() == 'psycopg':
+            connect_args['prepare_threshold'] = None  # psycopg 3: sem prepared statements
+    else:
+        threads = config.get('GUNICORN_THREADS') or perfil.get('threads', 1)
+        pool_size = config.get('DB_POOL_SIZE') or perfil['pool_size'] or threads + LIGACOES_BACKGROUND
+        max_overflow = config.get('DB_MAX_OVERFLOW')
+        opcoes.update({
+            'pool_size': pool_size,
+            'max_overflow': perfil['max_overflow'] if max_overflow is None else max_overflow,
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+        })
+        timeout = config.get('DB_STATEMENT_TIMEOUT_MS')
+        if timeout:
+            connect_args['options'] = f'-c statement_timeout={int(timeout)}'
+
+    if connect_args:
+        opcoes['connect_args'] = connect_args
+    return opcoes
+
+
+def configure_engine_options(app):
+    """Preenche o SQLALCHEMY_ENGINE_OPTIONS (antes do db.init_app), se não vier definido."""
+    if not app.config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+
+def install_statement_timeout(app, db):
+    """
+    Com PgBouncer, o statement_timeout é aplicado no início de cada transação
+    (SET LOCAL só vale até ao fim da transação, por isso é seguro no modo 'transaction').
+    """
+    timeout = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if not (app.config.get('PGBOUNCER') and timeout):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'postgresql':
+                continue
+
+            @event.listens_for(engine, 'begin')
+            def _statement_timeout(conn, timeout=int(timeout)):
+                conn.exec_driver_sql(f'SET LOCAL statement_timeout = {timeout}')
+
+
+def make_executor(max_workers, thread_name_prefix):
+    """
+    Pool de threads para trabalho em background. Com gevent (monkey patching),
+    as threads do 'threading' passam a ser greenlets, que bloqueiam o hub em
+    trabalho de CPU: nesse caso usa o pool de threads nativas do gevent.
+    """
+    if 'gevent.monkey' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
@@ -3,9 +3,13 @@ Serviço de E-mail
 
 Centraliza a lógica de envio de e-mails usando o Flask-Mail.
 """
+import logging
 from src.extensions import mail
 from flask_mail import Message
 from flask import current_app, render_template
+from src.services.metrics_service import track_outbound
+
+logger = logging.getLogger(__name__)
 
 def send_email(subject, recipients, template_name, **kwargs):
     """
@@ -28,11 +32,12 @@ def send_email(subject, recipients, template_name, **kwargs):
         msg.html = render_template(f'email/{template_name}.html', **kwargs)
         
         # Envia o e-mail
-        mail.send(msg)
+        with track_outbound('smtp'):
+            mail.send(msg)
         
         return True
     
     except Exception as e:
         # Regista o erro (importante em produção)
-        print(f"Erro ao enviar e-mail: {e}")
+        logger.exception("Erro ao enviar e-mail", extra={'template': template_name})
         return False
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Serviço de Previsão de Entrega (ETA)
+
+Em vez do 'tempo_medio_entrega' escrito pelo dono, a previsão junta:
+
+1. A fila da cozinha: quantos pedidos 'Recebido' / 'Em Preparo' cada
+   restaurante tem agora. São contadores em memória (um dict por worker),
+   lidos da DB com um só GROUP BY a cada ETA_QUEUE_TTL segundos e
+   atualizados entre leituras pelas mudanças de status que este worker
+   faz (eventos do SQLAlchemy, como no order_history_service).
+2. O histórico: a mediana de cada etapa (aceite, preparo, entrega) dos
+   últimos ETA_HISTORY_DAYS dias (ver order_history_service). Ler o
+   histórico é caro, por isso as medianas são pré-calculadas na tabela
+   TempoEtapa, a cada ETA_REFRESH_INTERVAL segundos, por uma thread de
+   background (num só processo de cada vez, como o ranking) ou com
+   'flask eta-rebuild'. Os workers só releem essa tabela (pequena) a cada
+   ETA_HISTORY_TTL segundos: uma thread relê, as outras continuam a usar
+   o modelo anterior.
+
+    ETA = aceite + preparo + entrega + fila * preparo / ETA_KITCHEN_SLOTS
+
+Restaurantes com menos de ETA_MIN_SAMPLES pedidos no histórico usam o
+'tempo_medio_entrega' como base (mais a fila, com o preparo médio de
+todos os restaurantes). Cada previsão é só aritmética sobre dicts em
+memória (microssegundos, sem queries), por isso pode ir em todas as
+páginas: início, cardápio, checkout e acompanhamento do pedido.
+"""
+import datetime
+import logging
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+from src.extensions import db
+from src.models import Pedido, TempoEtapa
+from src.services.order_history_service import stage_percentiles
+from src.services.job_lock_service import job_lock
+
+logger = logging.getLogger(__name__)
+
+LOCK_TEMPOS = 'tempos_etapa'
+
+FILA = ('Recebido', 'Em Preparo')
+# Etapas que ainda faltam, consoante o status atual do pedido
+ETAPAS_EM_FALTA = {
+    'Pendente de Pagamento': ('aceite', 'preparo', 'entrega'),
+    'Recebido': ('aceite', 'preparo', 'entrega'),
+    'Em Preparo': ('preparo', 'entrega'),
+    'Em Rota de Entrega': ('entrega',),
+}
+
+
+class EtaModel:
+    """Filas e medianas de um worker (as filas mudam; o histórico é só de leitura)."""
+    __slots__ = ('fila', 'medianas', 'global_', 'fila_lida_em', 'criado_em')
+
+    def __init__(self, medianas, global_):
+        self.fila = {}              # {restaurante_id: pedidos na cozinha}
+        self.medianas = medianas    # {restaurante_id: {etapa: segundos}}
+        self.global_ = global_      # {etapa: segundos} (todos os restaurantes)
+        self.fila_lida_em = float('-inf')  # Ainda não lidas
+        self.criado_em = time.monotonic()
+
+    def predict(self, restaurante_id, tempo_medio_entrega=None, etapas=ETAPAS_EM_FALTA['Recebido'],
+                a_frente=None):
+        """
+        Previsão (segundos) até à entrega.
+
+        :param etapas: etapas que faltam (ver ETAPAS_EM_FALTA)
+        :param a_frente: pedidos à frente na cozinha (por omissão, a fila inteira)
+        :return: segundos, ou None sem histórico nem tempo_medio_entrega
+        """
+        medianas = self.medianas.get(restaurante_id)
+        preparo = (medianas or self.global_).get('preparo')
+        fila = self.fila.get(restaurante_id, 0) if a_frente is None else a_frente
+        espera = fila * preparo / current_app.config.get('ETA_KITCHEN_SLOTS', 4) if preparo else 0
+        if 'preparo' not in etapas:
+            espera = 0  # Já saiu da cozinha
+
+        if medianas:
+            return sum(medianas.get(etapa, self.global_.get(etapa, 0)) for etapa in etapas) + espera
+        if tempo_medio_entrega is None:
+            return None
+        # Sem histórico suficiente: o tempo do dono, na proporção das etapas que faltam
+        total = sum(self.global_.get(etapa, 0) for etapa in ETAPAS_EM_FALTA['Recebido'])
+        parte = sum(self.global_.get(etapa, 0) for etapa in etapas) / total if total else 1
+        return tempo_medio_entrega * 60 * parte + espera
+
+
+# --- Histórico (medianas pré-calculadas em TempoEtapa) ---
+
+def recompute_stage_times():
+    """
+    Recalcula as medianas de todos os restaurantes a partir do histórico
+    (substitui a tabela numa só transação, como o recompute_rankings).
+
+    :return: número de linhas (restaurante, etapa) gravadas.
+    """
+    # Um processo de cada vez (libertado no commit, no fim)
+    job_lock(LOCK_TEMPOS)
+    agora = datetime.datetime.utcnow()
+    desde = agora - datetime.timedelta(days=current_app.config.get('ETA_HISTORY_DAYS', 14))
+
+    linhas = [
+        {'restaurante_id': rid, 'etapa': etapa, 'mediana': linha['p50'],
+         'amostras': linha['n'], 'atualizado_em': agora}
+        for rid, etapas in stage_percentiles(desde=desde, percentis=(50,)).items()
+        for etapa, linha in etapas.items()
+    ]
+    TempoEtapa.query.delete(synchronize_session=False)
+    if linhas:
+        db.session.execute(TempoEtapa.__table__.insert(), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def refresh_stage_times_if_stale(intervalo):
+    """
+    Versão de recompute_stage_times() para as threads dos workers: se outro
+    processo já está a recalcular, ou as medianas têm menos de 'intervalo'
+    segundos, não faz nada.
+
+    :return: número de linhas gravadas, ou None se não recalculou.
+    """
+    if not job_lock(LOCK_TEMPOS, esperar=False):
+        db.session.rollback()
+        return None
+    ultimo = db.session.query(func.max(TempoEtapa.atualizado_em)).scalar()
+    # Margem de 10% para os workers que acordam pouco depois de outro ter recalculado
+    if ultimo and (datetime.datetime.utcnow() - ultimo).total_seconds() < intervalo * 0.9:
+        db.session.rollback()
+        return None
+    return recompute_stage_times()
+
+
+def start_eta_refresher(app):
+    """
+    Arranca uma thread (daemon) que corre refresh_stage_times_if_stale() a
+    cada ETA_REFRESH_INTERVAL segundos. Com intervalo 0, não faz nada (ex:
+    para correr só 'flask eta-rebuild' a partir de um cron).
+    """
+    intervalo = app.config.get('ETA_REFRESH_INTERVAL', 0)
+    if not intervalo:
+        return None
+
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo):
+            with app.app_context():
+                try:
+                    refresh_stage_times_if_stale(intervalo)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Erro ao recalcular os tempos por etapa")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=_loop, name='eta-refresher', daemon=True)
+    thread.start()
+    return parar
+
+
+def _ler_medianas():
+    """Medianas por restaurante (só com amostras suficientes) e de todos os restaurantes."""
+    minimo = current_app.config.get('ETA_MIN_SAMPLES', 20)
+
+    por_restaurante, somas = {}, {}
+    for rid, etapa, mediana, n in db.session.query(
+            TempoEtapa.restaurante_id, TempoEtapa.etapa, TempoEtapa.mediana, TempoEtapa.amostras):
+        por_restaurante.setdefault(rid, {})[etapa] = (mediana, n)
+        soma, total = somas.get(etapa, (0.0, 0))
+        somas[etapa] = (soma + mediana * n, total + n)
+
+    medianas = {
+        rid: {etapa: mediana for etapa, (mediana, _) in etapas.items()}
+        for rid, etapas in por_restaurante.items()
+        if all(etapas.get(etapa, (0, 0))[1] >= minimo for etapa in ETAPAS_EM_FALTA['Recebido'])
+    }
+    # Média das medianas, pesada pelo número de pedidos
+    global_ = {etapa: soma / n for etapa, (soma, n) in somas.items() if n}
+    return medianas, global_
+
+
+def _ler_filas():
+    return dict(db.session.query(Pedido.restaurante_id, func.count(Pedido.id))
+                .filter(Pedido.status.in_(FILA)).group_by(Pedido.restaurante_id))
+
+
+_modelo = None
+_lock = threading.Lock()     # Alterações ao _modelo e às filas
+_recarga = threading.Lock()  # Uma só thread relê a DB de cada vez
+
+
+def get_model():
+    """
+    Modelo deste worker (medianas a cada ETA_HISTORY_TTL, filas a cada
+    ETA_QUEUE_TTL segundos). Enquanto uma thread relê, as outras usam o
+    modelo atual; só a primeira leitura do worker espera.
+    """
+    global _modelo
+    config = current_app.config
+    modelo = _modelo
+    agora = time.monotonic()
+    medianas_velhas = modelo is None or agora - modelo.criado_em >= config.get('ETA_HISTORY_TTL', 120)
+    filas_velhas = modelo is None or agora - modelo.fila_lida_em >= config.get('ETA_QUEUE_TTL', 30)
+    if not (medianas_velhas or filas_velhas) or not _recarga.acquire(blocking=modelo is None):
+        return modelo
+
+    try:
+        if _modelo is not modelo:
+            return _modelo  # Outra thread releu entretanto
+        if medianas_velhas:
+            novo = EtaModel(*_ler_medianas())
+            if modelo is not None:
+                novo.fila, novo.fila_lida_em = modelo.fila, modelo.fila_lida_em
+            with _lock:
+                _modelo = modelo = novo
+        if agora - modelo.fila_lida_em >= config.get('ETA_QUEUE_TTL', 30):
+            fila = _ler_filas()
+            with _lock:
+                modelo.fila, modelo.fila_lida_em = fila, time.monotonic()
+        return modelo
+    finally:
+        _recarga.release()
+
+
+def _minutos(segundos):
+    return None if segundos is None else max(1, round(segundos / 60))
+
+
+def restaurant_eta(restaurante):
+    """Previsão (minutos) de um pedido feito agora neste restaurante."""
+    return _minutos(get_model().predict(restaurante.id, restaurante.tempo_medio_entrega))
+
+
+def restaurant_etas(restaurantes):
+    """{restaurante_id: minutos} para uma lista de restaurantes (ex: uma página do início)."""
+    modelo = get_model()
+    return {r.id: _minutos(modelo.predict(r.id, r.tempo_medio_entrega)) for r in restaurantes}
+
+
+def order_eta(pedido):
+    """
+    Minutos que faltam até à entrega de um pedido (None se já terminou).
+
+    Um pedido 'Recebido' conta como estando a meio da fila (não sabemos
+    quantos dos outros chegaram antes dele sem ir à DB).
+    """
+    etapas = ETAPAS_EM_FALTA.get(pedido.status)
+    if etapas is None:
+        return None
+    modelo = get_model()
+    a_frente = None
+    if pedido.status in FILA:
+        a_frente = max(0, modelo.fila.get(pedido.restaurante_id, 1) - 1) / 2
+    restaurante = pedido.restaurante
+    return _minutos(modelo.predict(restaurante.id, restaurante.tempo_medio_entrega, etapas, a_frente))
+
+
+# --- Contadores da fila (mudanças de status feitas por este worker) ---
+# Como no catalog_service: registamos no flush, aplicamos depois do commit.
+
+@event.listens_for(Session, 'after_flush')
+def _registar_fila(session, flush_context):
+    deltas = session.info.get('eta_fila', {})
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Pedido):
+            continue
+        historico = attributes.get_history(obj, 'status')
+        if not historico.added:
+            continue
+        entrou = historico.added[0] in FILA
+        saiu = bool(historico.deleted) and historico.deleted[0] in FILA
+        if entrou != saiu:
+            deltas[obj.restaurante_id] = deltas.get(obj.restaurante_id, 0) + (1 if entrou else -1)
+    if deltas:
+        session.info['eta_fila'] = deltas
+
+
+@event.listens_for(Session, 'after_commit')
+def _atualizar_fila(session):
+    deltas = session.info.pop('eta_fila', None)
+    modelo = _modelo
+    if not deltas or modelo is None:
+        return
+    with _lock:
+        fila = dict(modelo.fila)
+        for rid, delta in deltas.items():
+            fila[rid] = max(0, fila.get(rid, 0) + delta)
+        modelo.fila = fila
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_fila(session):
+    session.info.pop('eta_fila', None)
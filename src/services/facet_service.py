@@ -0,0 +1,211 @@
+"""
+Serviço de Facetas (filtros da página inicial)
+
+Cada valor de cada faceta é um bitset sobre os ids dos restaurantes (um
+int do Python: o bit N ligado = o restaurante N tem esse valor):
+
+    cozinha   Pizza, Hamburguer, Japonesa, ... (pelas categorias do cardápio)
+    preco     $, $$, $$$ (preço médio dos produtos disponíveis)
+    nota      4+, 4.5+ (média das avaliações)
+    gratis    entrega grátis
+    aberto    aberto agora (horário de funcionamento, ver hours_service;
+              muda de minuto a minuto, por isso chega pronto a cada pedido)
+
+Filtrar é um AND entre facetas e um OR dentro da mesma faceta (ex: Pizza
+OU Japonesa, E entrega grátis). As contagens de cada valor são calculadas
+com os filtros das OUTRAS facetas (assim, escolher "Pizza" não põe as
+restantes cozinhas a zero). Tudo com operações bit a bit, sem JOINs.
+
+O índice é construído com três queries (na DB principal, mesmo nas rotas
+@read_replica) e fica em memória em cada worker; é descartado depois de um
+commit que altere restaurantes, categorias, produtos ou avaliações (eventos
+do SQLAlchemy, como no catalog_service) e, para os outros workers, ao fim
+de FACET_INDEX_TTL segundos.
+"""
+import threading
+import time
+import unicodedata
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from src.extensions import db
+from src.models import Restaurante, Categoria, Produto, Avaliacao
+from src.services.replica_service import on_primary
+
+# Cozinha -> palavras procuradas nos nomes das categorias do cardápio
+COZINHAS = {
+    'Pizza': ('pizza',),
+    'Hamburguer': ('burger', 'hamburguer', 'lanche'),
+    'Japonesa': ('japones', 'sushi', 'temaki', 'combinado', 'sashimi'),
+    'Saudável': ('saudave', 'salada', 'wrap', 'bowl', 'poke'),
+    'Doces': ('doce', 'bolo', 'sorvete', 'sobremesa', 'acai'),
+    'Bebidas': ('bebida', 'cerveja', 'vinho', 'suco', 'cafe'),
+}
+# (valor, mínimo, máximo) do preço médio dos produtos
+FAIXAS_PRECO = (('$', 0, 25), ('$$', 25, 50), ('$$$', 50, float('inf')))
+# (valor, nota mínima)
+NOTAS_MINIMAS = (('4.5', 4.5), ('4', 4.0))
+
+FACETAS = ('cozinha', 'preco', 'nota', 'gratis', 'aberto')
+
+
+def _normalizar(texto):
+    """'Hambúrgueres' -> 'hamburgueres' (sem acentos, minúsculas)."""
+    sem_acentos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+    return sem_acentos.casefold()
+
+
+def bitset_ids(bitset):
+    """Lista dos ids (bits ligados) de um bitset, por ordem crescente."""
+    return [i for i, bit in enumerate(reversed(bin(bitset)[2:])) if bit == '1']
+
+
+class FacetIndex:
+    """Bitsets de todas as facetas (só leitura depois de construído)."""
+    __slots__ = ('universo', 'bitsets', 'criado_em')
+
+    def __init__(self, universo, bitsets):
+        self.universo = universo
+        self.bitsets = bitsets  # {faceta: {valor: bitset}}
+        self.criado_em = time.monotonic()
+
+    def select(self, selecao, dinamicas=None):
+        """
+        Aplica os filtros escolhidos.
+
+        :param selecao: {faceta: [valores]} (ver parse_selection)
+        :param dinamicas: bitsets calculados no momento, ex: {'aberto': {'1': bitset}}
+        :return: (bitset dos restaurantes que passam, {faceta: {valor: contagem}})
+        """
+        bitsets = {**self.bitsets, **(dinamicas or {})}
+
+        # 1. Máscara de cada faceta escolhida (OU entre os valores)
+        mascaras = {}
+        for faceta, valores in selecao.items():
+            mascara = 0
+            for valor in valores:
+                mascara |= bitsets.get(faceta, {}).get(valor, 0)
+            mascaras[faceta] = mascara
+
+        # 2. Resultado: E entre as facetas
+        resultado = self.universo
+        for mascara in mascaras.values():
+            resultado &= mascara
+
+        # 3. Contagens: cada faceta com os filtros das outras
+        contagens = {}
+        for faceta, valores in bitsets.items():
+            base = self.universo
+            for outra, mascara in mascaras.items():
+                if outra != faceta:
+                    base &= mascara
+            contagens[faceta] = {valor: bin(bits & base).count('1') for valor, bits in valores.items()}
+        return resultado, contagens
+
+
+def build_index():
+    """Constrói o índice a partir da DB (três queries)."""
+    bitsets = {}  # 'aberto' fica de fora: é dinâmica (ver select)
+    cozinhas = bitsets['cozinha'] = {nome: 0 for nome in COZINHAS}
+    precos = bitsets['preco'] = {valor: 0 for valor, _, _ in FAIXAS_PRECO}
+    notas = bitsets['nota'] = {valor: 0 for valor, _ in NOTAS_MINIMAS}
+    universo = gratis = 0
+
+    # 1. Dados do próprio restaurante
+    for rid, taxa, soma, qtd in db.session.query(
+            Restaurante.id, Restaurante.taxa_entrega,
+            Restaurante.avaliacoes_soma, Restaurante.avaliacoes_qtd):
+        bit = 1 << rid
+        universo |= bit
+        if taxa == 0:
+            gratis |= bit
+        if qtd:
+            for valor, minimo in NOTAS_MINIMAS:
+                if soma / qtd >= minimo:
+                    notas[valor] |= bit
+    bitsets['gratis'] = {'1': gratis}
+
+    # 2. Cozinhas (pelas categorias do cardápio)
+    for rid, nome in db.session.query(Categoria.restaurante_id, Categoria.nome).distinct():
+        nome = _normalizar(nome)
+        for cozinha, palavras in COZINHAS.items():
+            if any(palavra in nome for palavra in palavras):
+                cozinhas[cozinha] |= 1 << rid
+
+    # 3. Faixa de preço (preço médio dos produtos disponíveis)
+    for rid, media in (db.session.query(Produto.restaurante_id, func.avg(Produto.preco))
+                       .filter(Produto.disponivel == True).group_by(Produto.restaurante_id)):
+        for valor, minimo, maximo in FAIXAS_PRECO:
+            if minimo <= media < maximo:
+                precos[valor] |= 1 << rid
+                break
+
+    return FacetIndex(universo, bitsets)
+
+
+_indice = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Índice deste worker (reconstruído se foi invalidado ou passou do FACET_INDEX_TTL).
+    É sempre construído na principal: uma réplica atrasada logo depois da
+    invalidação deixaria o índice antigo em cache até ao fim do TTL.
+    """
+    global _indice
+    indice = _indice
+    ttl = current_app.config.get('FACET_INDEX_TTL', 60)
+    if indice is None or time.monotonic() - indice.criado_em >= ttl:
+        with on_primary():
+            indice = build_index()
+        with _lock:
+            _indice = indice
+    return indice
+
+
+def invalidate_index():
+    global _indice
+    with _lock:
+        _indice = None
+
+
+def parse_selection(args):
+    """
+    Lê os filtros do query string (ex: ?cozinha=Pizza&cozinha=Doces&gratis=1).
+
+    :param args: request.args
+    :return: {faceta: [valores]}, só com as facetas escolhidas
+    """
+    selecao = {}
+    for faceta in FACETAS:
+        valores = [v for v in args.getlist(faceta) if v]
+        if valores:
+            selecao[faceta] = valores
+    return selecao
+
+
+# --- Invalidação automática (restaurantes, cardápios e avaliações) ---
+# Como no catalog_service: registamos no flush, descartamos depois do commit.
+# Avaliacao: o record_review atualiza a nota do Restaurante com um UPDATE em
+# bloco, que não marca o objeto como alterado; a nova avaliação, essa, passa aqui.
+FACETAS_DEPENDEM_DE = (Restaurante, Categoria, Produto, Avaliacao)
+
+
+@event.listens_for(Session, 'after_flush')
+def _registar_alteracoes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, FACETAS_DEPENDEM_DE):
+            session.info['facetas_alteradas'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    if session.info.pop('facetas_alteradas', False):
+        invalidate_index()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_alteracoes(session):
+    session.info.pop('facetas_alteradas', None)
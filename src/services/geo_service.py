@@ -4,9 +4,13 @@ Serviço de Geolocalização
 Contém a lógica matemática para calcular distâncias geográficas e 
 chamar a API de Geocoding.
 """
+import logging
 import math
 import requests # Necessário para fazer chamadas HTTP à API
 from flask import current_app # Necessário para ler a chave API da app.config
+from src.services.metrics_service import track_outbound
+
+logger = logging.getLogger(__name__)
 
 # Raio médio da Terra em quilómetros
 R = 6371 
@@ -48,7 +52,7 @@ def get_coordinates(address):
     api_key = current_app.config.get('OPENCAGE_API_KEY')
     if not api_key:
         # Se esta mensagem aparecer, a chave não está no .env ou config.py
-        print("ERRO: Chave OPENCAGE_API_KEY não configurada.")
+        logger.error("Chave OPENCAGE_API_KEY não configurada.")
         return None, None
         
     base_url = "https://api.opencagedata.com/geocode/v1/json"
@@ -60,7 +64,9 @@ def get_coordinates(address):
     }
     
     try:
-        response = requests.get(base_url, params=params)
+        with track_outbound('opencage'):
+            response = requests.get(base_url, params=params,
+                                    timeout=current_app.config.get('OUTBOUND_TIMEOUT', 10))
         response.raise_for_status() # Lança um erro para status 4xx/5xx
         data = response.json()
         
@@ -70,6 +76,6 @@ def get_coordinates(address):
             return location['lat'], location['lng']
         
     except requests.exceptions.RequestException as e:
-        print(f"Erro ao chamar API OpenCage Geocoding: {e}")
+        logger.warning("Erro ao chamar API OpenCage Geocoding: %s", e)
         
     return None, None
\ No newline at end of file
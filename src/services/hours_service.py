@@ -0,0 +1,229 @@
+"""
+Serviço de Horários ("aberto agora")
+
+O horário semanal e as exceções (feriados) de cada restaurante são
+compilados numa tabela compacta, em minutos:
+
+- semana: array('H') com as fronteiras dos intervalos em minutos desde
+  segunda 00:00, ex: [660, 900, 1080, 1380, ...] = seg 11:00-15:00,
+  seg 18:00-23:00, ... (intervalos que passam da meia-noite, ou de
+  domingo para segunda, são partidos em dois);
+- exceções: {data: array('H')} com as fronteiras em minutos desde as
+  00:00 desse dia (vazio = fechado o dia todo).
+
+Aberto no minuto m <=> bisect_right(fronteiras, m) é ímpar. "Quem está
+aberto agora" é um bisect por restaurante (sem datetimes por linha), e o
+resultado (um bitset, como no facet_service) fica guardado até mudar o
+minuto. Um restaurante sem horário semanal está aberto a semana toda, e
+'ativo' continua a ser o interruptor manual (desligado = fechado).
+
+A tabela fica em memória em cada worker; é descartada depois de um commit
+que altere horários, exceções ou restaurantes (também com Query.delete()
+e Query.update()) e, para os outros workers,
+ao fim de HOURS_TABLE_TTL segundos.
+"""
+import datetime
+import threading
+import time
+from array import array
+from bisect import bisect_right
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8 (ver requirements.txt)
+    from backports.zoneinfo import ZoneInfo
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.extensions import db
+from src.models import Restaurante, HorarioFuncionamento, ExcecaoHorario
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+SEMPRE_ABERTO = array('H', [0, MINUTOS_SEMANA])
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _fronteiras(intervalos):
+    """[(inicio, fim)] (em minutos, por qualquer ordem) -> array('H') ordenado e sem sobreposições."""
+    fronteiras = array('H')
+    for inicio, fim in sorted(intervalos):
+        if inicio >= fim:
+            continue
+        if fronteiras and inicio <= fronteiras[-1]:
+            fronteiras[-1] = max(fronteiras[-1], fim)  # Junta com o anterior
+        else:
+            fronteiras.extend((inicio, fim))
+    return fronteiras
+
+
+def compile_week(horarios):
+    """
+    :param horarios: [(dia_semana, abre, fecha)] (datetime.time)
+    :return: array('H') com as fronteiras em minutos desde segunda 00:00
+    """
+    intervalos = []
+    for dia, abre, fecha in horarios:
+        inicio = dia * MINUTOS_DIA + _minutos(abre)
+        fim = dia * MINUTOS_DIA + _minutos(fecha)
+        if fim <= inicio:
+            fim += MINUTOS_DIA  # Passa da meia-noite
+        if fim > MINUTOS_SEMANA:
+            # Domingo -> segunda: parte no fim da semana
+            intervalos += [(inicio, MINUTOS_SEMANA), (0, fim - MINUTOS_SEMANA)]
+        else:
+            intervalos.append((inicio, fim))
+    return _fronteiras(intervalos)
+
+
+def compile_day(fechado, abre, fecha):
+    """Fronteiras de uma exceção, em minutos desde as 00:00 (corta à meia-noite)."""
+    if fechado or abre is None or fecha is None:
+        return array('H')
+    fim = _minutos(fecha) if fecha > abre else MINUTOS_DIA
+    return _fronteiras([(_minutos(abre), fim)])
+
+
+def _aberto(fronteiras, minuto):
+    return bisect_right(fronteiras, minuto) % 2 == 1
+
+
+class HoursTable:
+    """Horários compilados de todos os restaurantes (só leitura depois de construída)."""
+    __slots__ = ('ativos', 'semana', 'excecoes', 'tem_horarios', 'criado_em', '_cache')
+
+    def __init__(self, ativos, semana, excecoes):
+        self.ativos = ativos        # [restaurante_id] com ativo=True
+        self.semana = semana        # {restaurante_id: array('H')}
+        self.excecoes = excecoes    # {restaurante_id: {data: array('H')}}
+        # Sem horários nem exceções, "aberto" é só o 'ativo' (e a DB pode ordenar por ele)
+        self.tem_horarios = bool(semana or excecoes)
+        self.criado_em = time.monotonic()
+        self._cache = (None, 0)     # (minuto, bitset dos abertos)
+
+    def is_open(self, restaurante_id, agora, ativo=True):
+        """
+        :param agora: datetime na hora local dos restaurantes (ver local_now)
+        """
+        if not ativo:
+            return False
+        excecao = self.excecoes.get(restaurante_id, {}).get(agora.date())
+        if excecao is not None:
+            return _aberto(excecao, agora.hour * 60 + agora.minute)
+        minuto = agora.weekday() * MINUTOS_DIA + agora.hour * 60 + agora.minute
+        return _aberto(self.semana.get(restaurante_id, SEMPRE_ABERTO), minuto)
+
+    def open_bitset(self, agora):
+        """Bitset (bit N = restaurante N) dos restaurantes abertos no minuto de 'agora'."""
+        chave = agora.replace(second=0, microsecond=0)
+        minuto, bitset = self._cache
+        if minuto == chave:
+            return bitset
+
+        data = agora.date()
+        minuto_dia = agora.hour * 60 + agora.minute
+        minuto_semana = agora.weekday() * MINUTOS_DIA + minuto_dia
+        semana, excecoes = self.semana, self.excecoes
+        bitset = 0
+        for rid in self.ativos:
+            excecao = excecoes[rid].get(data) if rid in excecoes else None
+            if excecao is not None:
+                aberto = bisect_right(excecao, minuto_dia) % 2
+            else:
+                aberto = bisect_right(semana.get(rid, SEMPRE_ABERTO), minuto_semana) % 2
+            if aberto:
+                bitset |= 1 << rid
+        self._cache = (chave, bitset)
+        return bitset
+
+
+def build_table(hoje=None):
+    """Constrói a tabela a partir da DB (três queries). As exceções passadas ficam de fora."""
+    hoje = hoje or local_now().date()
+    ativos = [rid for (rid,) in db.session.query(Restaurante.id).filter(Restaurante.ativo == True)]
+
+    por_restaurante = {}
+    for rid, dia, abre, fecha in db.session.query(
+            HorarioFuncionamento.restaurante_id, HorarioFuncionamento.dia_semana,
+            HorarioFuncionamento.abre, HorarioFuncionamento.fecha):
+        por_restaurante.setdefault(rid, []).append((dia, abre, fecha))
+    semana = {rid: compile_week(horarios) for rid, horarios in por_restaurante.items()}
+
+    excecoes = {}
+    for rid, data, fechado, abre, fecha in db.session.query(
+            ExcecaoHorario.restaurante_id, ExcecaoHorario.data, ExcecaoHorario.fechado,
+            ExcecaoHorario.abre, ExcecaoHorario.fecha).filter(ExcecaoHorario.data >= hoje):
+        excecoes.setdefault(rid, {})[data] = compile_day(fechado, abre, fecha)
+
+    return HoursTable(ativos, semana, excecoes)
+
+
+def local_now():
+    """Agora, no fuso horário dos restaurantes (RESTAURANT_TIMEZONE), sem tzinfo."""
+    fuso = ZoneInfo(current_app.config.get('RESTAURANT_TIMEZONE', 'America/Sao_Paulo'))
+    return datetime.datetime.now(fuso).replace(tzinfo=None)
+
+
+_tabela = None
+_lock = threading.Lock()
+
+
+def get_table():
+    """Tabela deste worker (reconstruída se foi invalidada ou passou do HOURS_TABLE_TTL)."""
+    global _tabela
+    tabela = _tabela
+    ttl = current_app.config.get('HOURS_TABLE_TTL', 60)
+    if tabela is None or time.monotonic() - tabela.criado_em >= ttl:
+        tabela = build_table()
+        with _lock:
+            _tabela = tabela
+    return tabela
+
+
+def invalidate_table():
+    global _tabela
+    with _lock:
+        _tabela = None
+
+
+def is_open_now(restaurante):
+    """O restaurante está a aceitar pedidos agora?"""
+    return get_table().is_open(restaurante.id, local_now(), ativo=restaurante.ativo)
+
+
+def open_now_bitset():
+    """Bitset dos restaurantes abertos agora (calculado no máximo uma vez por minuto)."""
+    return get_table().open_bitset(local_now())
+
+
+# --- Invalidação automática (horários e restaurantes) ---
+# Como no catalog_service: registamos no flush, descartamos depois do commit.
+
+@event.listens_for(Session, 'after_flush')
+def _registar_alteracoes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Restaurante, HorarioFuncionamento, ExcecaoHorario)):
+            session.info['horarios_alterados'] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _registar_alteracoes_em_massa(estado):
+    # Query.delete()/update() (ex: substituir o horário semanal) não passam pelo flush
+    if (estado.is_update or estado.is_delete) and any(
+            mapper.class_ in (Restaurante, HorarioFuncionamento, ExcecaoHorario)
+            for mapper in estado.all_mappers):
+        estado.session.info['horarios_alterados'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    if session.info.pop('horarios_alterados', False):
+        invalidate_table()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_alteracoes(session):
+    session.info.pop('horarios_alterados', None)
@@ -0,0 +1,228 @@
+"""
+Serviço de Imagens (fotos de produtos e logótipos)
+
+Substitui o envio síncrono do ficheiro original para o Cloudinary:
+
+1. No pedido HTTP: lê o ficheiro e calcula o SHA-256. Se a mesma imagem já
+   existe (Imagem.sha256), é reutilizada de imediato (deduplicação).
+   Senão, cria a Imagem em estado 'pendente' e agenda o processamento.
+   Uma Imagem em 'erro', ou 'pendente' há mais de IMAGE_PENDING_TIMEOUT
+   segundos (o worker que a tinha morreu), é reagendada com os bytes novos.
+2. Num pool de threads (o Pillow e o upload libertam o GIL): gera as
+   variantes 'thumb' e 'card' em WebP e JPEG, envia-as (Cloudinary ou
+   pasta local) e marca a Imagem como 'pronta'. Os produtos/restaurantes
+   que a usam ficam com imagem_url/logo_url apontando para a variante 'card'.
+
+Sem Cloudinary configurado (IMAGE_STORAGE=local), as variantes ficam em
+static/uploads e são servidas pelo próprio Flask.
+"""
+import datetime
+import hashlib
+import logging
+import os
+import threading
+from io import BytesIO
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.extensions import db
+from src.services.deploy_profile_service import make_executor
+from src.models import Imagem, Produto, Restaurante
+
+logger = logging.getLogger(__name__)
+
+# nome -> (largura máxima, altura máxima)
+VARIANTES = {
+    'thumb': (160, 160),
+    'card': (640, 480),
+}
+# formato -> (formato do Pillow, opções de gravação)
+FORMATOS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Pool de threads criado na primeira utilização dentro de cada processo."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = make_executor(current_app.config.get('IMAGE_WORKERS', 2), 'imagens')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def make_variants(dados):
+    """
+    Gera as variantes de uma imagem (bytes do ficheiro original).
+
+    :return: {variante: {formato: bytes}} e o tamanho (largura, altura) da 'card'.
+    """
+    # Só as threads de processamento precisam do Pillow (não o arranque do worker)
+    from PIL import Image, ImageOps
+    original = Image.open(BytesIO(dados))
+    # Para JPEG, o 'draft' descodifica logo numa resolução reduzida (muito mais rápido)
+    original.draft('RGB', VARIANTES['card'])
+    original = ImageOps.exif_transpose(original).convert('RGB')
+
+    resultado, tamanho_card = {}, None
+    for nome, limite in VARIANTES.items():
+        imagem = original.copy()
+        imagem.thumbnail(limite, Image.Resampling.LANCZOS)
+        if nome == 'card':
+            tamanho_card = imagem.size
+        resultado[nome] = {}
+        for formato, (pil_formato, opcoes) in FORMATOS.items():
+            saida = BytesIO()
+            imagem.save(saida, pil_formato, **opcoes)
+            resultado[nome][formato] = saida.getvalue()
+    return resultado, tamanho_card
+
+
+def _armazenamento(app):
+    modo = app.config.get('IMAGE_STORAGE')
+    if modo:
+        return modo
+    return 'cloudinary' if app.config.get('CLOUDINARY_CLOUD_NAME') else 'local'
+
+
+def _guardar_variante(app, sha256, variante, formato, dados):
+    """Envia uma variante e devolve o seu URL público."""
+    if _armazenamento(app) == 'cloudinary':
+        from src.services.upload_service import upload_bytes
+        return upload_bytes(dados, public_id=f'yummygo/{sha256}/{variante}', formato=formato)
+
+    pasta = os.path.join(app.static_folder, 'uploads', sha256[:2], sha256)
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, f'{variante}.{formato}')
+    temporario = f'{destino}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(dados)
+    os.replace(temporario, destino)
+    return f'{app.static_url_path}/uploads/{sha256[:2]}/{sha256}/{variante}.{formato}'
+
+
+def _processar(app, imagem_id, dados):
+    """Corre no pool: gera e envia as variantes e marca a Imagem como pronta."""
+    with app.app_context():
+        try:
+            imagem = db.session.get(Imagem, imagem_id)
+            variantes, (largura, altura) = make_variants(dados)
+            urls = {
+                nome: {formato: _guardar_variante(app, imagem.sha256, nome, formato, conteudo)
+                       for formato, conteudo in formatos.items()}
+                for nome, formatos in variantes.items()
+            }
+            imagem.urls, imagem.largura, imagem.altura = urls, largura, altura
+            imagem.estado = 'pronta'
+
+            # Quem usa esta imagem passa a ter o URL final (cache do catálogo
+            # e da identidade são invalidadas pelos eventos da sessão)
+            url_card = urls['card']['jpg']
+            for produto in Produto.query.filter_by(foto_imagem_id=imagem_id):
+                produto.imagem_url = url_card
+            for restaurante in Restaurante.query.filter_by(logo_imagem_id=imagem_id):
+                restaurante.logo_url = url_card
+            db.session.commit()
+            logger.info("Imagem processada", extra={'imagem_id': imagem_id, 'sha256': imagem.sha256})
+        except Exception:
+            db.session.rollback()
+            logger.exception("Erro ao processar imagem", extra={'imagem_id': imagem_id})
+            imagem = db.session.get(Imagem, imagem_id)
+            if imagem is not None:
+                imagem.estado = 'erro'
+                db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def _precisa_de_processar(imagem):
+    """True para as imagens em 'erro' ou 'pendente' há demasiado tempo."""
+    if imagem.estado == 'erro':
+        return True
+    if imagem.estado != 'pendente':
+        return False
+    desde = imagem.agendada_em or imagem.data_criacao
+    limite = datetime.timedelta(seconds=current_app.config.get('IMAGE_PENDING_TIMEOUT', 300))
+    return desde is None or datetime.datetime.utcnow() - desde > limite
+
+
+def submit_image(ficheiro):
+    """
+    Recebe o ficheiro carregado (FileStorage) e devolve a Imagem correspondente:
+    a já existente (mesmo conteúdo) ou uma nova em estado 'pendente', cujo
+    processamento fica agendado para depois do commit.
+
+    Não faz commit: quem chama associa a imagem ao produto/restaurante e
+    grava tudo junto.
+    """
+    dados = ficheiro.read()
+    sha256 = hashlib.sha256(dados).hexdigest()
+
+    imagem = Imagem.query.filter_by(sha256=sha256).first()
+    if imagem is not None and not _precisa_de_processar(imagem):
+        return imagem
+
+    if imagem is None:
+        imagem = Imagem(sha256=sha256, estado='pendente')
+        # O after_rollback dos serviços também corre no rollback de um savepoint:
+        # guardamos o que a transação (exterior) tinha registado até aqui
+        registos = dict(db.session.info)
+        try:
+            # Savepoint: se outro pedido criou a mesma imagem entretanto, só se desfaz isto
+            with db.session.begin_nested():
+                db.session.add(imagem)
+        except IntegrityError:
+            db.session.info.update(registos)
+            existente = Imagem.query.filter_by(sha256=sha256).first()
+            if existente is None:
+                raise  # Não foi o sha256 que falhou
+            return existente
+    else:
+        # Nova tentativa depois de um erro (ou de um worker que morreu)
+        imagem.estado = 'pendente'
+    imagem.agendada_em = datetime.datetime.utcnow()
+    db.session.flush()
+
+    # O processamento só arranca depois do commit (a Imagem tem de existir na DB)
+    db.session.info.setdefault('imagens_por_processar', []).append((imagem.id, dados))
+    return imagem
+
+
+def apply_image(alvo, imagem):
+    """Liga uma Imagem a um Produto ou Restaurante (URL só se já estiver pronta)."""
+    url = imagem.url('card') if imagem.pronta else None
+    if isinstance(alvo, Restaurante):
+        alvo.logo_imagem = imagem
+        if url:
+            alvo.logo_url = url
+    else:
+        alvo.foto_imagem = imagem
+        if url:
+            alvo.imagem_url = url
+
+
+# --- Agendamento após o commit ---
+
+@event.listens_for(Session, 'after_commit')
+def _agendar_apos_commit(session):
+    pendentes = session.info.pop('imagens_por_processar', None)
+    if not pendentes:
+        return
+    app = current_app._get_current_object()
+    for imagem_id, dados in pendentes:
+        futuro = _get_pool().submit(_processar, app, imagem_id, dados)
+        if not app.config.get('IMAGE_ASYNC', True):
+            futuro.result()  # Modo síncrono (ex: testes): espera pelo processamento
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_apos_rollback(session):
+    session.info.pop('imagens_por_processar', None)
@@ -0,0 +1,214 @@
+"""
+Serviço de Faturas (PDF)
+
+Depois de 'Concluído', um pedido nunca muda: a fatura é gerada UMA vez
+e reutilizada em todos os downloads.
+
+- Geração em background: quando o pedido é concluído, o PDF é gerado num
+  pool de threads (fora da thread do pedido HTTP).
+- Armazenamento por conteúdo: o PDF fica em INVOICE_DIR/<aa>/<sha256>.pdf
+  e o pedido guarda o hash (Pedido.fatura_sha256). O hash serve também de
+  ETag no download (send_file com suporte a Range e If-None-Match).
+- Exportação mensal: todas as faturas de um restaurante num mês, num ZIP;
+  os PDFs em falta são gerados num pool de processos (o xhtml2pdf é CPU).
+"""
+import datetime
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError  # Só é o TimeoutError a partir do 3.11
+from io import BytesIO
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload, selectinload
+from src.extensions import db
+from src.services.deploy_profile_service import make_executor
+from src.models import Pedido, ItemPedido
+
+logger = logging.getLogger(__name__)
+
+ESTADO_FINAL = 'Concluído'
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def html_to_pdf(html):
+    """
+    Converte o HTML da fatura em PDF (bytes). Função de topo de módulo,
+    para poder correr num processo do ProcessPoolExecutor.
+    """
+    from xhtml2pdf import pisa
+    resultado = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode('UTF-8')), resultado)
+    if pdf.err:
+        raise ValueError(f'xhtml2pdf devolveu {pdf.err} erro(s)')
+    return resultado.getvalue()
+
+
+def _pasta():
+    return current_app.config['INVOICE_DIR']
+
+
+def invoice_path(sha256):
+    """Caminho do PDF com este hash (as 2 primeiras letras fazem de subpasta)."""
+    return os.path.join(_pasta(), sha256[:2], f'{sha256}.pdf')
+
+
+def _query_faturas():
+    # Tudo o que o template usa, sem N+1 (itens, produtos, cliente, restaurante)
+    return Pedido.query.options(
+        selectinload(Pedido.itens).joinedload(ItemPedido.produto),
+        joinedload(Pedido.cliente),
+        joinedload(Pedido.restaurante),
+    )
+
+
+def render_invoice_html(pedido):
+    return render_template('invoice_pdf.html', pedido=pedido)
+
+
+def store_pdf(pdf):
+    """Grava o PDF pelo seu conteúdo (escrita atómica). Devolve o sha256."""
+    sha256 = hashlib.sha256(pdf).hexdigest()
+    destino = invoice_path(sha256)
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(pdf)
+        os.replace(temporario, destino)
+    return sha256
+
+
+def cached_invoice(pedido):
+    """Devolve o sha256 da fatura já gerada (se o ficheiro existir) ou None."""
+    if pedido.fatura_sha256 and os.path.exists(invoice_path(pedido.fatura_sha256)):
+        return pedido.fatura_sha256
+    return None
+
+
+def generate_invoice(pedido):
+    """
+    Gera a fatura do pedido. Se o pedido estiver concluído, grava-a e guarda
+    o hash no pedido (commit); caso contrário, devolve só o PDF (o estado
+    ainda pode mudar, por isso não se guarda).
+
+    :return: (sha256 ou None, bytes do PDF)
+    """
+    pdf = html_to_pdf(render_invoice_html(pedido))
+    if pedido.status != ESTADO_FINAL:
+        return None, pdf
+    sha256 = store_pdf(pdf)
+    pedido.fatura_sha256 = sha256
+    db.session.commit()
+    return sha256, pdf
+
+
+# --- Geração em background (quando o pedido é concluído) ---
+
+def _get_pool():
+    """Pool de threads criado na primeira utilização dentro de cada processo."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = make_executor(current_app.config.get('INVOICE_THREADS', 1), 'faturas')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _gerar_em_background(app, pedido_id):
+    with app.app_context():
+        try:
+            pedido = _query_faturas().filter(Pedido.id == pedido_id).first()
+            if pedido is not None and cached_invoice(pedido) is None:
+                generate_invoice(pedido)
+                logger.info("Fatura gerada", extra={'pedido_id': pedido_id})
+        except Exception:
+            db.session.rollback()
+            logger.exception("Erro ao gerar fatura", extra={'pedido_id': pedido_id})
+        finally:
+            db.session.remove()
+
+
+def schedule_invoice(pedido_id):
+    """Agenda a geração da fatura de um pedido concluído (não bloqueia)."""
+    app = current_app._get_current_object()
+    if app.config.get('INVOICE_ASYNC', True):
+        _get_pool().submit(_gerar_em_background, app, pedido_id)
+    else:
+        _gerar_em_background(app, pedido_id)
+
+
+# --- Exportação mensal (pool de processos) ---
+
+def export_month(restaurante_id, ano, mes):
+    """
+    Gera um ZIP com as faturas dos pedidos concluídos do restaurante no mês.
+    As faturas em falta são geradas num pool de processos e guardadas.
+
+    Corre dentro do pedido HTTP, por isso tem limites: com mais de
+    INVOICE_EXPORT_MAX faturas não gera nada; se gerar as que faltam passar
+    de INVOICE_EXPORT_TIMEOUT segundos, ou alguma falhar, guarda as que
+    ficaram prontas (a próxima tentativa continua daí) e não devolve o ZIP.
+
+    :return: (BytesIO com o ZIP ou None, número de faturas, faturas ainda por gerar)
+    """
+    inicio = datetime.datetime(ano, mes, 1)
+    fim = datetime.datetime(ano + (mes == 12), mes % 12 + 1, 1)
+    filtros = (
+        Pedido.restaurante_id == restaurante_id,
+        Pedido.status == ESTADO_FINAL,
+        Pedido.data_criacao >= inicio,
+        Pedido.data_criacao < fim,
+    )
+    total = Pedido.query.filter(*filtros).count()
+    if total > current_app.config.get('INVOICE_EXPORT_MAX', 2000):
+        return None, total, 0
+    pedidos = _query_faturas().filter(*filtros).order_by(Pedido.id).all()
+
+    # 1. O HTML (que precisa da DB e dos templates) é feito aqui;
+    #    só a conversão para PDF (CPU) vai para os processos
+    em_falta = [p for p in pedidos if cached_invoice(p) is None]
+    if em_falta:
+        htmls = [render_invoice_html(p) for p in em_falta]
+        processos = current_app.config.get('INVOICE_EXPORT_PROCESSES') or os.cpu_count() or 1
+        # 'spawn': processos novos e limpos (um fork de um worker com threads não é seguro)
+        contexto = multiprocessing.get_context('spawn')
+        pool = ProcessPoolExecutor(max_workers=min(processos, len(htmls)), mp_context=contexto)
+        futuros = {pool.submit(html_to_pdf, html): pedido for pedido, html in zip(em_falta, htmls)}
+        gerados = 0
+        try:
+            for futuro in as_completed(futuros, timeout=current_app.config.get('INVOICE_EXPORT_TIMEOUT', 20)):
+                pedido = futuros[futuro]
+                try:
+                    pedido.fatura_sha256 = store_pdf(futuro.result())
+                    gerados += 1
+                except Exception:
+                    # Uma fatura com erro fica em falta; as outras seguem
+                    logger.exception("Erro ao gerar fatura", extra={'pedido_id': pedido.id})
+        except FuturesTimeoutError:
+            logger.warning("Exportação de faturas interrompida por tempo",
+                           extra={'restaurante_id': restaurante_id, 'em_falta': len(em_falta) - gerados})
+        finally:
+            # Sem esperar pelos que ainda estão na fila (os que já estão a correr acabam sozinhos)
+            for futuro in futuros:
+                futuro.cancel()
+            pool.shutdown(wait=False)
+        # Regista sempre os PDFs já guardados (a próxima tentativa continua daí)
+        db.session.commit()
+        if gerados < len(em_falta):
+            return None, len(pedidos), len(em_falta) - gerados
+
+    # 2. ZIP com os ficheiros já guardados (os PDFs já vêm comprimidos)
+    arquivo = BytesIO()
+    with zipfile.ZipFile(arquivo, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for pedido in pedidos:
+            zf.write(invoice_path(pedido.fatura_sha256), f'Nota_Fiscal_{pedido.id}.pdf')
+    arquivo.seek(0)
+    return arquivo, len(pedidos), 0
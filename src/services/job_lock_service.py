@@ -0,0 +1,31 @@
+"""
+Serviço de Locks dos Jobs Periódicos (ranking, tempos por etapa...)
+
+Cada worker do gunicorn arranca as suas threads de background, por isso um
+job que reescreve uma tabela inteira correria N vezes em paralelo (e, no
+Postgres em READ COMMITTED, os DELETE+INSERT concorrentes chocam nas chaves
+primárias). Com job_lock, só um processo de cada vez faz o trabalho:
+
+- Postgres: pg_advisory_xact_lock, preso à transação atual da db.session
+  (libertado sozinho no commit/rollback, mesmo que o processo morra);
+- outras DBs (SQLite em desenvolvimento, um só processo): sem lock.
+"""
+import zlib
+from sqlalchemy import text
+from src.extensions import db
+
+
+def job_lock(nome, esperar=True):
+    """
+    Fica com o lock 'nome' até ao fim da transação atual.
+
+    :param esperar: False -> não bloqueia (devolve False se outro processo o tem)
+    :return: True se ficou com o lock
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    chave = zlib.crc32(nome.encode())  # Nome -> int (a chave dos advisory locks é um bigint)
+    if esperar:
+        db.session.execute(text('SELECT pg_advisory_xact_lock(:chave)'), {'chave': chave})
+        return True
+    return bool(db.session.execute(text('SELECT pg_try_advisory_xact_lock(:chave)'), {'chave': chave}).scalar())
@@ -0,0 +1,158 @@
+"""
+Serviço de Logging Estruturado
+
+Substitui os print() por logging com:
+- registos em JSON (uma linha por evento), fáceis de pesquisar e filtrar;
+- um ID de correlação por pedido HTTP (cabeçalho X-Request-ID, recebido
+  do proxy ou gerado aqui) e contexto extra, como o ID do pedido de comida
+  (ver bind_log_context);
+- escrita sem bloqueio: as threads dos pedidos só colocam o registo numa
+  fila (QueueHandler); uma thread dedicada (QueueListener) formata e
+  escreve no stdout.
+
+Uso nos módulos:
+    logger = logging.getLogger(__name__)
+    logger.error("Erro ao enviar SMS", extra={'destino': numero})
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import uuid
+from flask import g, has_request_context, request
+
+# Atributos standard de um LogRecord (o resto veio de 'extra=')
+_ATRIBUTOS_BASE = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registo como um objeto JSON numa linha."""
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_BASE and not chave.startswith('_'):
+                dados[chave] = valor
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento (com o ID de correlação)."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s')
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        return super().format(record)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Junta o contexto do pedido HTTP ao registo. Corre na thread que faz o
+    log (antes de ir para a fila), onde o 'g' do Flask ainda está acessível.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            for chave, valor in g.get('log_contexto', {}).items():
+                if not hasattr(record, chave):
+                    setattr(record, chave, valor)
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém os campos de 'extra' (o prepare() original só
+    guarda a mensagem já formatada) e a exceção formatada.
+    """
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def bind_log_context(**campos):
+    """
+    Acrescenta campos a todos os registos seguintes deste pedido HTTP
+    (ex: bind_log_context(pedido_id=pedido.id)).
+    """
+    if has_request_context():
+        g.log_contexto = {**g.get('log_contexto', {}), **campos}
+
+
+def _iniciar_listener(handler_saida):
+    global _listener
+    fila = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(fila, handler_saida, respect_handler_level=True)
+    _listener.start()
+    return fila
+
+
+def setup_logging(app):
+    """
+    Configura o logger raiz (uma única vez por processo) e o ID de correlação
+    dos pedidos HTTP.
+    """
+    nivel = app.config.get('LOG_LEVEL', 'INFO').upper()
+    raiz = logging.getLogger()
+
+    if _listener is None:
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(JsonFormatter() if app.config.get('LOG_FORMAT', 'json') == 'json' else TextFormatter())
+
+        handler = _QueueHandler(_iniciar_listener(saida))
+        handler.addFilter(ContextFilter())
+        for antigo in list(raiz.handlers):
+            raiz.removeHandler(antigo)
+        raiz.addHandler(handler)
+
+        # No fork (gunicorn), a thread do listener não passa para o processo
+        # filho: arrancamos outra, com uma fila nova
+        def _reiniciar_no_filho():
+            handler.queue = _iniciar_listener(saida)
+        os.register_at_fork(after_in_child=_reiniciar_no_filho)
+        # Escreve o que ainda estiver na fila ao terminar o processo
+        atexit.register(lambda: _listener.stop())
+
+    raiz.setLevel(nivel)
+    app.logger.setLevel(nivel)
+    # Os registos da app passam pelo logger raiz (e pela fila)
+    app.logger.handlers.clear()
+    app.logger.propagate = True
+
+    @app.before_request
+    def _atribuir_request_id():
+        recebido = request.headers.get('X-Request-ID', '')
+        g.request_id = recebido if _REQUEST_ID_VALIDO.match(recebido) else uuid.uuid4().hex
+
+    @app.after_request
+    def _devolver_request_id(response):
+        if g.get('request_id'):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
@@ -0,0 +1,386 @@
+"""
+Serviço de Métricas (formato Prometheus)
+
+Contadores e histogramas em memória, expostos em /metrics no formato de
+texto do Prometheus:
+- latência dos pedidos HTTP por blueprint/endpoint/método/estado;
+- tempo de cada query à DB;
+- latência das chamadas externas (Stripe, Twilio, SMTP, Cloudinary, OpenCage);
+- pedidos por estado (cada mudança de estado gravada na DB);
+- funil do checkout (carrinho -> checkout -> pagamento iniciado -> pago).
+
+Custo por pedido: uma atualização de dicionário sob um lock (sem I/O).
+
+Vários workers (gunicorn): com METRICS_MULTIPROC_DIR definido, cada processo
+grava periodicamente um snapshot em '<dir>/metricas_<pid>.json' (escrita
+atómica). O /metrics, seja qual for o worker que o serve, soma os snapshots
+de todos os processos. Quando um worker termina, o master (hook child_exit
+do gunicorn, ver retire_worker) soma o snapshot dele a 'metricas_retirados.json'
+e apaga-o: os contadores nunca andam para trás, a pasta não cresce com cada
+worker reciclado e um pid reutilizado começa um ficheiro novo.
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, request, current_app, abort, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+RETIRADOS = 'metricas_retirados.json'
+
+
+class Counter:
+    """Contador monótono com labels (valores passados por posição)."""
+
+    tipo = 'counter'
+
+    def __init__(self, nome, descricao, labels=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self.valores = {}   # (labels...) -> valor
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, n=1):
+        with self._lock:
+            self.valores[labels] = self.valores.get(labels, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), v] for k, v in self.valores.items()]
+
+    @staticmethod
+    def juntar(total, valor):
+        return (total or 0) + valor
+
+
+class Histogram:
+    """Histograma com buckets fixos (contagens não cumulativas internamente)."""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, labels=(), buckets=BUCKETS_HTTP):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.valores = {}   # (labels...) -> [contagem por bucket (+Inf no fim), soma]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, valor, *labels):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self.valores.get(labels)
+            if serie is None:
+                serie = self.valores[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), [list(v[0]), v[1]]] for k, v in self.valores.items()]
+
+    @staticmethod
+    def juntar(total, valor):
+        if total is None:
+            return [list(valor[0]), valor[1]]
+        return [[a + b for a, b in zip(total[0], valor[0])], total[1] + valor[1]]
+
+
+REGISTRY = []
+
+# --- Métricas da YummyGo ---
+
+HTTP_LATENCIA = Histogram(
+    'yummygo_http_request_duration_seconds', 'Duração dos pedidos HTTP.',
+    ('blueprint', 'endpoint', 'method', 'status'))
+DB_QUERY = Histogram(
+    'yummygo_db_query_duration_seconds', 'Duração de cada query à base de dados.',
+    buckets=BUCKETS_DB)
+EXTERNO_LATENCIA = Histogram(
+    'yummygo_outbound_request_duration_seconds', 'Duração das chamadas a serviços externos.',
+    ('service', 'outcome'))
+PEDIDOS_ESTADO = Counter(
+    'yummygo_orders_status_total', 'Pedidos que entraram em cada estado.', ('status',))
+CHECKOUT_FUNIL = Counter(
+    'yummygo_checkout_funnel_total', 'Etapas do funil de compra (carrinho, checkout, iniciado, pago).',
+    ('step',))
+
+
+@contextmanager
+def track_outbound(servico):
+    """
+    Mede uma chamada a um serviço externo:
+
+        with track_outbound('stripe'):
+            stripe.checkout.Session.create(...)
+    """
+    inicio = time.perf_counter()
+    resultado = 'erro'
+    try:
+        yield
+        resultado = 'ok'
+    finally:
+        EXTERNO_LATENCIA.observe(time.perf_counter() - inicio, servico, resultado)
+
+
+def track_checkout(etapa):
+    """Conta uma etapa do funil de compra."""
+    CHECKOUT_FUNIL.inc(etapa)
+
+
+# --- Exposição (formato de texto do Prometheus) ---
+
+def _formatar_labels(nomes, valores, extra=()):
+    pares = [f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+             for n, v in list(zip(nomes, valores)) + list(extra)]
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _somar(metrica, snapshots):
+    """{(labels...): valor} da métrica, somado em todos os snapshots."""
+    total = {}
+    for snapshot in snapshots:
+        for labels, valor in snapshot.get(metrica.nome, ()):
+            chave = tuple(labels)
+            total[chave] = metrica.juntar(total.get(chave), valor)
+    return total
+
+
+def render_metrics(snapshots):
+    """Gera o texto do /metrics a partir de uma lista de snapshots (um por processo)."""
+    linhas = []
+    for metrica in REGISTRY:
+        total = _somar(metrica, snapshots)
+
+        linhas.append(f'# HELP {metrica.nome} {metrica.descricao}')
+        linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+        for labels, valor in sorted(total.items()):
+            if metrica.tipo == 'counter':
+                linhas.append(f'{metrica.nome}{_formatar_labels(metrica.labels, labels)} {valor}')
+                continue
+            contagens, soma = valor
+            acumulado = 0
+            for limite, contagem in zip(list(metrica.buckets) + ['+Inf'], contagens):
+                acumulado += contagem
+                le = (('le', limite if limite == '+Inf' else repr(float(limite))),)
+                linhas.append(f'{metrica.nome}_bucket{_formatar_labels(metrica.labels, labels, le)} {acumulado}')
+            linhas.append(f'{metrica.nome}_sum{_formatar_labels(metrica.labels, labels)} {soma}')
+            linhas.append(f'{metrica.nome}_count{_formatar_labels(metrica.labels, labels)} {acumulado}')
+    return '\n'.join(linhas) + '\n'
+
+
+def local_snapshot():
+    return {metrica.nome: metrica.snapshot() for metrica in REGISTRY}
+
+
+def _ficheiro(pasta, pid):
+    return os.path.join(pasta, f'metricas_{pid}.json')
+
+
+def _gravar_json(destino, dados):
+    """
+    Escrita atómica (quem lê vê o ficheiro antigo ou o novo, nunca a meio).
+
+    Cada escrita usa o seu próprio temporário: a thread de gravação e o
+    /metrics podem gravar o mesmo ficheiro ao mesmo tempo.
+    """
+    pasta, nome = os.path.split(destino)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=f'.{nome}.', suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w') as f:
+            json.dump(dados, f)
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def _ler_json(caminho):
+    try:
+        with open(caminho) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def retire_worker(pasta, pid):
+    """
+    Chamar no master (hook child_exit do gunicorn) quando um worker termina:
+    soma o snapshot dele ao dos workers retirados e apaga-o.
+
+    Entre gravar os retirados e apagar o ficheiro do worker, o pid fica em
+    '_absorvidos' (quem lê nesse instante ignora o ficheiro, para não o
+    contar duas vezes). O master só cria o worker seguinte depois disto,
+    por isso o pid ainda não pode ter sido reutilizado.
+    """
+    origem = _ficheiro(pasta, pid)
+    morto = _ler_json(origem)
+    if morto is None:
+        return
+    destino = os.path.join(pasta, RETIRADOS)
+    retirados = _ler_json(destino) or {}
+
+    juntos = {}
+    for metrica in REGISTRY:
+        total = _somar(metrica, [retirados, morto])
+        juntos[metrica.nome] = [[list(labels), valor] for labels, valor in total.items()]
+    _gravar_json(destino, {**juntos, '_absorvidos': [pid]})
+    os.remove(origem)
+    _gravar_json(destino, juntos)
+
+
+class Metrics:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self.pasta = None
+        self.intervalo = 5
+        self._pid = None
+        self._lock = threading.Lock()
+        self._eventos_ligados = False
+
+    def init_app(self, app):
+        app.extensions['metrics'] = self
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.pasta = app.config.get('METRICS_MULTIPROC_DIR')
+        self.intervalo = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        if self.pasta:
+            os.makedirs(self.pasta, exist_ok=True)
+
+        if not self._eventos_ligados:
+            event.listen(Engine, 'before_cursor_execute', _antes_da_query)
+            event.listen(Engine, 'after_cursor_execute', _depois_da_query)
+            event.listen(Engine, 'handle_error', _erro_na_query)
+            self._eventos_ligados = True
+
+        app.before_request(self._iniciar_pedido)
+        app.after_request(self._terminar_pedido)
+        app.add_url_rule('/metrics', 'metrics', self._ver_metricas)
+
+    # --- Ciclo do pedido ---
+
+    def _iniciar_pedido(self):
+        g.metricas_inicio = time.perf_counter()
+        # Depois de um fork (gunicorn), cada worker arranca a sua thread de gravação
+        if self.pasta and self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._arrancar_gravacao()
+
+    def _terminar_pedido(self, response):
+        inicio = g.pop('metricas_inicio', None)
+        if inicio is not None and request.endpoint != 'metrics':
+            HTTP_LATENCIA.observe(
+                time.perf_counter() - inicio,
+                request.blueprint or '', request.endpoint or 'sem_endpoint',
+                request.method, str(response.status_code)
+            )
+        return response
+
+    def _ver_metricas(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(404)
+        snapshots = self._todos_os_snapshots() if self.pasta else [local_snapshot()]
+        return Response(render_metrics(snapshots), mimetype='text/plain; version=0.0.4')
+
+    # --- Vários processos ---
+
+    def gravar_snapshot(self):
+        """Grava o snapshot deste processo (escrita atómica)."""
+        if self.pasta:
+            _gravar_json(_ficheiro(self.pasta, os.getpid()), local_snapshot())
+
+    def _todos_os_snapshots(self):
+        self.gravar_snapshot()
+        retirados = _ler_json(os.path.join(self.pasta, RETIRADOS)) or {}
+        absorvidos = {_ficheiro(self.pasta, pid) for pid in retirados.get('_absorvidos', ())}
+        snapshots = [retirados]
+        for caminho in glob.glob(os.path.join(self.pasta, 'metricas_*.json')):
+            if caminho.endswith(RETIRADOS) or caminho in absorvidos:
+                continue
+            snapshot = _ler_json(caminho)
+            if snapshot is not None:  # None: o worker terminou neste instante
+                snapshots.append(snapshot)
+        return snapshots
+
+    def _arrancar_gravacao(self):
+        if self._pid is not None:
+            # Processo criado por fork de outro que já gravava: os valores
+            # herdados já estão no ficheiro do processo pai
+            for metrica in REGISTRY:
+                with metrica._lock:
+                    metrica.valores.clear()
+        self._pid = os.getpid()
+
+        def _loop():
+            while True:
+                time.sleep(self.intervalo)
+                try:
+                    self.gravar_snapshot()
+                except OSError as e:
+                    logger.warning("Erro ao gravar métricas: %s", e)
+
+        threading.Thread(target=_loop, name='metrics-flush', daemon=True).start()
+
+
+# --- Tempo das queries à DB ---
+
+def _antes_da_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_metricas', []).append(time.perf_counter())
+
+
+def _depois_da_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERY.observe(time.perf_counter() - conn.info['inicio_metricas'].pop())
+
+
+def _erro_na_query(contexto):
+    # Uma query que falha não chega ao after_cursor_execute: tira a hora de início da pilha
+    conn = contexto.connection
+    if conn is not None and conn.info.get('inicio_metricas'):
+        conn.info['inicio_metricas'].pop()
+
+
+# --- Pedidos por estado e pagamentos (contados só após o commit) ---
+
+@event.listens_for(Session, 'after_flush')
+def _registar_estados(session, flush_context):
+    # Importação tardia: este módulo é importado por extensions.py, antes dos modelos
+    from src.models import Pedido
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Pedido):
+            continue
+        historico = inspect(obj).attrs.status.history
+        if obj in session.new or historico.has_changes():
+            anterior = historico.deleted[0] if historico.deleted else None
+            session.info.setdefault('estados_pedidos', []).append((anterior, obj.status))
+
+
+@event.listens_for(Session, 'after_commit')
+def _contar_estados(session):
+    for anterior, novo in session.info.pop('estados_pedidos', ()):
+        PEDIDOS_ESTADO.inc(novo)
+        if anterior == 'Pendente de Pagamento' and novo == 'Recebido':
+            CHECKOUT_FUNIL.inc('pago')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_estados(session):
+    session.info.pop('estados_pedidos', None)
@@ -0,0 +1,48 @@
+"""
+Serviço de OAuth (Login com Google/Facebook)
+
+Importar o Authlib custa ~230 ms por processo, e só as rotas de login
+social precisam dele. O LazyOAuth aceita o init_app e os 'register' da
+factory como o OAuth do Authlib, mas só importa e cria o cliente real no
+primeiro acesso (ex: oauth.google), dentro de um pedido.
+"""
+import threading
+from flask import current_app
+
+CHAVE = 'lazy_oauth'
+
+
+class LazyOAuth:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions[CHAVE] = {'registos': [], 'oauth': None}
+        self._app = app
+
+    def register(self, name, **kwargs):
+        """Guarda o provedor; o registo real é feito no primeiro acesso."""
+        self._app.extensions[CHAVE]['registos'].append((name, kwargs))
+
+    def _real(self):
+        estado = current_app.extensions[CHAVE]
+        if estado['oauth'] is None:
+            with self._lock:
+                if estado['oauth'] is None:
+                    from authlib.integrations.flask_client import OAuth
+                    oauth = OAuth(current_app._get_current_object())
+                    for name, kwargs in estado['registos']:
+                        oauth.register(name=name, **kwargs)
+                    estado['oauth'] = oauth
+        return estado['oauth']
+
+    def __getattr__(self, nome):
+        # Só chamado para atributos que o LazyOAuth não tem (ex: 'google', 'create_client')
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self._real(), nome)
@@ -0,0 +1,112 @@
+"""
+Serviço do Histórico de Pedidos (eventos de status e tempos por etapa)
+
+Cada mudança de Pedido.status (criação incluída) acrescenta uma linha a
+EventoPedido, na MESMA transação que a própria mudança: as rotas
+(manage_orders, cancel_order, order_success, o webhook do Stripe...) não
+precisam de fazer nada. Os eventos de cada flush são recolhidos e
+inseridos num só 'executemany'.
+
+Com o histórico, stage_percentiles calcula, por restaurante, os
+percentis da duração de cada etapa:
+
+    pagamento  Pendente de Pagamento -> Recebido
+    aceite     Recebido              -> Em Preparo
+    preparo    Em Preparo            -> Em Rota de Entrega
+    entrega    Em Rota de Entrega    -> Concluído
+"""
+import datetime
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+from src.extensions import db
+from src.models import Pedido, EventoPedido
+
+ETAPAS = {
+    ('Pendente de Pagamento', 'Recebido'): 'pagamento',
+    ('Recebido', 'Em Preparo'): 'aceite',
+    ('Em Preparo', 'Em Rota de Entrega'): 'preparo',
+    ('Em Rota de Entrega', 'Concluído'): 'entrega',
+}
+PERCENTIS = (50, 90, 95)
+
+
+# --- Escrita (automática, em cada flush) ---
+
+@event.listens_for(Session, 'after_flush')
+def _registar_eventos(session, flush_context):
+    agora = datetime.datetime.utcnow()
+    linhas = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Pedido):
+            continue
+        historico = attributes.get_history(obj, 'status')
+        if not historico.added:
+            continue
+        anterior = historico.deleted[0] if historico.deleted else None
+        if anterior == historico.added[0]:
+            continue
+        linhas.append({
+            'pedido_id': obj.id, 'restaurante_id': obj.restaurante_id,
+            'status_anterior': anterior, 'status': historico.added[0], 'data_criacao': agora,
+        })
+    if linhas:
+        # Core na ligação da própria transação (a sessão está a meio do flush)
+        session.connection().execute(EventoPedido.__table__.insert(), linhas)
+
+
+# --- Análise ---
+
+def _percentil(ordenados, p):
+    """Percentil p (0-100) de uma lista ordenada, com interpolação linear."""
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+def stage_durations(restaurante_id=None, desde=None):
+    """
+    Duração (segundos) de cada etapa de cada pedido.
+
+    O instante do evento anterior do mesmo pedido vem de uma window function
+    (LAG) na própria DB: uma só query, sem ler os eventos pedido a pedido.
+
+    :return: {(restaurante_id, etapa): [segundos, ...]}
+    """
+    # type_: sem ele, o SQLite devolve o LAG como texto
+    anterior = func.lag(EventoPedido.data_criacao, type_=EventoPedido.data_criacao.type).over(
+        partition_by=EventoPedido.pedido_id, order_by=(EventoPedido.data_criacao, EventoPedido.id))
+    consulta = db.session.query(
+        EventoPedido.restaurante_id, EventoPedido.status_anterior, EventoPedido.status,
+        EventoPedido.data_criacao, anterior.label('anterior'),
+    )
+    if restaurante_id is not None:
+        consulta = consulta.filter(EventoPedido.restaurante_id == restaurante_id)
+    if desde is not None:
+        # Usa o índice (restaurante_id, data_criacao)
+        consulta = consulta.filter(EventoPedido.data_criacao >= desde)
+
+    duracoes = {}
+    for rid, de, para, data, data_anterior in consulta:
+        etapa = ETAPAS.get((de, para))
+        if etapa is None or data_anterior is None:
+            continue
+        duracoes.setdefault((rid, etapa), []).append((data - data_anterior).total_seconds())
+    return duracoes
+
+
+def stage_percentiles(restaurante_id=None, desde=None, percentis=PERCENTIS):
+    """
+    Percentis da duração de cada etapa, por restaurante.
+
+    :param desde: só eventos a partir deste instante (UTC)
+    :return: {restaurante_id: {etapa: {'n': quantidade, 'p50': segundos, ...}}}
+    """
+    resultado = {}
+    for (rid, etapa), valores in stage_durations(restaurante_id, desde).items():
+        valores.sort()
+        linha = {'n': len(valores)}
+        for p in percentis:
+            linha[f'p{p}'] = _percentil(valores, p)
+        resultado.setdefault(rid, {})[etapa] = linha
+    return resultado
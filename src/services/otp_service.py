@@ -0,0 +1,139 @@
+"""
+Serviço de Códigos OTP
+
+Guarda os códigos OTP na tabela 'codigos_otp' (e não na 'users'):
+- o código é guardado como HMAC-SHA256 (nunca em texto simples);
+- cada destino tem no máximo um código ativo, com contador de tentativas;
+- a verificação é uma única leitura pelo índice (canal, destino);
+- um 'sweeper' em background apaga periodicamente os códigos expirados.
+"""
+import datetime
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+from flask import current_app
+from sqlalchemy import update, delete
+from src.extensions import db
+from src.models import CodigoOTP
+
+logger = logging.getLogger(__name__)
+
+# Resultados possíveis de verify_otp_code()
+OTP_OK = 'ok'
+OTP_INVALIDO = 'invalido'
+OTP_EXPIRADO = 'expirado'
+
+
+def _hash_codigo(canal, destino, codigo):
+    """HMAC do código, ligado ao canal e ao destino (com a SECRET_KEY)."""
+    chave = current_app.config['SECRET_KEY'].encode('utf-8')
+    mensagem = f'{canal}:{destino}:{codigo}'.encode('utf-8')
+    return hmac.new(chave, mensagem, hashlib.sha256).hexdigest()
+
+
+def create_otp_code(canal, destino):
+    """
+    Gera um novo código de 6 dígitos para o destino e guarda o seu hash,
+    substituindo qualquer código anterior (tudo numa só transação).
+
+    :return: O código em texto simples (para enviar ao utilizador).
+    """
+    codigo = f'{secrets.randbelow(900000) + 100000}'
+    validade = current_app.config.get('OTP_VALIDITY_MINUTES', 10)
+
+    CodigoOTP.query.filter_by(canal=canal, destino=destino).delete()
+    db.session.add(CodigoOTP(
+        canal=canal,
+        destino=destino,
+        codigo_hash=_hash_codigo(canal, destino, codigo),
+        expiracao=datetime.datetime.utcnow() + datetime.timedelta(minutes=validade)
+    ))
+    db.session.commit()
+    return codigo
+
+
+def verify_otp_code(canal, destino, codigo):
+    """
+    Verifica um código submetido pelo utilizador.
+
+    Um código certo (ou expirado) é apagado de imediato. Um código errado
+    incrementa as tentativas; ao atingir OTP_MAX_ATTEMPTS, o código é apagado
+    e o utilizador tem de pedir outro.
+
+    Cada tentativa é contada ANTES de comparar o código, com um UPDATE
+    atómico (tentativas = tentativas + 1 ... RETURNING): pedidos em paralelo
+    não leem todos o mesmo valor, por isso nunca são avaliadas mais do que
+    OTP_MAX_ATTEMPTS tentativas por código.
+
+    :return: OTP_OK, OTP_INVALIDO ou OTP_EXPIRADO.
+    """
+    registo = CodigoOTP.query.filter_by(canal=canal, destino=destino).first()
+    if registo is None:
+        return OTP_INVALIDO
+
+    if registo.expiracao <= datetime.datetime.utcnow():
+        db.session.delete(registo)
+        db.session.commit()
+        return OTP_EXPIRADO
+
+    # 1. Reserva uma tentativa (só se ainda houver tentativas disponíveis)
+    maximo = current_app.config.get('OTP_MAX_ATTEMPTS', 5)
+    tentativas = db.session.execute(
+        update(CodigoOTP)
+        .where(CodigoOTP.id == registo.id, CodigoOTP.tentativas < maximo)
+        .values(tentativas=CodigoOTP.tentativas + 1)
+        .returning(CodigoOTP.tentativas)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if tentativas is None:
+        db.session.commit()
+        return OTP_INVALIDO  # Esgotado (ou já usado) por outro pedido
+
+    # 2. Compara; um código certo só é aceite por quem o conseguir apagar
+    correto = hmac.compare_digest(registo.codigo_hash, _hash_codigo(canal, destino, codigo or ''))
+    if correto or tentativas >= maximo:
+        apagados = db.session.execute(
+            delete(CodigoOTP).where(CodigoOTP.id == registo.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        correto = correto and apagados == 1
+    db.session.commit()
+    return OTP_OK if correto else OTP_INVALIDO
+
+
+def sweep_expired_otps():
+    """Apaga todos os códigos expirados. Devolve quantos foram apagados."""
+    apagados = CodigoOTP.query.filter(
+        CodigoOTP.expiracao < datetime.datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return apagados
+
+
+def start_otp_sweeper(app):
+    """
+    Arranca uma thread (daemon) que corre sweep_expired_otps() a cada
+    OTP_SWEEP_INTERVAL segundos. Com intervalo 0, não faz nada.
+    """
+    intervalo = app.config.get('OTP_SWEEP_INTERVAL', 0)
+    if not intervalo:
+        return None
+
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo):
+            with app.app_context():
+                try:
+                    sweep_expired_otps()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.exception("Erro ao limpar códigos OTP expirados")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=_loop, name='otp-sweeper', daemon=True)
+    thread.start()
+    return parar
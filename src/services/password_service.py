@@ -0,0 +1,87 @@
+"""
+Serviço de Palavras-passe (Hashing BCrypt)
+
+Centraliza o hashing das palavras-passe com um custo configurável
+(BCRYPT_LOG_ROUNDS), permite medir quanto custa cada hash e faz o
+"rehash" transparente no login quando o custo configurado muda.
+
+Opcionalmente (PASSWORD_HASH_THREADS > 0), as verificações correm num
+pool de threads de tamanho fixo. O bcrypt liberta o GIL, por isso o pool
+não bloqueia as outras threads do worker; e, por ter tamanho fixo, uma
+tempestade de logins nunca ocupa mais do que N núcleos ao mesmo tempo.
+"""
+import os
+import threading
+import time
+from flask import current_app
+from src.extensions import bcrypt
+from src.services.deploy_profile_service import make_executor
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _rounds():
+    return current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
+
+def _get_pool():
+    """
+    Cria o pool na primeira utilização dentro de cada processo
+    (um pool criado no master do gunicorn não sobrevive ao fork).
+    """
+    global _pool, _pool_pid
+    threads = current_app.config.get('PASSWORD_HASH_THREADS', 0)
+    if not threads:
+        return None
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = make_executor(threads, 'bcrypt')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def hash_password(password):
+    """Gera o hash BCrypt da palavra-passe com o custo configurado."""
+    return bcrypt.generate_password_hash(password, rounds=_rounds()).decode('utf-8')
+
+
+def verify_password(password_hash, password):
+    """
+    Verifica a palavra-passe contra o hash guardado.
+    Usa o pool de threads se PASSWORD_HASH_THREADS estiver definido.
+    """
+    if not password_hash:
+        return False
+    pool = _get_pool()
+    if pool is None:
+        return bcrypt.check_password_hash(password_hash, password)
+    return pool.submit(bcrypt.check_password_hash, password_hash, password).result()
+
+
+def get_hash_rounds(password_hash):
+    """Extrai o custo de um hash BCrypt (ex: '$2b$12$...' -> 12)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """Indica se o hash foi gerado com um custo diferente do configurado."""
+    return get_hash_rounds(password_hash) != _rounds()
+
+
+def benchmark_hash(rounds=None, repeticoes=3):
+    """
+    Mede quanto custa (em ms) gerar um hash com o custo indicado.
+
+    :return: Média de milissegundos por hash.
+    """
+    rounds = rounds or _rounds()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        bcrypt.generate_password_hash('benchmark-yummygo', rounds=rounds)
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
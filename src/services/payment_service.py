@@ -0,0 +1,42 @@
+"""
+Serviço de Pagamentos
+
+Centraliza a comunicação com o Stripe.
+
+O SDK do Stripe só é importado na primeira chamada (importá-lo custa
+~200 ms a cada worker e a cada comando 'flask', mesmo aos que nunca o usam).
+"""
+from flask import current_app
+from src.services.metrics_service import track_outbound
+
+def create_checkout_session(line_items, success_url, cancel_url, client_reference_id):
+    """
+    Cria uma Sessão de Checkout no Stripe e devolve-a (use 'session.url').
+
+    Se STRIPE_API_BASE estiver definido (ex: um stub local nos testes de
+    carga), os pedidos vão para esse endereço em vez de api.stripe.com.
+    """
+    import stripe
+    stripe.api_key = current_app.config['STRIPE_SECRET_KEY']
+    # Por omissão o SDK espera até 80 s; com gevent/gthread isso prende um worker
+    timeout = current_app.config.get('OUTBOUND_TIMEOUT', 10)
+    if getattr(stripe.default_http_client, '_timeout', None) != timeout:
+        stripe.default_http_client = stripe.new_default_http_client(timeout=timeout)
+    api_base = current_app.config.get('STRIPE_API_BASE')
+    if api_base:
+        stripe.api_base = api_base
+
+    with track_outbound('stripe'):
+        return stripe.checkout.Session.create(
+            line_items=line_items,
+            mode='payment',
+            success_url=success_url,
+            cancel_url=cancel_url,
+            client_reference_id=client_reference_id
+        )
+
+
+def construct_webhook_event(payload, sig_header, endpoint_secret):
+    """Valida a assinatura de um webhook do Stripe e devolve o evento (lança exceção se inválida)."""
+    import stripe
+    return stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
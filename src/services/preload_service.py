@@ -0,0 +1,101 @@
+"""
+Serviço de Preload (gunicorn com preload_app, ver gunicorn.conf.py)
+
+Sem preload, cada worker importa e constrói a sua própria app (mappers do
+SQLAlchemy, templates do Jinja, SDKs). Com preload, isso é feito UMA vez no
+processo master e os workers herdam a memória no fork (copy-on-write):
+
+1. warm_up (master): configura os mappers, compila todos os templates,
+   importa os SDKs pesados (que, sem preload, só são importados no primeiro
+   uso) e fecha as ligações à DB abertas entretanto.
+2. freeze (master, imediatamente antes dos forks): gc.freeze() move os
+   objetos existentes para uma geração permanente; o GC dos workers deixa
+   de lhes tocar (e de "sujar" as páginas partilhadas).
+3. after_fork (cada worker): descarta o pool de ligações herdado (sem as
+   fechar, pertencem ao master) e arranca as threads de background, que não
+   sobrevivem ao fork.
+"""
+import gc
+import importlib
+import logging
+import time
+from sqlalchemy.orm import configure_mappers
+from src.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# SDKs importados no primeiro uso (ver payment_service, sms_service, ...):
+# em preload, importá-los no master poupa memória e o primeiro pedido de cada worker
+PRELOAD_MODULES = (
+    'stripe',
+    'twilio.rest',
+    'cloudinary.uploader',
+    'xhtml2pdf.pisa',
+    'authlib.integrations.flask_client',
+    'PIL.Image',
+)
+
+
+def warm_up(app, modulos=PRELOAD_MODULES):
+    """
+    Prepara tudo o que pode ser partilhado entre workers.
+
+    :return: dicionário com o que foi aquecido (para o log).
+    """
+    inicio = time.perf_counter()
+
+    # 1. Mappers do SQLAlchemy (senão cada worker configura-os no 1º pedido)
+    configure_mappers()
+
+    # 2. Templates do Jinja compilados e na cache do ambiente
+    templates = app.jinja_env.list_templates()
+    for nome in templates:
+        app.jinja_env.get_template(nome)
+
+    # 3. Mapa de URLs (compilado uma vez)
+    app.url_map.update()
+
+    # 4. SDKs pesados
+    importados = []
+    for modulo in modulos:
+        try:
+            importlib.import_module(modulo)
+            importados.append(modulo)
+        except ImportError:
+            logger.warning("Módulo de preload não disponível: %s", modulo)
+
+    # 5. O master não pode passar ligações abertas aos workers
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    resumo = {
+        'templates': len(templates),
+        'modulos': len(importados),
+        'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
+    logger.info("Preload concluído", extra=resumo)
+    return resumo
+
+
+def freeze():
+    """Chamar no master, imediatamente antes dos forks."""
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Chamar em cada worker, logo a seguir ao fork."""
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: as ligações herdadas são do master, não se fecham aqui
+            engine.dispose(close=False)
+
+    # As threads não sobrevivem ao fork: arrancam em cada worker
+    if not app.config.get('TESTING'):
+        from src.services.otp_service import start_otp_sweeper
+        from src.services.ranking_service import start_ranking_refresher
+        from src.services.eta_service import start_eta_refresher
+        start_otp_sweeper(app)
+        start_ranking_refresher(app)
+        start_eta_refresher(app)
@@ -0,0 +1,201 @@
+"""
+Serviço de Instrumentação de SQL (por pedido)
+
+Liga-se aos eventos 'before_cursor_execute'/'after_cursor_execute' do
+SQLAlchemy e, para cada pedido HTTP, regista:
+- o número de queries e o tempo total passado na DB;
+- as queries mais lentas e as repetidas (sinal típico de N+1).
+
+Os dados ficam disponíveis:
+- no cabeçalho 'Server-Timing' (visível no separador Network do browser);
+- num painel de debug no fundo das páginas (SQL_PROFILER_PANEL);
+- em /_debug/sql, com os totais acumulados por endpoint (SQL_PROFILER_PANEL);
+- no log de queries lentas (SQL_SLOW_QUERY_MS) e de pedidos com queries
+  a mais (SQL_SLOW_REQUEST_QUERIES).
+"""
+import heapq
+import logging
+import threading
+import time
+from flask import g, has_request_context, request, jsonify, abort, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class PerfilPedido:
+    """Queries executadas durante um pedido HTTP."""
+
+    def __init__(self, top):
+        self.top = top
+        self.inicio = time.perf_counter()
+        self.queries = 0
+        self.tempo_db = 0.0
+        self.mais_lentas = []   # heap de (duração, ordem, sql)
+        self.repeticoes = {}    # sql -> número de execuções
+
+    def registar(self, sql, duracao):
+        self.queries += 1
+        self.tempo_db += duracao
+        self.repeticoes[sql] = self.repeticoes.get(sql, 0) + 1
+        entrada = (duracao, self.queries, sql)
+        if len(self.mais_lentas) < self.top:
+            heapq.heappush(self.mais_lentas, entrada)
+        elif duracao > self.mais_lentas[0][0]:
+            heapq.heapreplace(self.mais_lentas, entrada)
+
+    @property
+    def tempo_total(self):
+        return time.perf_counter() - self.inicio
+
+    def lentas(self):
+        """[(ms, sql), ...] da mais lenta para a mais rápida."""
+        return [(d * 1000, sql) for d, _, sql in sorted(self.mais_lentas, reverse=True)]
+
+    def repetidas(self):
+        """[(n, sql), ...] das queries executadas mais de uma vez."""
+        return sorted(((n, sql) for sql, n in self.repeticoes.items() if n > 1), reverse=True)
+
+
+class EstatisticasEndpoint:
+    """Totais acumulados de um endpoint (neste worker)."""
+
+    __slots__ = ('pedidos', 'queries', 'max_queries', 'tempo_db', 'tempo_total', 'mais_lentas')
+
+    def __init__(self):
+        self.pedidos = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.tempo_db = 0.0
+        self.tempo_total = 0.0
+        self.mais_lentas = []
+
+    def como_dict(self):
+        return {
+            'pedidos': self.pedidos,
+            'queries_media': round(self.queries / self.pedidos, 1),
+            'queries_max': self.max_queries,
+            'db_ms_media': round(self.tempo_db * 1000 / self.pedidos, 2),
+            'total_ms_media': round(self.tempo_total * 1000 / self.pedidos, 2),
+            'mais_lentas': [{'ms': round(d * 1000, 2), 'sql': sql}
+                            for d, sql in sorted(self.mais_lentas, reverse=True)],
+        }
+
+
+def _encurtar(sql, limite=300):
+    sql = ' '.join(sql.split())
+    return sql if len(sql) <= limite else sql[:limite] + '...'
+
+
+class RequestProfiler:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+        self._eventos_ligados = False
+
+    def init_app(self, app):
+        app.extensions['request_profiler'] = self
+        if not app.config.get('SQL_PROFILER_ENABLED', True):
+            return
+
+        # Os eventos são globais (todas as Engines): ligamos só uma vez
+        if not self._eventos_ligados:
+            event.listen(Engine, 'before_cursor_execute', self._antes_da_query)
+            event.listen(Engine, 'after_cursor_execute', self._depois_da_query)
+            event.listen(Engine, 'handle_error', self._erro_na_query)
+            self._eventos_ligados = True
+
+        app.before_request(self._iniciar_pedido)
+        app.after_request(self._terminar_pedido)
+
+        if app.config.get('SQL_PROFILER_PANEL'):
+            app.context_processor(lambda: {'sql_profile': g.get('perfil_sql')})
+            app.add_url_rule('/_debug/sql', 'sql_profile_stats', self._ver_estatisticas)
+
+    # --- Eventos do SQLAlchemy ---
+
+    def _antes_da_query(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_queries', []).append(time.perf_counter())
+
+    def _depois_da_query(self, conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info['inicio_queries'].pop()
+        if not has_request_context():
+            return
+        perfil = g.get('perfil_sql')
+        if perfil is None:
+            return
+        perfil.registar(statement, duracao)
+
+        limite_ms = current_app.config.get('SQL_SLOW_QUERY_MS', 100)
+        if limite_ms and duracao * 1000 >= limite_ms:
+            logger.warning("SQL lenta", extra={'endpoint': request.endpoint, 'db_ms': round(duracao * 1000, 1),
+                                                'sql': _encurtar(statement)})
+
+    def _erro_na_query(self, contexto):
+        # Uma query que falha não chega ao after_cursor_execute: sem isto, a pilha
+        # de inícios crescia durante toda a vida da ligação (no pool)
+        conn = contexto.connection
+        if conn is not None and conn.info.get('inicio_queries'):
+            conn.info['inicio_queries'].pop()
+
+    # --- Ciclo do pedido ---
+
+    def _iniciar_pedido(self):
+        g.perfil_sql = PerfilPedido(current_app.config.get('SQL_PROFILER_TOP', 5))
+
+    def _terminar_pedido(self, response):
+        perfil = g.pop('perfil_sql', None)
+        if perfil is None:
+            return response
+
+        tempo_total = perfil.tempo_total
+        if current_app.config.get('SQL_SERVER_TIMING', True):
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={perfil.tempo_db * 1000:.2f};desc="{perfil.queries} queries", '
+                f'app;dur={tempo_total * 1000:.2f}'
+            )
+
+        endpoint = request.endpoint or 'sem_endpoint'
+        self._acumular(endpoint, perfil, tempo_total)
+
+        limite_queries = current_app.config.get('SQL_SLOW_REQUEST_QUERIES', 30)
+        if limite_queries and perfil.queries >= limite_queries:
+            repetidas = perfil.repetidas()
+            logger.warning("Pedido com muitas queries", extra={
+                'method': request.method, 'path': request.path, 'endpoint': endpoint,
+                'queries': perfil.queries, 'db_ms': round(perfil.tempo_db * 1000, 1),
+                'mais_repetida': {'n': repetidas[0][0], 'sql': _encurtar(repetidas[0][1], 120)} if repetidas else None,
+            })
+        return response
+
+    def _acumular(self, endpoint, perfil, tempo_total):
+        with self._lock:
+            estat = self.endpoints.get(endpoint)
+            if estat is None:
+                estat = self.endpoints[endpoint] = EstatisticasEndpoint()
+            estat.pedidos += 1
+            estat.queries += perfil.queries
+            estat.max_queries = max(estat.max_queries, perfil.queries)
+            estat.tempo_db += perfil.tempo_db
+            estat.tempo_total += tempo_total
+            for duracao, _, sql in perfil.mais_lentas:
+                entrada = (duracao, _encurtar(sql))
+                if len(estat.mais_lentas) < perfil.top:
+                    heapq.heappush(estat.mais_lentas, entrada)
+                elif duracao > estat.mais_lentas[0][0]:
+                    heapq.heapreplace(estat.mais_lentas, entrada)
+
+    def _ver_estatisticas(self):
+        # Só em modo de debug/painel: expõe SQL interno da app
+        if not current_app.config.get('SQL_PROFILER_PANEL'):
+            abort(404)
+        with self._lock:
+            dados = {endpoint: estat.como_dict() for endpoint, estat in self.endpoints.items()}
+        ordenado = dict(sorted(dados.items(), key=lambda item: item[1]['db_ms_media'], reverse=True))
+        return jsonify(ordenado)
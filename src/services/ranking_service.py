@@ -0,0 +1,243 @@
+"""
+Serviço de Ranking (ordem dos restaurantes na página inicial)
+
+A pontuação de cada restaurante tem duas partes:
+
+1. Estática (recalculada a cada RANKING_REFRESH_INTERVAL segundos, ou com
+   'flask ranking-rebuild'), guardada em RankingRestaurante. Todos os
+   workers têm a thread, mas só um recalcula em cada intervalo (ver
+   refresh_rankings_if_stale):
+   - nota: média bayesiana (restaurantes com poucas avaliações ficam perto
+     da média global, em vez de um 5.0 com uma avaliação ir para o topo);
+   - tempo de entrega e taxa de entrega (menores é melhor);
+   - popularidade: pedidos nos últimos 30 dias (escala logarítmica).
+2. Por pedido, só o que depende do cliente ou tem de estar sempre certo:
+   - distância ao primeiro endereço do cliente (fora do raio não aparece);
+   - restaurantes fechados (fora do horário, ver hours_service, ou com
+     ativo=False) vão para o fim da lista.
+
+O feed é servido por páginas: sem localização nem filtros, o ORDER BY/LIMIT
+é feito na DB; com localização, só os candidatos dentro do raio (caixa de
+lat/lon) são pontuados e fica-se com o top-k da página (heapq). Os filtros
+da página inicial (facet_service) chegam como um conjunto de ids.
+"""
+import datetime
+import heapq
+import logging
+import math
+import threading
+from sqlalchemy import func, and_, or_
+from src.extensions import db
+from src.models import Restaurante, Endereco, Pedido, RankingRestaurante
+from src.services.geo_service import haversine
+from src.services.job_lock_service import job_lock
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada termo (todos os termos valem entre 0 e 1)
+PESOS = {
+    'nota': 3.0,
+    'tempo': 1.0,
+    'taxa': 1.0,
+    'popularidade': 2.0,
+    'distancia': 3.0,
+}
+# Fechados vão sempre para o fim (maior que a soma de todos os pesos)
+PENALIZACAO_FECHADO = 100.0
+
+NOTA_AVALIACOES_MINIMAS = 5  # "Avaliações fictícias" com a média global (média bayesiana)
+NOTA_MEDIA_SEM_DADOS = 4.0
+TEMPO_MAXIMO_MIN = 90
+TAXA_MAXIMA = 20.0
+JANELA_POPULARIDADE_DIAS = 30
+KM_POR_GRAU_LATITUDE = 111.0
+LOCK_RANKING = 'ranking_restaurantes'
+
+
+def static_score(restaurante, pedidos, max_pedidos, media_global):
+    """
+    Parte estática da pontuação de um restaurante.
+
+    :param pedidos: pedidos do restaurante na janela de popularidade
+    :param max_pedidos: o maior desses valores entre todos os restaurantes
+    :param media_global: média de todas as avaliações
+    """
+    # 1. Nota (média bayesiana, de 0 a 1)
+    nota = ((restaurante.avaliacoes_soma + NOTA_AVALIACOES_MINIMAS * media_global)
+            / (restaurante.avaliacoes_qtd + NOTA_AVALIACOES_MINIMAS))
+    termo_nota = (nota - 1) / 4
+
+    # 2. Tempo e taxa de entrega (sem dados, a meio da escala)
+    tempo = restaurante.tempo_medio_entrega
+    termo_tempo = 0.5 if tempo is None else 1 - min(tempo, TEMPO_MAXIMO_MIN) / TEMPO_MAXIMO_MIN
+    taxa = restaurante.taxa_entrega
+    termo_taxa = 0.5 if taxa is None else 1 - min(taxa, TAXA_MAXIMA) / TAXA_MAXIMA
+
+    # 3. Popularidade (logarítmica: 10 -> 100 pedidos vale tanto como 100 -> 1000)
+    termo_popularidade = math.log1p(pedidos) / math.log1p(max_pedidos) if max_pedidos else 0
+
+    return (PESOS['nota'] * termo_nota + PESOS['tempo'] * termo_tempo
+            + PESOS['taxa'] * termo_taxa + PESOS['popularidade'] * termo_popularidade)
+
+
+def recompute_rankings():
+    """
+    Recalcula a parte estática de todos os restaurantes (substitui a tabela
+    numa só transação: quem lê vê o ranking antigo ou o novo, nunca a meio).
+
+    :return: número de restaurantes pontuados.
+    """
+    # Um processo de cada vez (libertado no commit, no fim)
+    job_lock(LOCK_RANKING)
+    agora = datetime.datetime.utcnow()
+
+    # 1. Média global das avaliações (a partir dos agregados)
+    soma, qtd = db.session.query(
+        func.coalesce(func.sum(Restaurante.avaliacoes_soma), 0),
+        func.coalesce(func.sum(Restaurante.avaliacoes_qtd), 0),
+    ).one()
+    media_global = soma / qtd if qtd else NOTA_MEDIA_SEM_DADOS
+
+    # 2. Popularidade: pedidos (não cancelados) nos últimos 30 dias
+    desde = agora - datetime.timedelta(days=JANELA_POPULARIDADE_DIAS)
+    pedidos = dict(db.session.query(Pedido.restaurante_id, func.count(Pedido.id))
+                   .filter(Pedido.data_criacao >= desde, Pedido.status != 'Cancelado')
+                   .group_by(Pedido.restaurante_id).all())
+    max_pedidos = max(pedidos.values(), default=0)
+
+    # 3. Localização: o primeiro endereço do dono
+    primeiro = (db.session.query(func.min(Endereco.id).label('id'))
+                .group_by(Endereco.user_id).subquery())
+    localizacoes = dict(
+        (user_id, (lat, lon)) for user_id, lat, lon in
+        db.session.query(Endereco.user_id, Endereco.latitude, Endereco.longitude)
+        .join(primeiro, primeiro.c.id == Endereco.id)
+        .join(Restaurante, Restaurante.user_id == Endereco.user_id)
+    )
+
+    linhas = []
+    for restaurante in Restaurante.query.all():
+        lat, lon = localizacoes.get(restaurante.user_id, (None, None))
+        n = pedidos.get(restaurante.id, 0)
+        linhas.append({
+            'restaurante_id': restaurante.id,
+            'pontuacao': static_score(restaurante, n, max_pedidos, media_global),
+            'latitude': lat, 'longitude': lon,
+            'pedidos_30d': n, 'atualizado_em': agora,
+        })
+
+    RankingRestaurante.query.delete(synchronize_session=False)
+    if linhas:
+        db.session.execute(RankingRestaurante.__table__.insert(), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def refresh_rankings_if_stale(intervalo):
+    """
+    Versão de recompute_rankings() para as threads dos workers: se outro
+    processo já está a recalcular, ou o ranking tem menos de 'intervalo'
+    segundos, não faz nada.
+
+    :return: número de restaurantes pontuados, ou None se não recalculou.
+    """
+    if not job_lock(LOCK_RANKING, esperar=False):
+        db.session.rollback()
+        return None
+    ultimo = db.session.query(func.max(RankingRestaurante.atualizado_em)).scalar()
+    # Margem de 10% para os workers que acordam pouco depois de outro ter recalculado
+    if ultimo and (datetime.datetime.utcnow() - ultimo).total_seconds() < intervalo * 0.9:
+        db.session.rollback()
+        return None
+    return recompute_rankings()
+
+
+def ranked_feed(pagina=1, por_pagina=24, latitude=None, longitude=None, raio_km=None,
+                restaurante_ids=None, abertos=None):
+    """
+    Uma página do feed da página inicial.
+
+    :param pagina: começa em 1
+    :param latitude/longitude: localização do cliente (opcional)
+    :param raio_km: com localização, esconde restaurantes mais longe do que isto
+    :param restaurante_ids: se indicado, só estes restaurantes (filtros das facetas)
+    :param abertos: ids dos restaurantes abertos agora (sem isto, vale o 'ativo')
+    :return: (restaurantes da página, {restaurante_id: distância em km}, total)
+    """
+    pagina = max(pagina, 1)
+    inicio = (pagina - 1) * por_pagina
+    pontuacao = func.coalesce(RankingRestaurante.pontuacao, 0)  # Novos ainda sem ranking
+    consulta = (db.session.query(Restaurante.id, Restaurante.ativo, pontuacao,
+                                 RankingRestaurante.latitude, RankingRestaurante.longitude)
+                .outerjoin(RankingRestaurante, RankingRestaurante.restaurante_id == Restaurante.id))
+    distancias = {}
+    com_localizacao = latitude is not None and longitude is not None
+
+    if not com_localizacao and restaurante_ids is None and abertos is None:
+        # 1. Sem localização, filtros nem horários: ordem e paginação na DB
+        total = consulta.count()
+        ids = [linha[0] for linha in consulta
+               .order_by(Restaurante.ativo.desc(), pontuacao.desc(), Restaurante.id)
+               .offset(inicio).limit(por_pagina)]
+    else:
+        # 2. Com localização: só os candidatos dentro da caixa do raio (ou sem localização)
+        if com_localizacao and raio_km:
+            dlat = raio_km / KM_POR_GRAU_LATITUDE
+            dlon = raio_km / (KM_POR_GRAU_LATITUDE * max(math.cos(math.radians(latitude)), 0.01))
+            consulta = consulta.filter(or_(
+                RankingRestaurante.latitude.is_(None),
+                and_(RankingRestaurante.latitude.between(latitude - dlat, latitude + dlat),
+                     RankingRestaurante.longitude.between(longitude - dlon, longitude + dlon)),
+            ))
+
+        candidatos = []
+        for rid, ativo, estatica, lat, lon in consulta:
+            if restaurante_ids is not None and rid not in restaurante_ids:
+                continue
+            aberto = rid in abertos if abertos is not None else ativo
+            pontos = estatica - (0 if aberto else PENALIZACAO_FECHADO)
+            if com_localizacao and lat is not None and lon is not None:
+                km = haversine(latitude, longitude, lat, lon)
+                if raio_km and km > raio_km:
+                    continue
+                distancias[rid] = km
+                # Perto vale 1, no limite do raio vale 0 (sem raio, decai com 10 km)
+                pontos += PESOS['distancia'] * (max(0.0, 1 - km / raio_km) if raio_km else 1 / (1 + km / 10))
+            candidatos.append((pontos, -rid))
+
+        total = len(candidatos)
+        # Top-k: só é preciso ordenar até ao fim da página pedida
+        ids = [-rid for _, rid in heapq.nlargest(inicio + por_pagina, candidatos)[inicio:]]
+
+    # 3. Só os restaurantes da página são carregados (pela ordem do ranking)
+    por_id = {r.id: r for r in Restaurante.query.filter(Restaurante.id.in_(ids))} if ids else {}
+    restaurantes = [por_id[rid] for rid in ids if rid in por_id]
+    return restaurantes, {rid: distancias[rid] for rid in ids if rid in distancias}, total
+
+
+def start_ranking_refresher(app):
+    """
+    Arranca uma thread (daemon) que corre refresh_rankings_if_stale() a
+    cada RANKING_REFRESH_INTERVAL segundos. Com intervalo 0, não faz nada
+    (ex: para correr só 'flask ranking-rebuild' a partir de um cron).
+    """
+    intervalo = app.config.get('RANKING_REFRESH_INTERVAL', 0)
+    if not intervalo:
+        return None
+
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo):
+            with app.app_context():
+                try:
+                    refresh_rankings_if_stale(intervalo)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Erro ao recalcular o ranking dos restaurantes")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=_loop, name='ranking-refresher', daemon=True)
+    thread.start()
+    return parar
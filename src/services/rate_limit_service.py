@@ -0,0 +1,257 @@
+"""
+Serviço de Rate Limiting (Limitação de Pedidos)
+
+Protege as rotas caras (login com bcrypt, envio de OTP por SMS/e-mail,
+pesquisa) contra abuso, usando o algoritmo "token bucket":
+cada chave (IP ou identidade) tem um balde com 'limit' fichas, que se
+recarrega à razão de 'limit' fichas a cada 'per' segundos.
+
+O estado dos baldes fica num "store", escolhido por RATELIMIT_STORAGE_URL:
+    memory://                      -> dicionário em memória (um só processo)
+    sqlite:////caminho/rl.db       -> ficheiro SQLite partilhado entre os
+                                      workers do gunicorn na mesma máquina
+    redis://host:6379/0            -> Redis (ou compatível: Valkey, KeyDB...)
+                                      partilhado entre máquinas; requer 'redis'
+
+Uso nas rotas (o limite é verificado ANTES de qualquer acesso à DB):
+
+    @auth_bp.route('/login', methods=['GET', 'POST'])
+    @limiter.limit('login-ip', 20, 60)
+    @limiter.limit('login-id', 5, 60, key=identity_from_form('login'))
+    def login(): ...
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import request, g, abort, current_app
+
+
+def _consume(tokens, updated, now, limit, per):
+    """
+    Aplica o token bucket a um estado (tokens, updated).
+
+    :return: Tuplo (permitido, novos_tokens, segundos_ate_proxima_ficha).
+    """
+    rate = limit / per
+    if tokens is None:
+        tokens = float(limit)
+    else:
+        tokens = min(float(limit), tokens + (now - updated) * rate)
+
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / rate
+
+
+# --- Stores ---
+
+class MemoryStore:
+    """Baldes num dicionário protegido por lock (válido só dentro do processo)."""
+
+    MAX_KEYS = 50000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, per):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (None, now))
+            permitido, tokens, retry_after = _consume(tokens, updated, now, limit, per)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now, per)
+        return permitido, retry_after
+
+    def _prune(self, now, per):
+        # Um balde parado há mais de 'per' segundos já está cheio:
+        # apagá-lo é equivalente a mantê-lo.
+        antigos = [k for k, (_, updated) in self._buckets.items() if now - updated > per]
+        for k in antigos:
+            del self._buckets[k]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteStore:
+    """
+    Baldes numa tabela SQLite (modo WAL), partilhada por todos os workers
+    da mesma máquina. Cada 'hit' é uma transação 'BEGIN IMMEDIATE'.
+    """
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL)'
+        )
+        conn.close()
+
+    def _conn(self):
+        # Uma ligação por thread e por processo: uma ligação SQLite aberta
+        # no master do gunicorn não pode ser reutilizada depois do fork.
+        pid, conn = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def hit(self, key, limit, per):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (None, now)
+            permitido, tokens, retry_after = _consume(tokens, updated, now, limit, per)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, tokens, updated, expires) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + per)
+            )
+            self._hits += 1
+            if self._hits % self.SWEEP_EVERY == 0:
+                conn.execute('DELETE FROM rate_limits WHERE expires < ?', (now,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return permitido, retry_after
+
+    def reset(self):
+        self._conn().execute('DELETE FROM rate_limits')
+
+
+class RedisStore:
+    """
+    Baldes em Redis (ou servidor compatível). O token bucket corre num
+    script Lua, por isso cada 'hit' é atómico e custa uma só ida à rede.
+    """
+
+    SCRIPT = """
+    local limit = tonumber(ARGV[1])
+    local per = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local rate = limit / per
+    local b = redis.call('HMGET', KEYS[1], 't', 'u')
+    local tokens = tonumber(b[1])
+    if tokens == nil then
+        tokens = limit
+    else
+        tokens = math.min(limit, tokens + (now - tonumber(b[2])) * rate)
+    end
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(per) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url):
+        import redis  # Dependência opcional: só é necessária com redis://
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, per):
+        allowed, tokens = self._script(keys=[f'rl:{key}'], args=[limit, per, time.time()])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / (limit / per)
+
+    def reset(self):
+        for key in self._client.scan_iter('rl:*'):
+            self._client.delete(key)
+
+
+def create_store(url):
+    """Cria o store adequado a partir de RATELIMIT_STORAGE_URL."""
+    if not url or url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f'RATELIMIT_STORAGE_URL não suportado: {url}')
+
+
+# --- Funções de chave ---
+
+def client_ip():
+    """
+    IP do cliente. Atrás de um proxy (ex: Render), defina
+    RATELIMIT_PROXY_HOPS para usar o IP real do X-Forwarded-For.
+    """
+    hops = current_app.config.get('RATELIMIT_PROXY_HOPS', 0)
+    # access_route = [cliente, proxy1, ..., remote_addr]
+    if hops and len(request.access_route) > hops:
+        return request.access_route[-(hops + 1)]
+    return request.remote_addr or 'desconhecido'
+
+
+def identity_from_form(field):
+    """Chave por identidade (e-mail/telefone) lida de um campo do formulário."""
+    def key():
+        valor = request.form.get(field, '').strip().lower()
+        return valor or None
+    return key
+
+
+def identity_from_args(field):
+    """Chave por identidade lida da query string (ex: ?email=...)."""
+    def key():
+        valor = request.args.get(field, '').strip().lower()
+        return valor or None
+    return key
+
+
+# --- Extensão ---
+
+class RateLimiter:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self.store = None
+
+    def init_app(self, app):
+        self.store = create_store(app.config.get('RATELIMIT_STORAGE_URL'))
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, scope, limit, per, key=client_ip, methods=('POST',)):
+        """
+        Decorador: permite 'limit' pedidos a cada 'per' segundos por chave.
+
+        :param scope: Nome do limite (prefixo da chave no store).
+        :param key: Função que devolve a chave (IP por defeito). Se devolver
+                    None, o limite não se aplica a esse pedido.
+        :param methods: Métodos HTTP a que o limite se aplica.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if request.method in methods and current_app.config.get('RATELIMIT_ENABLED', True):
+                    valor = key()
+                    if valor is not None:
+                        permitido, retry_after = self.store.hit(f'{scope}:{valor}', limit, per)
+                        if not permitido:
+                            g.rate_limit_retry_after = max(1, math.ceil(retry_after))
+                            abort(429)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
@@ -0,0 +1,68 @@
+"""
+Serviço de Avaliações (agregados por restaurante)
+
+Em vez de calcular avg(nota) e as reclamações com um JOIN a todas as
+avaliações sempre que uma página precisa delas, cada restaurante guarda
+a soma e o número de notas, o número de reclamações e o histograma de
+1 a 5 estrelas (colunas em Restaurante). A média vem com o próprio
+restaurante, sem queries extra.
+
+- record_review: um UPDATE relativo (col = col + 1) na mesma transação
+  que insere a avaliação; sem ler-modificar-gravar, por isso dois
+  pedidos em simultâneo nunca perdem uma avaliação.
+- rebuild_ratings: recalcula tudo a partir da tabela de avaliações
+  (comando 'flask ratings-rebuild'; usado também pelo seed).
+"""
+from sqlalchemy import func, case, update, select
+from src.extensions import db
+from src.models import Restaurante, Avaliacao
+
+
+def record_review(avaliacao):
+    """
+    Soma a avaliação aos agregados do restaurante. Não faz commit:
+    chamar antes do commit que grava a avaliação.
+    """
+    estrelas = getattr(Restaurante, f'estrelas_{avaliacao.nota}')
+    db.session.execute(
+        update(Restaurante)
+        .where(Restaurante.id == avaliacao.restaurante_id)
+        .values({
+            Restaurante.avaliacoes_soma: Restaurante.avaliacoes_soma + avaliacao.nota,
+            Restaurante.avaliacoes_qtd: Restaurante.avaliacoes_qtd + 1,
+            Restaurante.reclamacoes_qtd: Restaurante.reclamacoes_qtd + (1 if avaliacao.reclamacao else 0),
+            estrelas: estrelas + 1,
+        })
+        # Se a sessão já tiver este restaurante carregado, os atributos são atualizados também
+        .execution_options(synchronize_session='evaluate')
+    )
+
+
+def rebuild_ratings(restaurante_id=None):
+    """
+    Recalcula os agregados a partir da tabela de avaliações (todos os
+    restaurantes, ou só um). Faz commit.
+
+    :return: número de restaurantes atualizados.
+    """
+    def _agregado(coluna):
+        return (select(coluna)
+                .where(Avaliacao.restaurante_id == Restaurante.id)
+                .scalar_subquery())
+
+    valores = {
+        Restaurante.avaliacoes_soma: _agregado(func.coalesce(func.sum(Avaliacao.nota), 0)),
+        Restaurante.avaliacoes_qtd: _agregado(func.count(Avaliacao.id)),
+        Restaurante.reclamacoes_qtd: _agregado(
+            func.coalesce(func.sum(case((Avaliacao.reclamacao == True, 1), else_=0)), 0)),
+    }
+    for n in range(1, 6):
+        valores[getattr(Restaurante, f'estrelas_{n}')] = _agregado(
+            func.coalesce(func.sum(case((Avaliacao.nota == n, 1), else_=0)), 0))
+
+    consulta = update(Restaurante).values(valores)
+    if restaurante_id is not None:
+        consulta = consulta.where(Restaurante.id == restaurante_id)
+    resultado = db.session.execute(consulta.execution_options(synchronize_session=False))
+    db.session.commit()
+    return resultado.rowcount
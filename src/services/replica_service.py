@@ -0,0 +1,140 @@
+"""
+Serviço de Réplicas de Leitura
+
+As páginas só de leitura (início, pesquisa, cardápio público, relatórios)
+podem ler de uma ou mais réplicas (DATABASE_REPLICA_URLS) em vez da DB
+principal, onde escrevem o checkout e a gestão de pedidos:
+
+- @read_replica marca a rota; cada pedido escolhe uma réplica ao acaso;
+- o RoutingSession (a sessão do db) envia as leituras para essa réplica,
+  exceto quando a própria sessão já tem escritas pendentes (flush);
+- read-your-writes: depois de um commit com escritas, o utilizador fica
+  "colado" à principal durante REPLICA_STICKY_SECONDS (marca na sessão do
+  Flask), para não ver dados anteriores à sua própria alteração;
+- fallback: se a réplica falhar (ex: ligação recusada), fica de fora
+  durante REPLICA_RETRY_SECONDS e a rota é repetida na principal (é só de
+  leitura, por isso repetir é seguro).
+
+Sem DATABASE_REPLICA_URLS, tudo vai para a principal (comportamento normal).
+"""
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, session, current_app, has_request_context
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, InterfaceError
+from src.services.deploy_profile_service import engine_options
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = 'replica_'
+CHAVE_STICKY = '_leu_escrita_ate'
+
+# bind_key da réplica -> instante (time.monotonic) até ao qual fica de fora
+_indisponiveis = {}
+_lock = threading.Lock()
+
+
+def configure_replicas(app):
+    """Acrescenta as réplicas ao SQLALCHEMY_BINDS como 'replica_0', 'replica_1'... (antes do db.init_app)."""
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, url in enumerate(app.config.get('DATABASE_REPLICA_URLS') or []):
+        # Cada réplica com o pool adequado ao perfil de deploy e ao seu dialeto
+        binds[f'{PREFIXO}{i}'] = {'url': url, **engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': url})}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _replicas_disponiveis():
+    agora = time.monotonic()
+    return [chave for chave in current_app.config.get('SQLALCHEMY_BINDS') or {}
+            if chave.startswith(PREFIXO) and _indisponiveis.get(chave, 0) <= agora]
+
+
+def _marcar_indisponivel(chave):
+    with _lock:
+        _indisponiveis[chave] = time.monotonic() + current_app.config.get('REPLICA_RETRY_SECONDS', 30)
+
+
+def _colado_a_principal():
+    return session.get(CHAVE_STICKY, 0) > time.time()
+
+
+class RoutingSession(FlaskSession):
+    """
+    Sessão do Flask-SQLAlchemy que, numa rota @read_replica, lê da réplica
+    escolhida para o pedido.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            chave = g.get('db_replica')
+            # Com escritas pendentes nesta sessão, tudo vai para a principal
+            if chave and not (self._flushing or self.new or self.dirty or self.deleted
+                              or self.info.get('escreveu')):
+                return self._db.engines[chave]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """Decorator das rotas só de leitura (ver o docstring do módulo)."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = _replicas_disponiveis()
+        if not replicas or _colado_a_principal():
+            return view(*args, **kwargs)
+
+        g.db_replica = random.choice(replicas)
+        try:
+            return view(*args, **kwargs)
+        except (OperationalError, InterfaceError):
+            chave = g.pop('db_replica')
+            from src.extensions import db
+            db.session.rollback()
+            _marcar_indisponivel(chave)
+            logger.warning("Réplica indisponível, a repetir na principal", exc_info=True,
+                           extra={'replica': chave})
+            return view(*args, **kwargs)
+        finally:
+            g.pop('db_replica', None)
+
+    return wrapper
+
+
+@contextmanager
+def on_primary():
+    """
+    Dentro de uma rota @read_replica, lê da principal (ex: para reconstruir
+    uma cache do worker, que não pode ficar com dados atrasados da réplica).
+    """
+    chave = g.pop('db_replica', None) if has_request_context() else None
+    try:
+        yield
+    finally:
+        if chave:
+            g.db_replica = chave
+
+
+# --- Read-your-writes ---
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _registar_escrita(sessao, contexto):
+    sessao.info['escreveu'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _colar_a_principal(sessao):
+    if not sessao.info.pop('escreveu', False) or not has_request_context():
+        return
+    if not any(chave.startswith(PREFIXO) for chave in current_app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    session[CHAVE_STICKY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _limpar_escrita(sessao):
+    sessao.info.pop('escreveu', None)
@@ -0,0 +1,172 @@
+"""
+Serviço de Profiling de CPU por Amostragem (por pedido)
+
+Para perceber onde vai o tempo de um pedido lento (ex: orders_report,
+download_invoice) em produção, sem instrumentar o código:
+
+- um pedido é perfilado se trouxer o cabeçalho 'X-Profile: <PROFILER_TOKEN>'
+  ou se for sorteado (PROFILER_SAMPLE_RATE, ex: 0.001 = 1 em cada 1000);
+- enquanto o pedido corre, uma thread auxiliar lê a pilha da thread do
+  pedido (sys._current_frames) a cada PROFILER_INTERVAL_MS;
+- no fim, as amostras são gravadas em PROFILER_DIR, em 'collapsed stacks'
+  (para flamegraph.pl / speedscope) ou em JSON do speedscope.
+
+Desligado (sem token e com taxa 0), nem sequer regista os hooks: custo zero.
+"""
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from flask import g, request, current_app
+
+logger = logging.getLogger(__name__)
+
+
+def _nome_frame(code):
+    # Sem ';' (separador das collapsed stacks)
+    nome = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+    return nome.replace(';', ':')
+
+
+class Amostragem:
+    """Amostra periodicamente a pilha de uma thread até ser parada."""
+
+    def __init__(self, thread_id, intervalo):
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas = {}    # tuplo de frames (raiz -> folha) -> nº de amostras
+        self.amostras = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='cpu-sampler', daemon=True)
+        self.inicio = time.perf_counter()
+        self.duracao = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._parar.set()
+        self._thread.join()
+        self.duracao = time.perf_counter() - self.inicio
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                pilha.append(frame.f_code)
+                frame = frame.f_back
+            chave = tuple(_nome_frame(code) for code in reversed(pilha))
+            self.pilhas[chave] = self.pilhas.get(chave, 0) + 1
+            self.amostras += 1
+
+    # --- Formatos de saída ---
+
+    def collapsed(self):
+        """Formato 'collapsed stacks': 'raiz;...;folha N' por linha."""
+        return ''.join(f"{';'.join(pilha)} {n}\n" for pilha, n in sorted(self.pilhas.items()))
+
+    def speedscope(self, nome):
+        """JSON do speedscope (perfil 'sampled', pesos em milissegundos)."""
+        frames, indices = [], {}
+        amostras, pesos = [], []
+        for pilha, n in self.pilhas.items():
+            linha = []
+            for nome_frame in pilha:
+                if nome_frame not in indices:
+                    indices[nome_frame] = len(frames)
+                    frames.append({'name': nome_frame})
+                linha.append(indices[nome_frame])
+            amostras.append(linha)
+            pesos.append(n * self.intervalo * 1000)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled', 'name': nome, 'unit': 'milliseconds',
+                'startValue': 0, 'endValue': sum(pesos),
+                'samples': amostras, 'weights': pesos,
+            }],
+            'exporter': 'yummygo',
+        }
+
+
+class SamplingProfiler:
+    """
+    Extensão Flask (segue o padrão init_app das restantes em extensions.py).
+    """
+
+    def __init__(self):
+        self._ativos = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['sampling_profiler'] = self
+        if not app.config.get('PROFILER_TOKEN') and not app.config.get('PROFILER_SAMPLE_RATE'):
+            return  # Desligado: nem sequer regista os hooks
+        os.makedirs(app.config['PROFILER_DIR'], exist_ok=True)
+        app.before_request(self._iniciar)
+        app.after_request(self._adicionar_cabecalho)
+        app.teardown_request(self._terminar)
+
+    def _deve_perfilar(self):
+        config = current_app.config
+        token = config.get('PROFILER_TOKEN')
+        if token and request.headers.get('X-Profile') == token:
+            return True
+        taxa = config.get('PROFILER_SAMPLE_RATE', 0)
+        return taxa > 0 and random.random() < taxa
+
+    def _iniciar(self):
+        if not self._deve_perfilar():
+            return
+        # Limita o número de pedidos perfilados em simultâneo (custo controlado)
+        with self._lock:
+            if self._ativos >= current_app.config.get('PROFILER_MAX_CONCURRENT', 2):
+                return
+            self._ativos += 1
+        intervalo = current_app.config.get('PROFILER_INTERVAL_MS', 5) / 1000
+        g.amostragem_cpu = Amostragem(threading.get_ident(), intervalo).start()
+        # O ID de correlação do pedido (ver logging_service) liga o perfil aos logs
+        correlacao = g.get('request_id') or f'{os.getpid()}-{threading.get_ident()}'
+        g.perfil_cpu_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{request.endpoint or 'sem_endpoint'}_{correlacao}"
+
+    def _adicionar_cabecalho(self, response):
+        if g.get('perfil_cpu_id'):
+            response.headers['X-Profile-Id'] = g.perfil_cpu_id
+        return response
+
+    def _terminar(self, exc):
+        amostragem = g.pop('amostragem_cpu', None)
+        if amostragem is None:
+            return
+        try:
+            amostragem.stop()
+            self._gravar(amostragem, g.pop('perfil_cpu_id'))
+        except OSError:
+            logger.exception("Erro ao gravar o perfil de CPU")
+        finally:
+            with self._lock:
+                self._ativos -= 1
+
+    def _gravar(self, amostragem, perfil_id):
+        config = current_app.config
+        formato = config.get('PROFILER_FORMAT', 'collapsed')
+        if formato == 'speedscope':
+            caminho = os.path.join(config['PROFILER_DIR'], f'{perfil_id}.speedscope.json')
+            with open(caminho, 'w') as f:
+                json.dump(amostragem.speedscope(f'{request.method} {request.path}'), f)
+        else:
+            caminho = os.path.join(config['PROFILER_DIR'], f'{perfil_id}.folded')
+            with open(caminho, 'w') as f:
+                f.write(amostragem.collapsed())
+        logger.info("Perfil de CPU gravado", extra={
+            'ficheiro': caminho, 'amostras': amostragem.amostras,
+            'duracao_ms': round(amostragem.duracao * 1000, 1), 'endpoint': request.endpoint,
+        })
@@ -0,0 +1,379 @@
+"""
+Serviço de Geração de Dados Sintéticos (Benchmarks)
+
+Gera dados realistas em grande escala para testar o desempenho da app
+num portátil (ex: 5.000 restaurantes, 200.000 clientes, 5 milhões de pedidos):
+
+- endereços com latitude/longitude concentrados em grandes cidades;
+- restaurantes com cozinhas, cardápios de tamanho variável e preços por cozinha;
+- pedidos com popularidade desigual entre restaurantes (lei de potência),
+  picos ao almoço/jantar, 1 a 6 itens e estados realistas;
+- avaliações com notas enviesadas para 4-5 estrelas;
+- histórico de status de cada pedido (EventoPedido) com tempos por etapa.
+
+Tudo é inserido em lotes ('executemany' do SQLAlchemy Core) com IDs
+atribuídos aqui, e a mesma semente produz sempre os mesmos dados.
+Os dados são ADICIONADOS aos que já existem na base de dados.
+"""
+import datetime
+import math
+import random
+import time
+from bisect import bisect_right
+from sqlalchemy import insert, update, func, text
+from src.extensions import db
+from src.models import User, Endereco, Restaurante, Categoria, Produto, Pedido, ItemPedido, Avaliacao, EventoPedido
+from src.services.password_service import hash_password
+
+SENHA_PADRAO = '123456'
+
+# (nome, latitude, longitude, peso)
+CIDADES = [
+    ('São Paulo', 'SP', -23.5505, -46.6333, 45),
+    ('Rio de Janeiro', 'RJ', -22.9068, -43.1729, 25),
+    ('Belo Horizonte', 'MG', -19.9167, -43.9345, 10),
+    ('Curitiba', 'PR', -25.4284, -49.2733, 8),
+    ('Porto Alegre', 'RS', -30.0346, -51.2177, 7),
+    ('Recife', 'PE', -8.0476, -34.8770, 5),
+]
+
+# cozinha -> (peso, preço médio, categorias do cardápio, palavras para os pratos)
+COZINHAS = {
+    'Pizza': (20, 45.0, ['Pizzas Salgadas', 'Pizzas Doces', 'Bebidas', 'Entradas'],
+              ['Margherita', 'Calabresa', '4 Queijos', 'Portuguesa', 'Frango com Catupiry', 'Napolitana']),
+    'Hamburguer': (22, 32.0, ['Burgers', 'Acompanhamentos', 'Bebidas', 'Sobremesas'],
+                   ['X-Bacon', 'Smash', 'Cheddar Duplo', 'Veggie', 'Batata Rústica', 'Onion Rings']),
+    'Japonesa': (12, 55.0, ['Combinados', 'Temakis', 'Quentes', 'Bebidas'],
+                 ['Combo Salmão', 'Temaki Philadelfia', 'Yakisoba', 'Hot Roll', 'Sashimi', 'Guioza']),
+    'Saudável': (8, 30.0, ['Saladas', 'Wraps', 'Sucos', 'Bowls'],
+                 ['Salada Caesar', 'Wrap de Atum', 'Suco Detox', 'Poke', 'Bowl de Quinoa', 'Omelete']),
+    'Doces': (10, 18.0, ['Bolos', 'Sorvetes', 'Doces', 'Bebidas'],
+              ['Brownie', 'Bolo de Cenoura', 'Milkshake', 'Brigadeiro', 'Pudim', 'Açaí']),
+    'Bebidas': (8, 22.0, ['Cervejas', 'Vinhos', 'Cafés', 'Sucos'],
+                ['Cerveja IPA', 'Vinho Tinto', 'Cappuccino', 'Suco de Laranja', 'Refrigerante', 'Água com Gás']),
+    'Brasileira': (20, 35.0, ['Pratos Feitos', 'Porções', 'Bebidas', 'Sobremesas'],
+                   ['Feijoada', 'Parmegiana', 'Picanha', 'Strogonoff', 'Moqueca', 'Baião de Dois']),
+}
+
+TIPOS_PAGAMENTO = (['Cartão de Crédito', 'Pix', 'Cartão de Débito', 'Dinheiro'], [50, 30, 15, 5])
+ESTADOS_EM_CURSO = ['Pendente de Pagamento', 'Recebido', 'Em Preparo', 'Em Rota de Entrega']
+# (status, minutos mínimos e máximos até lá chegar a partir do status anterior)
+FLUXO_PEDIDO = [('Recebido', 0.2, 2), ('Em Preparo', 1, 10), ('Em Rota de Entrega', 8, 35),
+                ('Concluído', 8, 45)]
+RUAS = ['Rua das Flores', 'Avenida Paulista', 'Rua Augusta', 'Avenida Brasil', 'Rua XV de Novembro',
+        'Rua da Consolação', 'Avenida Atlântica', 'Rua Oscar Freire', 'Avenida Afonso Pena']
+# Peso de cada hora do dia nos pedidos (picos ao almoço e ao jantar)
+PESOS_HORAS = [1, 1, 0, 0, 0, 0, 1, 2, 3, 3, 4, 10, 14, 10, 4, 3, 3, 5, 10, 16, 18, 12, 6, 3]
+
+
+def parse_quantidade(valor):
+    """Converte '5M', '200k' ou '5000' num inteiro."""
+    valor = str(valor).strip().lower().replace('_', '')
+    multiplicadores = {'k': 1_000, 'm': 1_000_000}
+    if valor and valor[-1] in multiplicadores:
+        return int(float(valor[:-1]) * multiplicadores[valor[-1]])
+    return int(valor)
+
+
+def _proximo_id(modelo):
+    return (db.session.query(func.max(modelo.id)).scalar() or 0) + 1
+
+
+def _inserir(modelo, linhas):
+    if linhas:
+        db.session.execute(insert(modelo.__table__), linhas)
+
+
+def _corrigir_sequencias(modelos):
+    """No Postgres, acerta as sequências dos IDs depois de os inserirmos à mão."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabela = modelo.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {tabela}), 1))"
+        ))
+
+
+class _Gerador:
+    def __init__(self, seed, lote, log):
+        self.rnd = random.Random(seed)
+        self.lote = lote
+        self.log = log
+        self.agora = datetime.datetime.utcnow().replace(microsecond=0)
+
+    def _local(self):
+        nome, uf, lat, lon, _ = self.rnd.choices(CIDADES, [c[4] for c in CIDADES])[0]
+        # Dispersão ~10 km à volta do centro da cidade
+        return nome, uf, lat + self.rnd.gauss(0, 0.08), lon + self.rnd.gauss(0, 0.08)
+
+    def _endereco(self, endereco_id, user_id):
+        cidade, uf, lat, lon = self._local()
+        return {
+            'id': endereco_id, 'rua': self.rnd.choice(RUAS), 'numero': str(self.rnd.randint(1, 3000)),
+            'complemento': None, 'bairro': 'Centro', 'cidade': cidade, 'estado': uf,
+            'cep': f'{self.rnd.randint(10000, 99999)}-{self.rnd.randint(0, 999):03d}',
+            'latitude': round(lat, 6), 'longitude': round(lon, 6), 'user_id': user_id,
+        }
+
+    # --- Utilizadores e endereços ---
+
+    def utilizadores(self, n_clientes, n_donos, senha_hash):
+        """Insere clientes e donos. Devolve (ids_clientes, ids_donos, endereço_texto_por_cliente)."""
+        user_id = _proximo_id(User)
+        endereco_id = _proximo_id(Endereco)
+        agora = self.agora
+        clientes, donos, moradas = [], [], {}
+        linhas_users, linhas_end = [], []
+
+        for i in range(n_clientes + n_donos):
+            e_dono = i >= n_clientes
+            uid = user_id + i
+            linhas_users.append({
+                'id': uid, 'nome_completo': f"{'Dono' if e_dono else 'Cliente'} {uid}",
+                'email': f"{'dono' if e_dono else 'cliente'}{uid}@seed.yummygo",
+                'telefone': f'+55{uid:011d}', 'password_hash': senha_hash,
+                'data_criacao': agora - datetime.timedelta(days=self.rnd.randint(0, 720)),
+                'is_active': True, 'role': 'restaurante' if e_dono else 'cliente',
+                'pontos': 0 if e_dono else int(self.rnd.expovariate(1 / 800)), 'nivel': 'Bronze',
+            })
+            (donos if e_dono else clientes).append(uid)
+
+            # Clientes têm 1 a 3 endereços; donos têm o endereço do restaurante
+            for _ in range(1 if e_dono else min(3, 1 + int(self.rnd.expovariate(2)))):
+                end = self._endereco(endereco_id, uid)
+                endereco_id += 1
+                linhas_end.append(end)
+                moradas.setdefault(uid, f"{end['rua']}, {end['numero']} - {end['cep']}")
+
+            if len(linhas_users) >= self.lote:
+                self._gravar_utilizadores(linhas_users, linhas_end)
+                linhas_users, linhas_end = [], []
+        self._gravar_utilizadores(linhas_users, linhas_end)
+
+        # Nível coerente com os pontos
+        db.session.execute(update(User).where(User.pontos >= 2000).values(nivel='Prata'))
+        db.session.execute(update(User).where(User.pontos >= 5000).values(nivel='Ouro'))
+        db.session.commit()
+        self.log(f'  {n_clientes} clientes e {n_donos} donos criados.')
+        return clientes, donos, moradas
+
+    def _gravar_utilizadores(self, linhas_users, linhas_end):
+        _inserir(User, linhas_users)
+        _inserir(Endereco, linhas_end)
+        db.session.commit()
+
+    # --- Restaurantes e cardápios ---
+
+    def restaurantes(self, donos):
+        """
+        Insere restaurantes, categorias e produtos.
+        Devolve [(restaurante_id, taxa, [(produto_id, preço), ...]), ...].
+        """
+        rest_id = _proximo_id(Restaurante)
+        cat_id = _proximo_id(Categoria)
+        prod_id = _proximo_id(Produto)
+        nomes_cozinhas = list(COZINHAS)
+        pesos_cozinhas = [COZINHAS[c][0] for c in nomes_cozinhas]
+        catalogo = []
+        linhas_rest, linhas_cat, linhas_prod = [], [], []
+
+        for dono_id in donos:
+            cozinha = self.rnd.choices(nomes_cozinhas, pesos_cozinhas)[0]
+            _, preco_medio, categorias, pratos = COZINHAS[cozinha]
+            taxa = self.rnd.choice([0.0, 0.0, 4.99, 5.99, 7.5, 9.9, 12.0])
+            linhas_rest.append({
+                'id': rest_id, 'nome_fantasia': f'{cozinha} {self.rnd.choice(pratos)} #{rest_id}',
+                'razao_social': None, 'cnpj': f'{rest_id:014d}', 'user_id': dono_id,
+                'logo_url': None, 'tempo_medio_entrega': self.rnd.choice([20, 25, 30, 35, 40, 45, 60]),
+                'taxa_entrega': taxa, 'ativo': self.rnd.random() < 0.85,
+            })
+
+            # Tamanho do cardápio: log-normal (mediana ~25 produtos, entre 5 e 150)
+            n_produtos = max(5, min(150, int(self.rnd.lognormvariate(math.log(25), 0.6))))
+            ids_categorias = []
+            for nome_cat in categorias[:self.rnd.randint(2, len(categorias))]:
+                linhas_cat.append({'id': cat_id, 'nome': nome_cat, 'restaurante_id': rest_id})
+                ids_categorias.append(cat_id)
+                cat_id += 1
+
+            produtos = []
+            for j in range(n_produtos):
+                preco = round(max(3.0, self.rnd.lognormvariate(math.log(preco_medio), 0.35)), 2)
+                linhas_prod.append({
+                    'id': prod_id, 'nome': f'{self.rnd.choice(pratos)} {j + 1}',
+                    'descricao': f'{cozinha} preparado na hora.', 'preco': preco, 'imagem_url': None,
+                    'disponivel': self.rnd.random() < 0.95, 'categoria_id': self.rnd.choice(ids_categorias),
+                    'restaurante_id': rest_id,
+                })
+                produtos.append((prod_id, preco))
+                prod_id += 1
+
+            catalogo.append((rest_id, taxa, produtos))
+            rest_id += 1
+
+            if len(linhas_prod) >= self.lote:
+                self._gravar_cardapios(linhas_rest, linhas_cat, linhas_prod)
+                linhas_rest, linhas_cat, linhas_prod = [], [], []
+        self._gravar_cardapios(linhas_rest, linhas_cat, linhas_prod)
+
+        total = sum(len(p) for _, _, p in catalogo)
+        self.log(f'  {len(catalogo)} restaurantes com {total} produtos criados.')
+        return catalogo
+
+    def _gravar_cardapios(self, linhas_rest, linhas_cat, linhas_prod):
+        _inserir(Restaurante, linhas_rest)
+        _inserir(Categoria, linhas_cat)
+        _inserir(Produto, linhas_prod)
+        db.session.commit()
+
+    # --- Pedidos, itens e avaliações ---
+
+    def pedidos(self, n_pedidos, clientes, moradas, catalogo, dias, taxa_avaliacoes):
+        pedido_id = _proximo_id(Pedido)
+        item_id = _proximo_id(ItemPedido)
+        avaliacao_id = _proximo_id(Avaliacao)
+        evento_id = _proximo_id(EventoPedido)
+
+        # Popularidade: lei de potência (poucos restaurantes recebem muitos pedidos)
+        pesos_rest = [1 / (i + 1) ** 0.8 for i in range(len(catalogo))]
+        self.rnd.shuffle(pesos_rest)
+        acumulado_rest = _acumular(pesos_rest)
+        # Alguns clientes pedem muito mais do que outros
+        acumulado_cli = _acumular([self.rnd.paretovariate(1.5) for _ in clientes])
+        acumulado_horas = _acumular(PESOS_HORAS)
+        formas, pesos_formas = TIPOS_PAGAMENTO
+        acumulado_formas = _acumular(pesos_formas)
+
+        linhas_ped, linhas_itens, linhas_aval, linhas_eventos = [], [], [], []
+        inicio = time.perf_counter()
+        for n in range(n_pedidos):
+            rest_id, taxa, produtos = catalogo[_escolher(self.rnd, acumulado_rest)]
+            cliente_id = clientes[_escolher(self.rnd, acumulado_cli)]
+
+            dia = self.agora.date() - datetime.timedelta(days=int(self.rnd.random() ** 0.7 * dias))
+            data = datetime.datetime.combine(dia, datetime.time(_escolher(self.rnd, acumulado_horas),
+                                                                self.rnd.randint(0, 59), self.rnd.randint(0, 59)))
+            idade_horas = (self.agora - data).total_seconds() / 3600
+            if idade_horas < 1.5:
+                status = self.rnd.choice(ESTADOS_EM_CURSO)
+            else:
+                status = 'Cancelado' if self.rnd.random() < 0.05 else 'Concluído'
+
+            total = 0.0
+            for produto_id, preco in self.rnd.sample(produtos, min(len(produtos), 1 + int(self.rnd.expovariate(0.7)))):
+                quantidade = 1 if self.rnd.random() < 0.75 else self.rnd.randint(2, 4)
+                linhas_itens.append({'id': item_id, 'pedido_id': pedido_id, 'produto_id': produto_id,
+                                     'quantidade': quantidade, 'preco_unitario_na_compra': preco})
+                item_id += 1
+                total += preco * quantidade
+
+            linhas_ped.append({
+                'id': pedido_id, 'cliente_id': cliente_id, 'restaurante_id': rest_id,
+                'preco_total': round(total + taxa, 2), 'status': status, 'data_criacao': data,
+                'endereco_entrega': moradas[cliente_id],
+                'tipo_pagamento': formas[_escolher(self.rnd, acumulado_formas)],
+                'delivery_pin': None if status == 'Pendente de Pagamento' else f'{self.rnd.randint(1000, 9999)}',
+            })
+
+            for anterior, novo, instante in self._historico(status, data):
+                linhas_eventos.append({'id': evento_id, 'pedido_id': pedido_id, 'restaurante_id': rest_id,
+                                       'status_anterior': anterior, 'status': novo, 'data_criacao': instante})
+                evento_id += 1
+
+            if status == 'Concluído' and self.rnd.random() < taxa_avaliacoes:
+                nota = self.rnd.choices([1, 2, 3, 4, 5], [4, 5, 11, 30, 50])[0]
+                linhas_aval.append({
+                    'id': avaliacao_id, 'pedido_id': pedido_id, 'restaurante_id': rest_id,
+                    'cliente_id': cliente_id, 'nota': nota, 'comentario': None, 'reclamacao': nota <= 2,
+                    'data_criacao': data + datetime.timedelta(hours=self.rnd.uniform(1, 48)),
+                })
+                avaliacao_id += 1
+            pedido_id += 1
+
+            if len(linhas_ped) >= self.lote:
+                self._gravar_pedidos(linhas_ped, linhas_itens, linhas_aval, linhas_eventos)
+                linhas_ped, linhas_itens, linhas_aval, linhas_eventos = [], [], [], []
+                feitos = n + 1
+                ritmo = feitos / (time.perf_counter() - inicio)
+                self.log(f'  {feitos}/{n_pedidos} pedidos ({ritmo:,.0f} pedidos/s)')
+        self._gravar_pedidos(linhas_ped, linhas_itens, linhas_aval, linhas_eventos)
+        self.log(f'  {n_pedidos} pedidos criados.')
+
+    def _historico(self, status, data):
+        """[(status anterior, status, instante)] de um pedido criado em 'data' que está em 'status'."""
+        eventos = [(None, 'Pendente de Pagamento', data)]
+        if status == 'Pendente de Pagamento':
+            return eventos
+        # Cancelados: param numa etapa ao acaso
+        fim = self.rnd.randint(1, len(FLUXO_PEDIDO) - 1) if status == 'Cancelado' else None
+        instante = data
+        for n, (novo, minimo, maximo) in enumerate(FLUXO_PEDIDO):
+            if n == fim:
+                novo = 'Cancelado'
+            instante += datetime.timedelta(minutes=self.rnd.uniform(minimo, maximo))
+            eventos.append((eventos[-1][1], novo, instante))
+            if novo == status:
+                break
+        return eventos
+
+    def _gravar_pedidos(self, linhas_ped, linhas_itens, linhas_aval, linhas_eventos):
+        _inserir(Pedido, linhas_ped)
+        _inserir(ItemPedido, linhas_itens)
+        _inserir(Avaliacao, linhas_aval)
+        _inserir(EventoPedido, linhas_eventos)
+        db.session.commit()
+
+
+def _acumular(pesos):
+    total, acumulado = 0.0, []
+    for p in pesos:
+        total += p
+        acumulado.append(total)
+    return acumulado
+
+
+def _escolher(rnd, acumulado):
+    """Escolha ponderada em O(log n) (bisect sobre os pesos acumulados)."""
+    return min(bisect_right(acumulado, rnd.random() * acumulado[-1]), len(acumulado) - 1)
+
+
+def seed_database(restaurantes, utilizadores, pedidos, dias=180, seed=42, lote=10000,
+                  taxa_avaliacoes=0.35, log=print):
+    """
+    Gera e insere os dados sintéticos. Deve correr dentro de um app_context.
+
+    :param restaurantes: Número de restaurantes (cada um com o seu dono).
+    :param utilizadores: Número de clientes.
+    :param pedidos: Número de pedidos (distribuídos pelos últimos 'dias').
+    """
+    gerador = _Gerador(seed, lote, log)
+    inicio = time.perf_counter()
+
+    log('A criar utilizadores e endereços...')
+    clientes, donos, moradas = gerador.utilizadores(utilizadores, restaurantes, hash_password(SENHA_PADRAO))
+
+    log('A criar restaurantes e cardápios...')
+    catalogo = gerador.restaurantes(donos)
+
+    if pedidos and clientes and catalogo:
+        log('A criar pedidos, itens e avaliações...')
+        gerador.pedidos(pedidos, clientes, moradas, catalogo, dias, taxa_avaliacoes)
+
+    _corrigir_sequencias([User, Endereco, Restaurante, Categoria, Produto, Pedido, ItemPedido, Avaliacao, EventoPedido])
+    db.session.commit()
+
+    # As avaliações foram inseridas em bloco (sem o record_review): agregados de uma vez
+    log('A calcular os agregados das avaliações...')
+    from src.services.rating_service import rebuild_ratings
+    rebuild_ratings()
+
+    log('A calcular o ranking dos restaurantes...')
+    from src.services.ranking_service import recompute_rankings
+    recompute_rankings()
+
+    log('A calcular os tempos por etapa (previsão de entrega)...')
+    from src.services.eta_service import recompute_stage_times
+    recompute_stage_times()
+    log(f'Concluído em {time.perf_counter() - inicio:.1f}s. Senha de todos os utilizadores: {SENHA_PADRAO}')
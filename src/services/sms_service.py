@@ -3,8 +3,11 @@ Serviço de SMS
 
 Centraliza a lógica de envio de SMS via Twilio.
 """
-from twilio.rest import Client
+import logging
 from flask import current_app
+from src.services.metrics_service import track_outbound
+
+logger = logging.getLogger(__name__)
 
 def send_sms(to_number, body):
     """
@@ -19,21 +22,28 @@ def send_sms(to_number, body):
         auth_token = current_app.config['TWILIO_AUTH_TOKEN']
         from_number = current_app.config['TWILIO_PHONE_NUMBER']
         
-        # 2. Cria o cliente Twilio
-        client = Client(account_sid, auth_token)
+        # 2. Cria o cliente Twilio (SDK importado só aqui: é pesado e raramente usado)
+        from twilio.rest import Client
+        from twilio.http.http_client import TwilioHttpClient
+        http_client = TwilioHttpClient(timeout=current_app.config.get('OUTBOUND_TIMEOUT', 10))
+        client = Client(account_sid, auth_token, http_client=http_client)
+        # (Opcional) Endereço alternativo da API, ex: um stub local nos testes de carga
+        if current_app.config.get('TWILIO_API_BASE'):
+            client.api.base_url = current_app.config['TWILIO_API_BASE']
         
         # 3. Cria e envia a mensagem
-        message = client.messages.create(
-            body=body,
-            from_=from_number,  # O número de teste do Twilio
-            to=to_number        # O número verificado do destinatário
-        )
+        with track_outbound('twilio'):
+            message = client.messages.create(
+                body=body,
+                from_=from_number,  # O número de teste do Twilio
+                to=to_number        # O número verificado do destinatário
+            )
         
         # Log de sucesso (vemos isto no terminal)
-        print(f"SMS enviado com sucesso! SID: {message.sid}")
+        logger.info("SMS enviado com sucesso", extra={'sid': message.sid})
         return True
     
     except Exception as e:
         # Log de erro
-        print(f"Erro ao enviar SMS via Twilio: {e}")
+        logger.exception("Erro ao enviar SMS via Twilio")
         return False
\ No newline at end of file
@@ -1,23 +1,51 @@
-import cloudinary
-import cloudinary.uploader
+import logging
 from flask import current_app
+from src.services.metrics_service import track_outbound
 
-def upload_image(file_to_upload):
+logger = logging.getLogger(__name__)
+
+
+def _cloudinary():
     """
-    Envia uma imagem para o Cloudinary e retorna a URL segura.
+    Importa e configura o SDK do Cloudinary na primeira utilização (não no
+    arranque do worker) com as chaves do config.py.
     """
-    # Configura o Cloudinary com as chaves do config.py
+    import cloudinary
+    import cloudinary.uploader
     cloudinary.config(
         cloud_name=current_app.config['CLOUDINARY_CLOUD_NAME'],
         api_key=current_app.config['CLOUDINARY_API_KEY'],
         api_secret=current_app.config['CLOUDINARY_API_SECRET']
     )
+    return cloudinary.uploader
+
+def upload_image(file_to_upload):
+    """
+    Envia uma imagem para o Cloudinary e retorna a URL segura.
+    """
+    # Configura o Cloudinary com as chaves do config.py
+    uploader = _cloudinary()
     
     try:
         # Faz o upload
-        upload_result = cloudinary.uploader.upload(file_to_upload)
+        with track_outbound('cloudinary'):
+            upload_result = uploader.upload(file_to_upload, timeout=current_app.config.get('OUTBOUND_TIMEOUT', 10))
         # Retorna a URL pública da imagem
         return upload_result['secure_url']
     except Exception as e:
-        print(f"Erro no upload para Cloudinary: {e}")
-        return None
\ No newline at end of file
+        logger.exception("Erro no upload para Cloudinary")
+        return None
+
+def upload_bytes(dados, public_id, formato):
+    """
+    Envia uma imagem já processada (bytes) para o Cloudinary com um
+    'public_id' fixo (o mesmo conteúdo fica sempre no mesmo sítio).
+    Ao contrário de upload_image, lança a exceção em caso de erro.
+    """
+    uploader = _cloudinary()
+    with track_outbound('cloudinary'):
+        upload_result = uploader.upload(
+            dados, public_id=public_id, format=formato, overwrite=False, resource_type='image',
+            timeout=current_app.config.get('OUTBOUND_TIMEOUT', 10)
+        )
+    return upload_result['secure_url']
@@ -0,0 +1,179 @@
+"""
+Serviço de Cache de Utilizadores (Identidade)
+
+O Flask-Login chama o 'user_loader' em TODOS os pedidos autenticados.
+Em vez de ir à DB de cada vez, guardamos em memória (com um TTL curto) os
+dados de identidade mais usados: role, nível, pontos, nome, contactos e o
+ID do restaurante do utilizador.
+
+O 'current_user' passa a ser um CachedUser: responde a esses campos sem
+queries e só carrega o User real da DB quando é preciso outro atributo
+(ex: current_user.enderecos) ou quando se altera algum campo.
+
+Os pontos e o nível em cache podem ter até USER_CACHE_TTL segundos (outro
+worker ou o webhook do Stripe podem tê-los alterado entretanto): servem
+para mostrar, nunca para ler-alterar-escrever. Para creditar pontos usa-se
+add_points(), que soma na própria DB com um só UPDATE.
+
+A cache é invalidada após o commit sempre que um User (ou o seu
+Restaurante) é criado, alterado ou apagado. Como cada worker tem a sua
+própria cache, o TTL (USER_CACHE_TTL) limita o tempo em que os outros
+workers podem ver dados antigos.
+"""
+import threading
+import time
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, update, case, func
+from sqlalchemy.orm import Session
+from src.extensions import db
+from src.models import User, Restaurante
+
+# Campos de identidade guardados em cache
+CAMPOS = ('id', 'nome_completo', 'email', 'telefone', 'role', 'nivel', 'pontos', 'is_active')
+# Campos que mudam sem ser pelo próprio utilizador (lidos da DB se houver escritas pendentes)
+CAMPOS_VOLATEIS = ('nivel', 'pontos')
+
+# Pontos mínimos de cada nível (do mais alto para o mais baixo)
+NIVEIS = (('Ouro', 5000), ('Prata', 2000))
+
+# user_id -> (instante_de_carga, {campo: valor})
+_identidades = {}
+_lock = threading.Lock()
+MAX_ENTRADAS = 100000
+
+
+class CachedUser(UserMixin):
+    """
+    Identidade do utilizador em cache, compatível com o Flask-Login.
+
+    Lê os campos de CAMPOS (e 'restaurante') sem carregar o User. Qualquer
+    outro atributo, ou qualquer escrita, carrega o User real da DB e passa
+    a delegar nele. Os pontos e o nível deixam de vir da cache assim que o
+    utilizador tem alterações pendentes ou a sua entrada foi invalidada.
+    Não usar 'current_user.pontos += n' (perde os créditos feitos noutros
+    workers): ver add_points().
+    """
+
+    def __init__(self, dados):
+        object.__setattr__(self, '_dados', dados)
+        object.__setattr__(self, '_user', None)
+
+    def _load(self):
+        user = self._user
+        if user is None:
+            user = db.session.get(User, self._dados['id'])
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def _desatualizado(self):
+        """True se há escritas deste utilizador na sessão, ou a cache já não tem estes dados."""
+        user_id = self._dados['id']
+        if user_id in db.session.info.get('utilizadores_alterados', ()):
+            return True
+        entrada = _identidades.get(user_id)
+        return entrada is None or entrada[1] is not self._dados
+
+    def __getattr__(self, nome):
+        # Só é chamado quando o atributo não existe na própria classe
+        if self._user is not None:
+            return getattr(self._user, nome)
+        if nome in CAMPOS_VOLATEIS and self._desatualizado():
+            return getattr(self._load(), nome)
+        if nome in self._dados:
+            return self._dados[nome]
+        if nome == 'restaurante':
+            restaurante_id = self._dados['restaurante_id']
+            # get() por chave primária usa o identity map: só há uma query por pedido
+            return db.session.get(Restaurante, restaurante_id) if restaurante_id else None
+        return getattr(self._load(), nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._load(), nome, valor)
+
+    @property
+    def is_active(self):
+        if self._user is not None:
+            return self._user.is_active
+        return self._dados['is_active'] is not False
+
+    def __repr__(self):
+        return f"<CachedUser {self._dados['nome_completo']} (ID: {self._dados['id']})>"
+
+
+def load_cached_user(user_id):
+    """
+    Devolve a identidade do utilizador (CachedUser) a partir da cache,
+    ou com uma única query (User + ID do restaurante) se não estiver em cache.
+    """
+    ttl = current_app.config.get('USER_CACHE_TTL', 30)
+    entrada = _identidades.get(user_id)
+    if entrada and time.monotonic() - entrada[0] < ttl:
+        return CachedUser(entrada[1])
+
+    linha = db.session.query(
+        *[getattr(User, campo) for campo in CAMPOS], Restaurante.id
+    ).outerjoin(Restaurante, Restaurante.user_id == User.id).filter(User.id == user_id).first()
+    if linha is None:
+        return None
+
+    dados = dict(zip(CAMPOS, linha[:-1]))
+    dados['restaurante_id'] = linha[-1]
+
+    with _lock:
+        if len(_identidades) >= MAX_ENTRADAS:
+            _identidades.clear()
+        _identidades[user_id] = (time.monotonic(), dados)
+    return CachedUser(dados)
+
+
+def add_points(user_id, pontos):
+    """
+    Credita pontos a um utilizador e recalcula o nível, num só UPDATE
+    atómico (pontos = pontos + n), sem ler os pontos antes: créditos
+    simultâneos de outros workers (ou do webhook) não se perdem.
+
+    Não faz commit; a cache do utilizador é invalidada no commit.
+
+    :return: (pontos, nivel) depois do crédito
+    """
+    total = func.coalesce(User.pontos, 0) + pontos
+    nivel = case(*[(total >= minimo, nome) for nome, minimo in NIVEIS], else_='Bronze')
+    resultado = db.session.execute(
+        update(User).where(User.id == user_id).values(pontos=total, nivel=nivel)
+        .returning(User.pontos, User.nivel)
+    ).one()
+    # O UPDATE em massa não passa pelo after_flush: regista-se à mão
+    db.session.info.setdefault('utilizadores_alterados', set()).add(user_id)
+    return resultado.pontos, resultado.nivel
+
+
+def invalidate_user(user_id=None):
+    """Remove um utilizador da cache (ou todos, se user_id for None)."""
+    with _lock:
+        if user_id is None:
+            _identidades.clear()
+        else:
+            _identidades.pop(user_id, None)
+
+
+# --- Invalidação automática (perfil, role, pontos, restaurante) ---
+
+@event.listens_for(Session, 'after_flush')
+def _registar_utilizadores_alterados(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault('utilizadores_alterados', set()).add(obj.id)
+        elif isinstance(obj, Restaurante) and obj.user_id is not None:
+            session.info.setdefault('utilizadores_alterados', set()).add(obj.user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    for user_id in session.info.pop('utilizadores_alterados', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _limpar_apos_rollback(session):
+    session.info.pop('utilizadores_alterados', None)